@@ -0,0 +1,325 @@
+"""Per-session admission control and weighted fair queuing for tool calls.
+
+Every tool call passes ``AdmissionController.acquire`` before it reaches
+the execution layer, keyed by the session id the observability layer
+derives (``session_id``, else ``client_id``):
+
+1. Rate: each session has a token bucket (``rate_per_s`` refill, ``burst``
+   capacity). Interactive tools cost one token, batch tools
+   (``BATCH_TOOLS``) cost ``batch_cost``. An empty bucket rejects the
+   call with ``RATE_LIMITED`` and a ``retry_after_s`` hint.
+2. In flight: a session may have at most ``max_in_flight`` calls queued or
+   running; more are rejected with ``SESSION_BUSY``.
+3. Slots: at most ``max_concurrent`` calls run server-wide. Calls beyond
+   that wait in a weighted fair queue whose flows are (session, class):
+   each flow gets service in proportion to its class weight
+   (interactive ``interactive_weight``, batch ``batch_weight``), so one
+   session's batch jobs cannot push interactive quoting to the back of
+   the line. A full queue rejects with ``QUEUE_FULL``; a call that waits
+   longer than ``queue_timeout_s`` is rejected with ``QUEUE_TIMEOUT``.
+
+Long-poll tools (``LONG_POLL_TOOLS``) spend their call waiting rather
+than working: they pay their token but skip the in-flight cap and the
+slots, so a client watching a task does not crowd out real work.
+
+Calls without a session id all map to ``unknown``; they share the queue
+like any other flow but skip the per-session bucket and in-flight cap,
+which would otherwise throttle every anonymous client together.
+
+Rejections are returned as v1 error envelopes and counted in
+``mcp_admission_rejections_total``.
+
+Environment: MCP_ADMISSION_ENABLED, MCP_ADMISSION_RATE,
+MCP_ADMISSION_BURST, MCP_ADMISSION_BATCH_COST, MCP_ADMISSION_MAX_IN_FLIGHT,
+MCP_ADMISSION_MAX_CONCURRENT, MCP_ADMISSION_MAX_QUEUE,
+MCP_ADMISSION_QUEUE_TIMEOUT_S, MCP_ADMISSION_INTERACTIVE_WEIGHT,
+MCP_ADMISSION_BATCH_WEIGHT.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from mcp_tools.contracts import ADMISSION_ERROR_CODES, CONTRACT_VERSION
+
+from .metrics import ADMISSION_QUEUE_WAIT, ADMISSION_QUEUED, ADMISSION_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_SESSION = "unknown"
+
+# Tools that submit or run many units of work per call
+BATCH_TOOLS = frozenset({
+    "batch_bom_calculate",
+    "bulk_price_check",
+    "full_quotation",
+    "batch_validate_corrections",
+    "multi_call",
+})
+
+# Tools that mostly wait (for background task results)
+LONG_POLL_TOOLS = frozenset({"task_watch"})
+
+MAX_SESSIONS = 4096
+
+
+class ToolClass(str, enum.Enum):
+    """Fair-queuing class of a tool."""
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        logger.warning("Ignoring non-numeric %s=%r", name, os.environ.get(name))
+        return default
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """Limits applied by ``AdmissionController``."""
+
+    enabled: bool = True
+    rate_per_s: float = 10.0
+    burst: float = 20.0
+    batch_cost: float = 5.0
+    max_in_flight: int = 4
+    max_concurrent: int = 32
+    max_queue: int = 256
+    queue_timeout_s: float = 10.0
+    interactive_weight: float = 4.0
+    batch_weight: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> AdmissionPolicy:
+        return cls(
+            enabled=os.environ.get("MCP_ADMISSION_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"},
+            rate_per_s=_env_float("MCP_ADMISSION_RATE", cls.rate_per_s),
+            burst=_env_float("MCP_ADMISSION_BURST", cls.burst),
+            batch_cost=_env_float("MCP_ADMISSION_BATCH_COST", cls.batch_cost),
+            max_in_flight=int(_env_float("MCP_ADMISSION_MAX_IN_FLIGHT", cls.max_in_flight)),
+            max_concurrent=int(_env_float("MCP_ADMISSION_MAX_CONCURRENT", cls.max_concurrent)),
+            max_queue=int(_env_float("MCP_ADMISSION_MAX_QUEUE", cls.max_queue)),
+            queue_timeout_s=_env_float("MCP_ADMISSION_QUEUE_TIMEOUT_S", cls.queue_timeout_s),
+            interactive_weight=_env_float("MCP_ADMISSION_INTERACTIVE_WEIGHT", cls.interactive_weight),
+            batch_weight=_env_float("MCP_ADMISSION_BATCH_WEIGHT", cls.batch_weight),
+        )
+
+
+class AdmissionRejected(Exception):
+    """A call refused by admission control."""
+
+    def __init__(self, code: str, message: str, retry_after_s: float | None = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.retry_after_s = retry_after_s
+
+    def to_envelope(self) -> dict[str, Any]:
+        error: dict[str, Any] = {"code": self.code, "message": self.message}
+        if self.retry_after_s is not None:
+            error["details"] = {"retry_after_s": round(self.retry_after_s, 3)}
+        return {"ok": False, "contract_version": CONTRACT_VERSION, "error": error}
+
+
+class _Session:
+    __slots__ = ("tokens", "refilled", "in_flight")
+
+    def __init__(self, burst: float, now: float) -> None:
+        self.tokens = burst
+        self.refilled = now
+        self.in_flight = 0
+
+
+class AdmissionTicket:
+    """An admitted call; ``release`` it when the call finishes."""
+
+    __slots__ = ("_controller", "_session", "_released")
+
+    def __init__(self, controller: AdmissionController | None, session: _Session | None) -> None:
+        self._controller = controller
+        self._session = session
+        self._released = False
+
+    def release(self) -> None:
+        if self._released or self._controller is None:
+            return
+        self._released = True
+        self._controller._release(self._session)
+
+
+_UNLIMITED = AdmissionTicket(None, None)
+
+
+class AdmissionController:
+    """Token buckets, in-flight caps and a weighted fair queue in front of the tools."""
+
+    def __init__(self, policy: AdmissionPolicy | None = None) -> None:
+        self.policy = policy or AdmissionPolicy.from_env()
+        self._sessions: dict[str, _Session] = {}
+        self._active = 0
+        # (finish tag, sequence, waiter future, class)
+        self._queue: list[tuple[float, int, asyncio.Future[None], ToolClass]] = []
+        self._virtual_time = 0.0
+        self._last_tag: dict[tuple[str, ToolClass], float] = {}
+        self._sequence = itertools.count()
+        self._counts = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    @staticmethod
+    def classify(tool: str) -> ToolClass:
+        return ToolClass.BATCH if tool in BATCH_TOOLS else ToolClass.INTERACTIVE
+
+    async def acquire(self, session_id: str, tool: str) -> AdmissionTicket:
+        """Admit a call or raise ``AdmissionRejected``."""
+        policy = self.policy
+        if not policy.enabled:
+            return _UNLIMITED
+        tool_class = self.classify(tool)
+        long_poll = tool in LONG_POLL_TOOLS
+        session = None
+        if session_id != ANONYMOUS_SESSION:
+            session = self._session(session_id)
+            # Busy before rate: a refused call must not spend a token
+            if not long_poll and session.in_flight >= policy.max_in_flight:
+                self._reject(
+                    tool_class, "SESSION_BUSY",
+                    f"Session already has {session.in_flight} call(s) in flight (limit {policy.max_in_flight})",
+                )
+            self._take_token(session, tool_class)
+        if long_poll:
+            return _UNLIMITED
+        if session is not None:
+            session.in_flight += 1
+
+        try:
+            if self._active < policy.max_concurrent and not self._queue:
+                self._active += 1
+            else:
+                await self._wait_for_slot(session_id, tool_class)
+        except BaseException:
+            if session is not None:
+                session.in_flight -= 1
+            raise
+        self._counts["admitted"] += 1
+        return AdmissionTicket(self, session)
+
+    def _session(self, session_id: str) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            if len(self._sessions) >= MAX_SESSIONS:
+                self._prune_sessions()
+            session = self._sessions[session_id] = _Session(self.policy.burst, time.monotonic())
+        return session
+
+    def _prune_sessions(self) -> None:
+        # Idle sessions with a full bucket carry no state worth keeping
+        now = time.monotonic()
+        policy = self.policy
+        for session_id, session in list(self._sessions.items()):
+            refilled = session.tokens + (now - session.refilled) * policy.rate_per_s
+            if session.in_flight == 0 and refilled >= policy.burst:
+                del self._sessions[session_id]
+
+    def _take_token(self, session: _Session, tool_class: ToolClass) -> None:
+        policy = self.policy
+        now = time.monotonic()
+        session.tokens = min(policy.burst, session.tokens + (now - session.refilled) * policy.rate_per_s)
+        session.refilled = now
+        cost = min(policy.batch_cost if tool_class is ToolClass.BATCH else 1.0, policy.burst)
+        if session.tokens < cost:
+            retry_after = (cost - session.tokens) / policy.rate_per_s if policy.rate_per_s > 0 else None
+            self._reject(tool_class, "RATE_LIMITED", "Session rate limit exceeded", retry_after)
+        session.tokens -= cost
+
+    async def _wait_for_slot(self, session_id: str, tool_class: ToolClass) -> None:
+        policy = self.policy
+        if len(self._queue) >= policy.max_queue:
+            self._reject(tool_class, "QUEUE_FULL", "Server is at capacity; try again shortly", 1.0)
+
+        # WFQ finish tag: a flow's calls are spaced 1/weight apart in virtual time
+        flow = (session_id, tool_class)
+        weight = policy.batch_weight if tool_class is ToolClass.BATCH else policy.interactive_weight
+        tag = max(self._virtual_time, self._last_tag.get(flow, 0.0)) + 1.0 / max(weight, 1e-6)
+        self._last_tag[flow] = tag
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (tag, next(self._sequence), waiter, tool_class)
+        heapq.heappush(self._queue, entry)
+        self._counts["queued"] += 1
+        queued = ADMISSION_QUEUED.labels(tool_class.value)
+        queued.inc()
+        started = time.perf_counter()
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=policy.queue_timeout_s)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._hand_off()  # the slot was already ours; pass it on
+            else:
+                self._dequeue(entry)
+            raise
+        finally:
+            queued.dec()
+        if not done:
+            self._dequeue(entry)
+            self._reject(
+                tool_class, "QUEUE_TIMEOUT",
+                f"Waited {policy.queue_timeout_s:g}s for a server slot", policy.queue_timeout_s,
+            )
+        ADMISSION_QUEUE_WAIT.labels(tool_class.value).observe((time.perf_counter() - started) * 1000)
+
+    def _dequeue(self, entry: tuple[float, int, asyncio.Future[None], ToolClass]) -> None:
+        entry[2].cancel()
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    def _release(self, session: _Session | None) -> None:
+        if session is not None:
+            session.in_flight -= 1
+        self._hand_off()
+
+    def _hand_off(self) -> None:
+        """Give a finished call's slot to the queued call with the smallest finish tag."""
+        if self._queue:
+            tag, _, waiter, _ = heapq.heappop(self._queue)
+            self._virtual_time = tag
+            waiter.set_result(None)
+            return
+        self._active -= 1
+        # Flows whose tags are behind the virtual clock are equivalent to new ones
+        if len(self._last_tag) > MAX_SESSIONS:
+            self._last_tag = {flow: tag for flow, tag in self._last_tag.items() if tag > self._virtual_time}
+
+    def _reject(self, tool_class: ToolClass, reason: str, message: str, retry_after_s: float | None = None) -> None:
+        self._counts["rejected"] += 1
+        ADMISSION_REJECTIONS.labels(tool_class.value, reason).inc()
+        raise AdmissionRejected(ADMISSION_ERROR_CODES[reason], message, retry_after_s)
+
+    def stats(self) -> dict[str, Any]:
+        """Counters since start plus current occupancy."""
+        return {
+            **self._counts,
+            "active": self._active,
+            "queued_now": len(self._queue),
+            "sessions": len(self._sessions),
+        }
+
+
+_controller: AdmissionController | None = None
+
+
+def get_admission() -> AdmissionController:
+    """Return the singleton AdmissionController, creating it on first access."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,202 @@
+"""Singleflight coalescing for identical read-only tool calls.
+
+Many GPT sessions ask for the same price_check or catalog_search at once
+(promotions, shared links). Calls are keyed by (tool, canonical arguments,
+KB registry generation): while one execution is in flight, identical calls
+await it instead of starting their own, and its reply is memoized for a
+short TTL afterwards. Bumping the KB generation (any reload) changes every
+key, so a reply is never served across a KB change.
+
+Only tools whose reply depends solely on their arguments and the KB are
+coalesced. Per-call bookkeeping keys (session/request ids) are left out of
+the key. Each call's outcome is reported as a cache status:
+
+- ``miss``: this call executed the handler.
+- ``coalesced``: joined an identical call already in flight.
+- ``hit``: served from the short-lived memo.
+
+In a multi-worker deployment the memo is also written to the shared state
+store, so a reply computed by one worker is a hit on the others. Shared
+entries are keyed by the KB content versions rather than the
+process-local generation; in-flight joining stays per process.
+
+Environment:
+    MCP_COALESCE_TTL_S  memo lifetime in seconds (default 2; 0 disables the memo)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypeVar
+
+from .encoding import encode_canonical
+from .kb import registry as kb_registry
+from .storage.shared_state import StateStore, get_state_store
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+COALESCED_TOOLS = frozenset({"price_check", "catalog_search", "bom_calculate"})
+
+# Invocation bookkeeping that never changes a reply
+IGNORED_ARGUMENTS = frozenset({"session_id", "client_id", "request_id", "cache_status"})
+
+CACHE_MISS = "miss"
+CACHE_COALESCED = "coalesced"
+CACHE_HIT = "hit"
+
+DEFAULT_TTL_SECONDS = 2.0
+DEFAULT_MAX_ENTRIES = 1024
+
+SHARED_MEMO_NAMESPACE = "coalesce.memo"
+
+
+def _default_ttl() -> float:
+    raw = os.environ.get("MCP_COALESCE_TTL_S")
+    if raw is None:
+        return DEFAULT_TTL_SECONDS
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        logger.warning("Ignoring non-numeric MCP_COALESCE_TTL_S=%r", raw)
+        return DEFAULT_TTL_SECONDS
+
+
+class Singleflight:
+    """Share in-flight executions and briefly memoize their results.
+
+    With a shared ``store`` results must be JSON-compatible; tuples come
+    back from other workers as lists.
+    """
+
+    def __init__(
+        self,
+        tools: Iterable[str] = COALESCED_TOOLS,
+        ttl_seconds: float | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        store: StateStore | None = None,
+    ) -> None:
+        self._store = store
+        self._tools = frozenset(tools)
+        self._ttl = _default_ttl() if ttl_seconds is None else ttl_seconds
+        self._max_entries = max_entries
+        self._inflight: dict[tuple[str, str, int], asyncio.Task[Any]] = {}
+        self._memo: OrderedDict[tuple[str, str, int], tuple[float, Any]] = OrderedDict()
+        self._counts = {CACHE_MISS: 0, CACHE_COALESCED: 0, CACHE_HIT: 0}
+        # (KB generation, encoded KB versions) behind the shared memo keys
+        self._versions: tuple[int, str] = (-1, "")
+        # Pending shared-memo writes, referenced until they finish
+        self._sharing: set[asyncio.Future[None]] = set()
+
+    def key(self, tool: str, arguments: dict[str, Any]) -> tuple[str, str, int] | None:
+        """Coalescing key for a call, or None when ``tool`` is not coalesced."""
+        if tool not in self._tools:
+            return None
+        relevant = {k: v for k, v in arguments.items() if k not in IGNORED_ARGUMENTS}
+        return tool, encode_canonical(relevant), kb_registry.generation()
+
+    async def do(self, key: tuple[str, str, int], fn: Callable[[], Awaitable[T]]) -> tuple[T, str]:
+        """Return ``(value, cache status)``, running ``fn`` only if needed.
+
+        Exceptions reach every caller sharing the execution and are not
+        memoized. A cancelled caller does not cancel the shared execution.
+        """
+        memo = self._memo.get(key)
+        if memo is not None:
+            if memo[0] > time.monotonic():
+                self._memo.move_to_end(key)
+                self._counts[CACHE_HIT] += 1
+                return memo[1], CACHE_HIT
+            del self._memo[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counts[CACHE_COALESCED] += 1
+            value, _ = await asyncio.shield(task)
+            return value, CACHE_COALESCED
+
+        task = asyncio.ensure_future(self._execute(key, fn))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    async def _execute(self, key: tuple[str, str, int], fn: Callable[[], Awaitable[T]]) -> tuple[T, str]:
+        # The shared lookup runs inside the in-flight task, so identical
+        # calls arriving meanwhile join it instead of querying again; the
+        # store is SQLite, so it is queried off the event loop.
+        if self._store is not None and self._ttl > 0:
+            try:
+                shared = await asyncio.to_thread(self._store.get, SHARED_MEMO_NAMESPACE, self._shared_key(key))
+            except Exception:  # noqa: BLE001 - fall back to executing
+                logger.warning("Shared memo lookup failed for %s", key[0], exc_info=True)
+                shared = None
+            if shared is not None:
+                self._counts[CACHE_HIT] += 1
+                return shared, CACHE_HIT
+        self._counts[CACHE_MISS] += 1
+        return await fn(), CACHE_MISS
+
+    def _finish(self, key: tuple[str, str, int], task: asyncio.Task[Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:  # also marks it retrieved if every caller left
+            return
+        if self._ttl > 0:
+            value, status = task.result()
+            self._memo[key] = (time.monotonic() + self._ttl, value)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self._max_entries:
+                self._memo.popitem(last=False)
+            if self._store is not None and status == CACHE_MISS:
+                share = asyncio.ensure_future(asyncio.to_thread(self._share, self._shared_key(key), key[0], value))
+                self._sharing.add(share)
+                share.add_done_callback(self._sharing.discard)
+
+    def _share(self, shared_key: str, tool: str, value: Any) -> None:
+        try:
+            self._store.put(SHARED_MEMO_NAMESPACE, shared_key, value, ttl=self._ttl)
+        except Exception:  # noqa: BLE001 - the local memo still holds it
+            logger.warning("Failed to share memoized %s result", tool, exc_info=True)
+
+    def _shared_key(self, key: tuple[str, str, int]) -> str:
+        generation = kb_registry.generation()
+        if self._versions[0] != generation:
+            # Encoding every KB file's version is per-call work otherwise;
+            # it can only change with the generation
+            self._versions = (generation, encode_canonical(kb_registry.versions()))
+        digest = hashlib.sha256(f"{key[1]}\0{self._versions[1]}".encode("utf-8")).hexdigest()
+        return f"{key[0]}:{digest}"
+
+    async def flush(self) -> None:
+        """Wait until pending shared-memo writes have reached the store."""
+        if self._sharing:
+            await asyncio.gather(*self._sharing, return_exceptions=True)
+
+    def clear(self) -> None:
+        """Drop memoized results (in-flight executions are left running)."""
+        self._memo.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Calls per cache status since start, plus current sizes."""
+        return {**self._counts, "inflight": len(self._inflight), "memo_entries": len(self._memo)}
+
+
+_singleflight: Singleflight | None = None
+
+
+def get_singleflight() -> Singleflight:
+    """Return the singleton Singleflight, creating it on first access."""
+    global _singleflight
+    if _singleflight is None:
+        store = get_state_store()
+        _singleflight = Singleflight(store=store if store.shared else None)
+    return _singleflight
@@ -26,10 +26,36 @@ class MemoryConfig:
     qdrant_timeout_seconds: float
 
 
+@dataclass(frozen=True)
+class WarmupConfig:
+    enabled: bool
+    # Tool calls run after the indexes are built: ({"tool", "arguments"}, ...)
+    queries: tuple[dict[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class SharedStateConfig:
+    # "memory" (single process) or "sqlite" (shared by multi-worker deployments)
+    backend: str
+    sqlite_path: Path
+
+
+@dataclass(frozen=True)
+class TaskStoreConfig:
+    # "sqlite" (durable, resumable after a restart) or "memory"
+    store: str
+    sqlite_path: Path
+    # A running task whose owner has not heartbeaten this long is resumed elsewhere
+    stale_after_seconds: float
+
+
 @dataclass(frozen=True)
 class RuntimeSettings:
     feature_flags: FeatureFlags
     memory: MemoryConfig
+    warmup: WarmupConfig
+    shared_state: SharedStateConfig
+    tasks: TaskStoreConfig
 
 
 
@@ -86,6 +112,22 @@ def load_runtime_settings() -> RuntimeSettings:
             f"Invalid file_store_path '{file_store_relative}': path traversal outside '{base_dir}' is not allowed."
         )
 
+    warmup = config.get("warmup", {})
+    warmup_queries = tuple(
+        query for query in warmup.get("queries", [])
+        if isinstance(query, dict) and isinstance(query.get("tool"), str)
+    )
+
+    shared_state = config.get("shared_state", {})
+    state_path = Path(os.getenv("MCP_STATE_PATH", shared_state.get("sqlite_path", "../.mcp_state/shared_state.sqlite3")))
+    if not state_path.is_absolute():
+        state_path = (CONFIG_FILE.parent / state_path).resolve()
+
+    tasks = config.get("tasks", {})
+    task_store_path = Path(os.getenv("MCP_TASK_STORE_PATH", tasks.get("sqlite_path", "../.mcp_state/tasks.sqlite3")))
+    if not task_store_path.is_absolute():
+        task_store_path = (CONFIG_FILE.parent / task_store_path).resolve()
+
     api_key_env = qdrant.get("api_key_env", "QDRANT_API_KEY")
     qdrant_api_key = os.getenv(api_key_env)
 
@@ -101,4 +143,17 @@ def load_runtime_settings() -> RuntimeSettings:
             qdrant_collection=os.getenv("QDRANT_COLLECTION", qdrant.get("collection", "panelin_quotations")),
             qdrant_timeout_seconds=float(qdrant.get("timeout_seconds", 2)),
         ),
+        warmup=WarmupConfig(
+            enabled=_as_bool(os.getenv("MCP_WARMUP_ENABLED"), _as_bool(warmup.get("enabled"), True)),
+            queries=warmup_queries,
+        ),
+        shared_state=SharedStateConfig(
+            backend=os.getenv("MCP_STATE_BACKEND", shared_state.get("backend", "memory")).strip().lower(),
+            sqlite_path=state_path,
+        ),
+        tasks=TaskStoreConfig(
+            store=os.getenv("MCP_TASK_STORE", tasks.get("store", "memory")).strip().lower(),
+            sqlite_path=task_store_path,
+            stale_after_seconds=float(os.getenv("MCP_TASK_STALE_AFTER_S", tasks.get("stale_after_seconds", 10))),
+        ),
     )
@@ -0,0 +1,60 @@
+"""Single-pass JSON encoding for tool arguments and responses.
+
+call_tool encodes each payload exactly once: the encoded text is both the
+TextContent sent to the client and the input to the token estimate.
+orjson is used when installed; the stdlib fallback emits the same compact
+separators so replies look the same either way. Values JSON cannot
+represent (datetimes, dataclasses, sets, ...) are rendered with ``str`` by
+both encoders.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+except ImportError:
+    HAS_ORJSON = False
+
+# Average characters per token for the JSON replies; same heuristic the
+# invocation log has always used, so token_input/token_output stay comparable
+CHARS_PER_TOKEN = 4
+
+
+def encode_json(payload: Any) -> str:
+    """Serialize ``payload`` to compact JSON text (non-ASCII kept as is)."""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(payload, default=str, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            # orjson.JSONEncodeError: integers beyond 64 bits, circular data, ...
+            pass
+    return json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+def encode_canonical(payload: Any) -> str:
+    """Compact JSON with sorted keys: equal payloads give equal text."""
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(
+                payload, default=str, option=_ORJSON_OPTIONS | orjson.OPT_SORT_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":"), sort_keys=True)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of already-encoded text."""
+    return max(1, round(len(text) / CHARS_PER_TOKEN))
+
+
+def encode_with_estimate(payload: Any) -> tuple[str, int]:
+    """Encode ``payload`` once and estimate its tokens from the same text."""
+    text = encode_json(payload)
+    return text, estimate_tokens(text)
@@ -0,0 +1,377 @@
+"""Execution layer that keeps blocking tool handlers off the event loop.
+
+Every handler is an ``async def``, but most do synchronous work inside:
+JSON parsing and index builds (pricing, catalog, BOM), read-modify-write of
+corrections_log.json (governance, report_error), project file I/O and Wolf
+API calls through blocking ``requests``. Awaited directly, any of these
+stalls every other session on the server.
+
+``ToolExecutor`` dispatches each tool according to its ``ExecutionPolicy``:
+
+- ``ASYNC``: awaited on the server loop (task tools, the Qdrant store).
+- ``CPU``: run on a small pool sized to the CPU count.
+- ``BLOCKING_IO``: run on a larger thread pool.
+- ``BATCH``: chunks of background tasks (mcp.tasks.parallel), on a pool
+  and limit of their own, so a large batch never takes the slots
+  interactive CPU calls wait for.
+
+Off-loop handlers run to completion on a per-worker-thread event loop, so
+they must not touch objects bound to the server loop. Each class has its
+own concurrency limit; callers beyond it queue on the loop. Handlers that
+share a file are given the same ``exclusive`` group and run one at a time,
+preserving the single-threaded read-modify-write the handlers assume.
+
+The CPU and batch pools are thread pools by default. The handlers are
+pure Python, so threads keep the loop responsive but give no multi-core
+speedup; ``MCP_EXEC_CPU_POOL=process`` / ``MCP_EXEC_BATCH_POOL=process``
+switch to a process pool for true parallelism. Each child then keeps its
+own KB registry, so process pools are recycled whenever the parent's
+registry generation changes. Thread-pool handlers run in a copy of the
+caller's context, so tracing spans (mcp.tracing) follow them; process-pool
+handlers are not traced.
+
+In a multi-worker deployment (shared state store) each exclusive group
+also holds the store's cross-process lock while its handler runs.
+
+Environment:
+    MCP_EXEC_CPU_WORKERS    CPU pool size (default: CPU count)
+    MCP_EXEC_IO_WORKERS     blocking-IO pool size (default: min(32, CPU count + 4))
+    MCP_EXEC_CPU_LIMIT      concurrent CPU handlers (default: 2 x CPU workers)
+    MCP_EXEC_IO_LIMIT       concurrent blocking-IO handlers (default: 2 x IO workers)
+    MCP_EXEC_ASYNC_LIMIT    concurrent async handlers (default: 0, unlimited)
+    MCP_EXEC_CPU_POOL       "thread" (default) or "process"
+    MCP_EXEC_BATCH_WORKERS  batch pool size (default: half the CPU workers, at least 1)
+    MCP_EXEC_BATCH_LIMIT    concurrent batch chunks (default: batch workers)
+    MCP_EXEC_BATCH_POOL     "thread" (default) or "process"
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import enum
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from .kb import registry as kb_registry
+from .metrics import EXEC_QUEUE_WAIT
+from .storage.shared_state import StateStore, get_state_store
+from .tracing import profiled
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+
+
+class HandlerClass(str, enum.Enum):
+    """How a tool handler spends its time."""
+
+    ASYNC = "async"
+    CPU = "cpu"
+    BLOCKING_IO = "blocking_io"
+    BATCH = "batch"
+
+
+@dataclass(frozen=True)
+class ExecutionPolicy:
+    """Where a tool runs and which other tools it must not overlap with."""
+
+    handler_class: HandlerClass
+    exclusive: str | None = None
+
+
+# Tools absent from the table are treated as pure async
+TOOL_POLICIES: dict[str, ExecutionPolicy] = {
+    "price_check": ExecutionPolicy(HandlerClass.CPU),
+    "catalog_search": ExecutionPolicy(HandlerClass.CPU),
+    "bom_calculate": ExecutionPolicy(HandlerClass.CPU),
+    "report_error": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="corrections_log"),
+    "validate_correction": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="corrections_log"),
+    "commit_correction": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="corrections_log"),
+    "list_corrections": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="corrections_log"),
+    "update_correction_status": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="corrections_log"),
+    "batch_validate_corrections": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="corrections_log"),
+    "persist_conversation": ExecutionPolicy(HandlerClass.BLOCKING_IO),
+    "register_correction": ExecutionPolicy(HandlerClass.BLOCKING_IO),
+    "save_customer": ExecutionPolicy(HandlerClass.BLOCKING_IO),
+    "lookup_customer": ExecutionPolicy(HandlerClass.BLOCKING_IO),
+    "write_file": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="project_files"),
+    "read_file": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="project_files"),
+    # Chunks of batch_bom_calculate / bulk_price_check tasks
+    "bom_calculate.chunk": ExecutionPolicy(HandlerClass.BATCH),
+    "price_check.chunk": ExecutionPolicy(HandlerClass.BATCH),
+}
+
+_THREAD_PREFIXES = {
+    HandlerClass.CPU: "mcp-cpu",
+    HandlerClass.BLOCKING_IO: "mcp-io",
+    HandlerClass.BATCH: "mcp-batch",
+}
+
+ASYNC_POLICY = ExecutionPolicy(HandlerClass.ASYNC)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        logger.warning("Ignoring non-integer %s=%r", name, os.environ.get(name))
+        return default
+
+
+_thread_state = threading.local()
+
+
+def _run_handler(
+    handler: Handler,
+    arguments: dict[str, Any],
+    guard: contextlib.AbstractContextManager[Any] | None = None,
+) -> tuple[float, dict[str, Any]]:
+    """Run a handler to completion in a worker; returns (start time, result).
+
+    Each worker thread (or process) reuses one private event loop. ``guard``
+    (a cross-process exclusive lock) is held around the handler and counts
+    as queue wait.
+    """
+    with guard or contextlib.nullcontext():
+        started = time.monotonic()
+        loop = getattr(_thread_state, "loop", None)
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            _thread_state.loop = loop
+        with profiled():
+            return started, loop.run_until_complete(handler(arguments))
+
+
+class _ClassStats:
+    """Counters for one handler class."""
+
+    __slots__ = ("submitted", "completed", "failed", "waiting", "running", "wait_total", "wait_max", "run_total")
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.waiting = 0
+        self.running = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "waiting": self.waiting,
+            "running": self.running,
+            "queue_wait_ms_total": round(self.wait_total * 1000, 2),
+            "queue_wait_ms_max": round(self.wait_max * 1000, 2),
+            "queue_wait_ms_avg": round(self.wait_total * 1000 / finished, 2) if finished else 0.0,
+            "run_ms_total": round(self.run_total * 1000, 2),
+        }
+
+
+class ToolExecutor:
+    """Dispatch tool handlers by class with per-class limits and queue-wait stats."""
+
+    def __init__(
+        self,
+        policies: dict[str, ExecutionPolicy] | None = None,
+        cpu_workers: int | None = None,
+        io_workers: int | None = None,
+        cpu_limit: int | None = None,
+        io_limit: int | None = None,
+        async_limit: int | None = None,
+        cpu_pool: str | None = None,
+        store: StateStore | None = None,
+        batch_workers: int | None = None,
+        batch_limit: int | None = None,
+        batch_pool: str | None = None,
+    ) -> None:
+        cpu_count = os.cpu_count() or 1
+        self._policies = TOOL_POLICIES if policies is None else policies
+        self._cpu_workers = cpu_workers or _env_int("MCP_EXEC_CPU_WORKERS", cpu_count)
+        self._io_workers = io_workers or _env_int("MCP_EXEC_IO_WORKERS", min(32, cpu_count + 4))
+        self._batch_workers = batch_workers or _env_int("MCP_EXEC_BATCH_WORKERS", max(1, self._cpu_workers // 2))
+        self._workers = {
+            HandlerClass.CPU: self._cpu_workers,
+            HandlerClass.BLOCKING_IO: self._io_workers,
+            HandlerClass.BATCH: self._batch_workers,
+        }
+        self._pool_kinds = {
+            HandlerClass.CPU: (cpu_pool or os.environ.get("MCP_EXEC_CPU_POOL", "thread")).lower(),
+            HandlerClass.BATCH: (batch_pool or os.environ.get("MCP_EXEC_BATCH_POOL", "thread")).lower(),
+        }
+        limits = {
+            HandlerClass.CPU: cpu_limit or _env_int("MCP_EXEC_CPU_LIMIT", 2 * self._cpu_workers),
+            HandlerClass.BLOCKING_IO: io_limit or _env_int("MCP_EXEC_IO_LIMIT", 2 * self._io_workers),
+            HandlerClass.ASYNC: async_limit if async_limit is not None else _env_int("MCP_EXEC_ASYNC_LIMIT", 0),
+            HandlerClass.BATCH: batch_limit or _env_int("MCP_EXEC_BATCH_LIMIT", self._batch_workers),
+        }
+        self._limits = limits
+        self._semaphores = {cls: asyncio.Semaphore(limit) for cls, limit in limits.items() if limit > 0}
+        self._exclusive: dict[str, asyncio.Lock] = {}
+        # Shared store of a multi-worker deployment: exclusive groups also
+        # take its lock, so they stay exclusive across processes
+        self._store = store
+        self._stats = {cls: _ClassStats() for cls in HandlerClass}
+        self._pools: dict[HandlerClass, Executor] = {}
+        self._pool_generation = kb_registry.generation()
+
+    def policy(self, tool: str) -> ExecutionPolicy:
+        """Execution policy for ``tool`` (async when unclassified)."""
+        return self._policies.get(tool, ASYNC_POLICY)
+
+    def _is_process(self, handler_class: HandlerClass) -> bool:
+        return self._pool_kinds.get(handler_class) == "process"
+
+    def _pool(self, handler_class: HandlerClass) -> Executor:
+        if self._pool_generation != kb_registry.generation():
+            # Children hold their own KB registry; start fresh ones after a reload
+            for cls in [cls for cls in self._pools if self._is_process(cls)]:
+                self._pools.pop(cls).shutdown(wait=False)
+            self._pool_generation = kb_registry.generation()
+
+        pool = self._pools.get(handler_class)
+        if pool is None:
+            workers = self._workers[handler_class]
+            if self._is_process(handler_class):
+                pool = ProcessPoolExecutor(max_workers=workers)
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=_THREAD_PREFIXES[handler_class])
+            self._pools[handler_class] = pool
+        return pool
+
+    async def run(self, tool: str, handler: Handler, arguments: dict[str, Any]) -> dict[str, Any]:
+        """Run ``handler(arguments)`` according to ``tool``'s policy."""
+        policy = self.policy(tool)
+        stats = self._stats[policy.handler_class]
+        stats.submitted += 1
+        stats.waiting += 1
+        queued = time.monotonic()
+        admitted = False
+        started = queued
+        try:
+            async with self._admission(policy):
+                admitted = True
+                stats.waiting -= 1
+                stats.running += 1
+                if policy.handler_class is HandlerClass.ASYNC:
+                    started = time.monotonic()
+                    with profiled():
+                        result = await handler(arguments)
+                else:
+                    loop = asyncio.get_running_loop()
+                    pool = self._pool(policy.handler_class)
+                    if isinstance(pool, ProcessPoolExecutor):
+                        future = loop.run_in_executor(pool, _run_handler, handler, arguments)
+                    else:
+                        # Copy the context so tracing spans follow the call into the thread
+                        context = contextvars.copy_context()
+                        guard = None
+                        if self._store is not None and policy.exclusive is not None:
+                            guard = self._store.lock(policy.exclusive)
+                        future = loop.run_in_executor(pool, context.run, _run_handler, handler, arguments, guard)
+                    # Wait inside the pool's own queue counts as queue wait too
+                    started, result = await _await_worker(future)
+        except BaseException:
+            stats.failed += 1
+            raise
+        finally:
+            if admitted:
+                stats.running -= 1
+                wait = max(0.0, started - queued)
+                stats.wait_total += wait
+                stats.wait_max = max(stats.wait_max, wait)
+                EXEC_QUEUE_WAIT.labels(policy.handler_class.value).observe(wait * 1000)
+                stats.run_total += max(0.0, time.monotonic() - started)
+            else:
+                stats.waiting -= 1
+        stats.completed += 1
+        return result
+
+    def _admission(self, policy: ExecutionPolicy) -> "_Admission":
+        lock = None
+        if policy.exclusive is not None:
+            lock = self._exclusive.setdefault(policy.exclusive, asyncio.Lock())
+        return _Admission(self._semaphores.get(policy.handler_class), lock)
+
+    def stats(self) -> dict[str, Any]:
+        """Per-class counters, limits and queue-wait totals."""
+        return {
+            cls.value: {"limit": self._limits[cls], **self._stats[cls].snapshot()}
+            for cls in HandlerClass
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the worker pools (they are recreated on next use)."""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+
+async def _await_worker(future: asyncio.Future[Any]) -> Any:
+    """Await a pool future; on cancellation keep holding the slot until it ends.
+
+    A running worker cannot be interrupted, so releasing its class slot or
+    exclusive group early would let the next caller overlap with it.
+    """
+    cancelled = False
+    while True:
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.done():
+                raise
+            cancelled = True
+            continue
+        if cancelled:
+            raise asyncio.CancelledError
+        return result
+
+
+class _Admission:
+    """Exclusive-group lock (outer) then class semaphore (inner)."""
+
+    __slots__ = ("_semaphore", "_lock")
+
+    def __init__(self, semaphore: asyncio.Semaphore | None, lock: asyncio.Lock | None) -> None:
+        self._semaphore = semaphore
+        self._lock = lock
+
+    async def __aenter__(self) -> None:
+        if self._lock is not None:
+            await self._lock.acquire()
+        if self._semaphore is not None:
+            try:
+                await self._semaphore.acquire()
+            except BaseException:
+                if self._lock is not None:
+                    self._lock.release()
+                raise
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._semaphore is not None:
+            self._semaphore.release()
+        if self._lock is not None:
+            self._lock.release()
+
+
+_executor: ToolExecutor | None = None
+
+
+def get_executor() -> ToolExecutor:
+    """Return the singleton ToolExecutor, creating it on first access."""
+    global _executor
+    if _executor is None:
+        store = get_state_store()
+        _executor = ToolExecutor(store=store if store.shared else None)
+    return _executor
@@ -20,5 +20,5 @@ File operation tools:
 
 Background task tools (async):
 - tasks: batch_bom_calculate, bulk_price_check, full_quotation,
-         task_status, task_result, task_list, task_cancel
+         task_status, task_result, task_watch, task_list, task_cancel
 """
@@ -2,19 +2,35 @@
 
 Uses bom_rules.json to calculate a complete Bill of Materials for a given
 panel installation. Applies parametric rules per construction system.
+
+Everything that does not depend on the request (inherited system rules,
+useful width, standard lengths and the accessories_catalog.json item chosen
+for each BOM slot per thickness) is resolved once per system into a table,
+cached in the KB registry so reloading either file rebuilds it.
+A request then computes panels, supports, fixation points, fixation kit,
+goteros, babetas, cumbrera, perfiles and sealants in one pass and prices
+them straight from that table; the panel line is priced through
+pricing.resolve_panel.
+
+``calculate_bom_batch`` runs the same computation for many items: all are
+validated first, then grouped by system and spec so per-spec lookups
+happen once per group.
 """
 
 from __future__ import annotations
 
-import asyncio
-import json
 import logging
 import math
+import re
 from pathlib import Path
 from typing import Any
 
 from mcp_tools.contracts import CONTRACT_VERSION, BOM_CALCULATE_ERROR_CODES
-from mcp.handlers.pricing import handle_price_check
+from mcp.handlers.pricing import resolve_panel
+from mcp.kb import registry as kb_registry
+from mcp.search.analyzer import fold
+from mcp.tracing import span
+from mcp.validation import get_validator, validate_arguments
 
 logger = logging.getLogger(__name__)
 
@@ -22,24 +38,283 @@ KB_ROOT = Path(__file__).resolve().parent.parent.parent
 BOM_FILE = KB_ROOT / "bom_rules.json"
 ACCESSORIES_FILE = KB_ROOT / "accessories_catalog.json"
 
-_bom_rules: dict[str, Any] | None = None
-_accessories: dict[str, Any] | None = None
+# BOM slots per fixation scheme: (slot, accessories tipo, item_type, unit, name hint)
+_SLOTS_VARILLA_ROOF = [
+    ("gotero_frontal", "gotero_frontal", "accessory", "unit", None),
+    ("gotero_lateral", "gotero_lateral", "accessory", "unit", None),
+    ("babeta_adosar", "babeta_adosar", "accessory", "unit", None),
+    ("cumbrera", "cumbrera", "accessory", "unit", None),
+    ("varilla", "varilla", "fixation", "unit", None),
+    ("tuerca", "tuerca", "fixation", "unit", None),
+    ("arandela_carrocero", "arandela_carrocero", "fixation", "unit", None),
+    ("tortuga_pvc", "tortuga_pvc", "fixation", "unit", None),
+    ("taco", "taco", "fixation", "unit", None),
+    ("silicona", "silicona", "accessory", "tube", "silicona"),
+    ("cinta_butilo", "cinta_butilo", "accessory", "roll", None),
+]
+_SLOTS_CABALLETE_ROOF = [
+    ("caballete", "arandela_trapezoidal", "fixation", "unit", "caballete"),
+    ("gotero_frontal", "gotero_frontal", "accessory", "unit", None),
+    ("gotero_lateral", "gotero_lateral", "accessory", "unit", None),
+    ("babeta_superior", "babeta_adosar", "accessory", "unit", "superior"),
+    ("babeta_lateral", "babeta_adosar", "accessory", "unit", "lateral"),
+    ("cumbrera", "cumbrera", "accessory", "unit", None),
+    ("silicona", "silicona", "accessory", "tube", "silicona"),
+    ("cinta_butilo", "cinta_butilo", "accessory", "roll", None),
+]
+_SLOTS_WALL = [
+    ("perfil_u", "perfil", "accessory", "unit", " u "),
+    ("varilla", "varilla", "fixation", "unit", None),
+    ("tuerca", "tuerca", "fixation", "unit", None),
+    ("arandela_carrocero", "arandela_carrocero", "fixation", "unit", None),
+    ("tortuga_pvc", "tortuga_pvc", "fixation", "unit", None),
+    ("taco", "taco", "fixation", "unit", None),
+    ("silicona", "silicona", "accessory", "tube", "silicona"),
+    ("cinta_butilo", "cinta_butilo", "accessory", "roll", None),
+]
+DEFAULT_STANDARD_LENGTH_M = 3.0
 
 
 def _load_bom_rules() -> dict[str, Any]:
-    global _bom_rules
-    if _bom_rules is None:
-        with open(BOM_FILE, encoding="utf-8") as f:
-            _bom_rules = json.load(f)
-    return _bom_rules
+    return kb_registry.load(BOM_FILE)
 
 
 def _load_accessories() -> dict[str, Any]:
-    global _accessories
-    if _accessories is None:
-        with open(ACCESSORIES_FILE, encoding="utf-8") as f:
-            _accessories = json.load(f)
-    return _accessories
+    return kb_registry.load(ACCESSORIES_FILE)
+
+
+def _parse_thicknesses(value: Any) -> set[int]:
+    """Thicknesses an accessory fits: 100, "30 - 40 - 50" -> {30, 40, 50}, None -> set()."""
+    if value is None:
+        return set()
+    if isinstance(value, (int, float)):
+        return {int(value)}
+    return {int(n) for n in re.findall(r"\d+", str(value))}
+
+
+def _rank_accessories(
+    accessories: list[dict[str, Any]],
+    tipo_positions: list[int],
+    family: str,
+    core: str,
+    name_hint: str | None,
+) -> dict[int | None, dict[str, Any]]:
+    """Pick the best accessory of one tipo per thickness for a system.
+
+    Candidates must be priced and match ``name_hint`` when given.
+    Preference: ``family`` compatibility, then UNIVERSAL, then other
+    families (generic hardware is often tagged with one family only);
+    non-cold-room over cold-room items (unless ISOFRIG); matching core;
+    then catalog order. Key ``None`` holds the fallback for any thickness.
+    """
+    ranked: list[tuple[tuple[int, int, int, int], dict[str, Any]]] = []
+    for pos in tipo_positions:
+        if pos >= len(accessories):
+            continue
+        acc = accessories[pos]
+        if acc.get("precio_unit_iva_inc") is None:
+            continue
+        if name_hint and name_hint not in f" {fold(acc.get('name'))} ":
+            continue
+        compat = [str(c).upper() for c in acc.get("compatibilidad") or []]
+        if family in compat:
+            compat_rank = 0
+        elif "UNIVERSAL" in compat:
+            compat_rank = 1
+        else:
+            compat_rank = 2
+        cold_room_rank = int(acc.get("uso") == "frigorifico" and family != "ISOFRIG")
+        composition = str(acc.get("composicion") or "").upper()
+        core_rank = 0 if core in composition or not re.search(r"EPS|PIR", composition) else 1
+        ranked.append(((compat_rank, cold_room_rank, core_rank, pos), acc))
+    ranked.sort(key=lambda pair: pair[0])
+
+    by_thickness: dict[int | None, dict[str, Any]] = {}
+    for _, acc in ranked:
+        for thickness in _parse_thicknesses(acc.get("espesor_mm")):
+            by_thickness.setdefault(thickness, acc)
+    if ranked:
+        generic = [acc for _, acc in ranked if not _parse_thicknesses(acc.get("espesor_mm"))]
+        by_thickness[None] = generic[0] if generic else ranked[0][1]
+    return by_thickness
+
+
+def _build_system_table(system_key: str) -> dict[str, Any] | None:
+    """Resolve one system's inherited rules and per-slot accessory choices."""
+    rules = _load_bom_rules()
+    systems = rules.get("sistemas", rules.get("systems", {}))
+    system = systems.get(system_key)
+    if not system:
+        return None
+
+    # Inherit from the parent system, then apply declared differences
+    resolved = dict(systems.get(system.get("hereda_de"), {})) if system.get("hereda_de") else {}
+    resolved.update(system)
+    resolved.update({
+        k: v for k, v in (system.get("diferencias") or {}).items() if k == "ancho_util_m"
+    })
+
+    producto_ref = str(resolved.get("producto_ref", ""))
+    family, _, core = producto_ref.upper().partition("_")
+    if system_key.startswith("pared_"):
+        kind, slots = "wall", _SLOTS_WALL
+    elif resolved.get("sistema_fijacion") == "caballete_tornillo":
+        kind, slots = "roof_caballete", _SLOTS_CABALLETE_ROOF
+    else:
+        kind, slots = "roof_varilla", _SLOTS_VARILLA_ROOF
+
+    catalog = _load_accessories()
+    accessories = catalog.get("accesorios", [])
+    by_tipo = catalog.get("indices", {}).get("by_tipo", {})
+    standard_lengths = resolved.get("largos_estandar_m") or {}
+
+    slot_table: dict[str, dict[str, Any]] = {}
+    for slot, tipo, item_type, unit, name_hint in slots:
+        choices = _rank_accessories(accessories, by_tipo.get(tipo, []), family, core, name_hint)
+        if not choices:
+            continue
+        slot_table[slot] = {
+            "item_type": item_type,
+            "unit": unit,
+            "choices": choices,
+            "standard_length_m": standard_lengths.get(slot),
+        }
+
+    return {
+        "system": system,
+        "kind": kind,
+        "producto_ref": producto_ref,
+        "ancho_util_m": float(resolved.get("ancho_util_m") or 1.0),
+        "slots": slot_table,
+    }
+
+
+def _get_system_table(system_key: str) -> dict[str, Any] | None:
+    """Return the precomputed table for ``system_key``, rebuilt when either source reloads."""
+    return kb_registry.derived(
+        f"bom.system_table:{system_key}",
+        (BOM_FILE, ACCESSORIES_FILE),
+        lambda: _build_system_table(system_key),
+    )
+
+
+def _slot_accessory(table: dict[str, Any], slot: str, thickness: int) -> dict[str, Any] | None:
+    entry = table["slots"].get(slot)
+    if entry is None:
+        return None
+    return entry["choices"].get(thickness) or entry["choices"].get(None)
+
+
+def _pieces(table: dict[str, Any], slot: str, thickness: int, linear_m: list[float]) -> list[int]:
+    """Pieces of a linear accessory covering each of ``linear_m`` (ceil by its standard length)."""
+    entry = table["slots"].get(slot)
+    if entry is None:
+        return [0] * len(linear_m)
+    acc = _slot_accessory(table, slot, thickness) or {}
+    std = float(entry["standard_length_m"] or acc.get("largo_std_m") or DEFAULT_STANDARD_LENGTH_M)
+    return [math.ceil(m / std) if m > 0 else 0 for m in linear_m]
+
+
+def _compute_quantities(
+    table: dict[str, Any],
+    thickness: int,
+    lengths: list[float],
+    widths: list[float],
+    panels: list[int],
+    supports: list[int],
+    structures: list[str],
+) -> tuple[dict[str, list[int]], list[int]]:
+    """Quantity columns per BOM slot following the bom_rules.json formulas.
+
+    Every argument after ``thickness`` is a column with one value per BOM of
+    the same system and thickness. ``length`` runs along the panel (roof
+    slope / wall height) and ``width`` across the panels. Returns
+    ``(quantities, fixation_points)``; a zero quantity means no line.
+    """
+    ancho_util = table["ancho_util_m"]
+    dims = list(zip(lengths, widths))
+    qty: dict[str, list[int]] = {}
+
+    if table["kind"] == "wall":
+        points = [p * math.ceil(l / 0.6) * 2 for p, l in zip(panels, lengths)]
+        qty["perfil_u"] = [2 * n for n in _pieces(table, "perfil_u", thickness, widths)]
+        joints_ml = [(p - 1) * l + 2 * (w + l) for p, (l, w) in zip(panels, dims)]
+    else:
+        joints_ml = [2 * (w + l) for l, w in dims]
+        qty["gotero_frontal"] = _pieces(table, "gotero_frontal", thickness, [p * ancho_util for p in panels])
+        qty["gotero_lateral"] = _pieces(table, "gotero_lateral", thickness, [l * 2 for l in lengths])
+        qty["cumbrera"] = _pieces(table, "cumbrera", thickness, widths)
+        if table["kind"] == "roof_caballete":
+            points = [p * s for p, s in zip(panels, supports)]
+            qty["caballete"] = points
+            qty["babeta_superior"] = _pieces(table, "babeta_superior", thickness, widths)
+            qty["babeta_lateral"] = _pieces(table, "babeta_lateral", thickness, [l * 2 for l in lengths])
+        else:
+            points = [math.ceil(p * s * 2 + l * 2 / 2.5) for p, s, l in zip(panels, supports, lengths)]
+            qty["babeta_adosar"] = _pieces(table, "babeta_adosar", thickness, widths)
+
+    if table["kind"] != "roof_caballete":
+        qty["varilla"] = [math.ceil(n / 4) for n in points]
+        qty["tuerca"] = [n * (1 if s == "hormigon" else 2) for n, s in zip(points, structures)]
+        qty["arandela_carrocero"] = points
+        qty["tortuga_pvc"] = points
+        qty["taco"] = [n if s == "hormigon" else 0 for n, s in zip(points, structures)]
+
+    qty["silicona"] = [math.ceil(j / 8) for j in joints_ml]
+    qty["cinta_butilo"] = [math.ceil(j / 22.5) for j in joints_ml]
+    return qty, points
+
+
+def _compute_rows(
+    members: list[dict[str, Any]],
+    table: dict[str, Any],
+    constants: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """Derived quantities for every BOM of one group, evaluated column by column.
+
+    ``members`` are validated params sharing a system table and group
+    constants; returns one row per member with its panel count, supports,
+    areas and per-slot quantities.
+    """
+    ancho_util = table["ancho_util_m"]
+    autoportancia = constants["autoportancia"]
+    lengths = [params["length"] for params in members]
+    widths = [params["width"] for params in members]
+    requested = [params["quantity_panels"] for params in members]
+
+    panels = [
+        max(1, math.ceil(round(w / ancho_util, 6))) if q is None else q
+        for q, w in zip(requested, widths)
+    ]
+    areas = [l * w for l, w in zip(lengths, widths)]
+    # Calculate supports using correct formula: ROUNDUP((length_m / autoportancia) + 1)
+    if autoportancia and autoportancia > 0:
+        # Formula from quotation_calculator_v3.py:414-427 and bom_rules.json
+        supports = [max(2, math.ceil((l / autoportancia) + 1)) for l in lengths]
+    else:
+        # Fallback if autoportancia not found: conservative 3m span
+        supports = [max(2, math.ceil(l / 3.0) + 1) for l in lengths]
+    # Panels are priced per m2 of covered surface (bom_rules items_bom: unidad m2)
+    panel_m2 = [
+        round(a, 2) if q is None else round(n * ancho_util * l, 2)
+        for q, n, l, a in zip(requested, panels, lengths, areas)
+    ]
+
+    quantities, points = _compute_quantities(
+        table, members[0]["thickness_int"], lengths, widths, panels, supports,
+        [params["structure"] for params in members],
+    )
+    return [
+        {
+            "panels": panels[i],
+            "supports": supports[i],
+            "area_m2": areas[i],
+            "panel_m2": panel_m2[i],
+            "fixation_points": points[i],
+            "quantities": {slot: column[i] for slot, column in quantities.items()},
+        }
+        for i in range(len(members))
+    ]
 
 
 def _resolve_system_key(family: str, core: str, usage: str) -> str | None:
@@ -109,377 +384,273 @@ def _get_autoportancia(
     return entry.get("luz_max_m")
 
 
+VALID_SYSTEMS_HINT = (
+    "Valid systems: techo_isoroof_3g, techo_isodec_eps, techo_isodec_pir, "
+    "pared_isopanel_eps, pared_isowall_pir, pared_isofrig_pir"
+)
+
+
+def _error(code: str, message: str, details: dict[str, Any] | None = None) -> dict[str, Any]:
+    error: dict[str, Any] = {"code": BOM_CALCULATE_ERROR_CODES[code], "message": message}
+    if details is not None:
+        error["details"] = details
+    return error
+
+
+def _error_response(error: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
+    """Wrap an error dict in the v1 envelope (or the legacy shape)."""
+    if legacy_format:
+        legacy: dict[str, Any] = {"error": error["message"]}
+        details = error.get("details", {})
+        if error["code"] == BOM_CALCULATE_ERROR_CODES["INVALID_THICKNESS"]:
+            legacy["received"] = details.get("received")
+        elif error["code"] == BOM_CALCULATE_ERROR_CODES["RULE_NOT_FOUND"]:
+            legacy.update(details)
+        return legacy
+    logger.debug("Wrapped bom_calculate error response in v1 envelope")
+    return {"ok": False, "contract_version": CONTRACT_VERSION, "error": error}
+
+
+def _to_params(args: dict[str, Any]) -> dict[str, Any]:
+    """Normalized BOM parameters from schema-validated arguments."""
+    return {
+        "family": args["product_family"],
+        "core": args.get("core_type") or "EPS",
+        "usage": args["usage"],
+        "thickness": args["thickness_mm"],
+        "thickness_int": int(args["thickness_mm"]),
+        "length": args["length_m"],
+        "width": args["width_m"],
+        "quantity_panels": args.get("quantity_panels"),
+        "structure": args["tipo_estructura"],
+    }
+
+
+def _validate_arguments(arguments: Any) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    """Run the compiled bom_calculate schema; ``(params, None)`` or ``(None, error)``."""
+    args, error = get_validator("bom_calculate")(arguments)
+    if error is not None:
+        return None, error
+    return _to_params(args), None
+
+
+def _no_rules_error(params: dict[str, Any]) -> dict[str, Any]:
+    return _error(
+        "RULE_NOT_FOUND",
+        f"No BOM rules found for {params['family']} {params['core']} {params['usage']}",
+        {"hint": VALID_SYSTEMS_HINT},
+    )
+
+
+def _resolve_table(params: dict[str, Any]) -> tuple[str | None, dict[str, Any] | None, dict[str, Any] | None]:
+    """Return ``(system_key, table, None)`` for validated params, or ``(None, None, error)``."""
+    system_key = _resolve_system_key(params["family"], params["core"], params["usage"])
+    if not system_key:
+        return None, None, _no_rules_error(params)
+    table = _get_system_table(system_key)
+    if not table:
+        rules = _load_bom_rules()
+        systems = rules.get("sistemas", rules.get("systems", {}))
+        return None, None, _error(
+            "RULE_NOT_FOUND",
+            f"System '{system_key}' not found in bom_rules.json",
+            {"available_systems": list(systems.keys())},
+        )
+    return system_key, table, None
+
+
+def _group_constants(table: dict[str, Any], family: str, core: str, thickness: int) -> dict[str, Any]:
+    """Per (system, family, core, thickness) values shared by every BOM of that spec."""
+    panel_unit_price = 0.0
+    panel_sku = f"{family.upper()}{thickness}"
+    # Panel SKU and price come from the pricing index's (family, core,
+    # thickness) map - one dict lookup instead of guessing SKU spellings
+    try:
+        match = resolve_panel(family, core, thickness)
+    except Exception as e:
+        logger.debug(f"Failed to resolve panel price for {family} {core} {thickness}: {e}")
+        match = None
+    if match:
+        panel_unit_price = match.get("price_usd_iva_inc", 0.0)
+        panel_sku = match.get("sku", panel_sku)
+    return {
+        # Use producto_ref from system to avoid duplicating mapping logic
+        "autoportancia": _get_autoportancia(family, core, thickness, producto_ref=table["producto_ref"]),
+        "panel_sku": panel_sku,
+        "panel_unit_price": panel_unit_price,
+    }
+
+
+def _build_bom(
+    params: dict[str, Any],
+    system_key: str,
+    table: dict[str, Any],
+    constants: dict[str, Any],
+    row: dict[str, Any],
+    legacy_format: bool = False,
+) -> dict[str, Any]:
+    """Price and assemble one BOM from its params, group constants and computed row."""
+    family, core = params["family"], params["core"]
+    length, width = params["length"], params["width"]
+    thickness_int = params["thickness_int"]
+    autoportancia = constants["autoportancia"]
+    qty_panels, n_supports = row["panels"], row["supports"]
+    area_m2, panel_m2 = row["area_m2"], row["panel_m2"]
+
+    panel_unit_price = constants["panel_unit_price"]
+    items: list[dict[str, Any]] = [{
+        "item_type": "panel",
+        "sku": constants["panel_sku"],
+        "quantity": panel_m2,
+        "unit": "m2",
+        "unit_price_usd_iva_inc": panel_unit_price,
+        "subtotal_usd_iva_inc": round(panel_unit_price * panel_m2, 2),
+    }]
+
+    # Fixations and accessories in one pass over the system's slot table
+    for slot, quantity in row["quantities"].items():
+        acc = _slot_accessory(table, slot, thickness_int)
+        if not quantity or acc is None:
+            continue
+        entry = table["slots"][slot]
+        unit_price = float(acc["precio_unit_iva_inc"])
+        items.append({
+            "item_type": entry["item_type"],
+            "sku": str(acc.get("sku", "")),
+            # Several catalog items share a SKU (the 6805 fixing kit parts):
+            # the rule slot and catalog name keep the lines distinct
+            "component": slot,
+            "name": str(acc.get("name", "")),
+            "quantity": quantity,
+            "unit": entry["unit"],
+            "unit_price_usd_iva_inc": unit_price,
+            "subtotal_usd_iva_inc": round(unit_price * quantity, 2),
+        })
+
+    # Calculate total
+    total_usd_iva_inc = round(sum(item["subtotal_usd_iva_inc"] for item in items), 2)
+
+    if legacy_format:
+        support_note = f"Calculated from length ({length}m) / autoportancia ({autoportancia}m)" if autoportancia else f"Fallback estimate (autoportancia not found for {family} {core} {thickness_int}mm)"
+        return {
+            "system": system_key,
+            "product": f"{family} {core} {thickness_int}mm",
+            "dimensions": {"length_m": length, "width_m": width, "area_m2": area_m2},
+            "panels": {"quantity": qty_panels, "ancho_util_m": table["ancho_util_m"]},
+            "supports": n_supports,
+            "supports_note": support_note,
+            "fixation_points": row["fixation_points"],
+            "tipo_estructura": params["structure"],
+            "items": items,
+            "total_usd_iva_inc": total_usd_iva_inc,
+            "bom_rules_applied": table["system"],
+            "source": "bom_rules.json (Level 1.3) + accessories_catalog.json (Level 1.2)",
+            "note": "This is a parametric estimate. Final BOM should be validated against KB formulas in BMC_Base_Conocimiento_GPT-2.json.",
+        }
+
+    logger.debug(f"Wrapped bom_calculate response in v1 envelope with {len(items)} items")
+    return {
+        "ok": True,
+        "contract_version": CONTRACT_VERSION,
+        "summary": {
+            "area_m2": area_m2,
+            "panel_count": qty_panels,
+            "total_usd_iva_inc": total_usd_iva_inc,
+        },
+        "items": items,
+    }
+
+
+def _internal_error(e: Exception, legacy_format: bool = False) -> dict[str, Any]:
+    if legacy_format:
+        return {"error": f"Internal error: {str(e)}"}
+    logger.exception("Internal error during BOM calculation")
+    return _error_response(_error("INTERNAL_ERROR", f"Internal error during BOM calculation: {str(e)}"))
+
+
+def calculate_bom_batch(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Calculate many BOMs at once; returns one v1 envelope per item, in input order.
+
+    Every item is validated up front and valid items are grouped by
+    (system, family, core, thickness). The system table, autoportancia and
+    panel price are resolved once per group, and the group's quantities
+    are computed column by column over its lengths and widths
+    (``_compute_rows``); only pricing the lines is left per item.
+    Results are identical to calling ``handle_bom_calculate`` per item; an
+    invalid or failing item gets its own error envelope and never aborts
+    the batch.
+    """
+    results: list[dict[str, Any] | None] = [None] * len(items)
+    groups: dict[tuple[str, str, str, int], list[tuple[int, dict[str, Any]]]] = {}
+
+    for idx, arguments in enumerate(items):
+        params, error = _validate_arguments(arguments)
+        if error is not None:
+            results[idx] = _error_response(error)
+            continue
+        system_key = _resolve_system_key(params["family"], params["core"], params["usage"])
+        if system_key is None:
+            results[idx] = _error_response(_no_rules_error(params))
+            continue
+        group_key = (system_key, params["family"].upper(), params["core"].upper(), params["thickness_int"])
+        groups.setdefault(group_key, []).append((idx, params))
+
+    for (system_key, family, core, thickness), members in groups.items():
+        group_error: dict[str, Any] | None = None
+        try:
+            _, table, group_error = _resolve_table(members[0][1])
+            if group_error is None:
+                constants = _group_constants(table, family, core, thickness)
+        except Exception as e:
+            group_error = _internal_error(e)["error"]
+        if group_error is None:
+            try:
+                rows = _compute_rows([params for _, params in members], table, constants)
+            except Exception as e:
+                group_error = _internal_error(e)["error"]
+        for position, (idx, params) in enumerate(members):
+            if group_error is not None:
+                results[idx] = _error_response(dict(group_error))
+                continue
+            try:
+                results[idx] = _build_bom(params, system_key, table, constants, rows[position])
+            except Exception as e:
+                results[idx] = _internal_error(e)
+
+    return results  # type: ignore[return-value]
+
+
+@validate_arguments(
+    "bom_calculate",
+    BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
+    codes={
+        "thickness_mm": BOM_CALCULATE_ERROR_CODES["INVALID_THICKNESS"],
+        "product_family": BOM_CALCULATE_ERROR_CODES["RULE_NOT_FOUND"],
+    },
+    required_code=BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
+    legacy_error=lambda error: _error_response(error, legacy_format=True),
+)
 async def handle_bom_calculate(arguments: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
     """Execute bom_calculate tool and return BOM breakdown in v1 contract format.
     
     Args:
-        arguments: Tool arguments containing product_family, thickness_mm, core_type, usage, length_m, width_m
-        legacy_format: If True, return legacy format for backwards compatibility
-    
-    Returns:
-        v1 contract envelope: {ok, contract_version, items, summary} or {ok, contract_version, error}
-        arguments: Tool arguments containing product_family, thickness_mm, core_type, usage, dimensions
+        arguments: Tool arguments containing product_family, thickness_mm, core_type, usage,
+            length_m, width_m and the optional quantity_panels / tipo_estructura
         legacy_format: If True, return legacy format for backwards compatibility
     
     Returns:
         v1 contract envelope: {ok, contract_version, summary, items} or {ok, contract_version, error}
     """
-    family = arguments.get("product_family", "")
-    thickness = arguments.get("thickness_mm", 0)
-    core = arguments.get("core_type", "EPS")
-    usage = arguments.get("usage", "")
-    length = arguments.get("length_m", 0)
-    width = arguments.get("width_m", 0)
-    qty_panels = arguments.get("quantity_panels")
-
-    # Validate required parameters
-    if not family or not usage or not length or not width:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                "message": "product_family, usage, length_m, and width_m are required",
-            }
-        }
-        if legacy_format:
-            return {"error": "product_family, usage, length_m, and width_m are required"}
-        logger.debug("Wrapped bom_calculate error response in v1 envelope")
-        return error_response
-    
-    # Validate usage parameter (must be one of allowed values per contract)
-    allowed_usage_values = ["techo", "pared", "camara"]
-    if usage not in allowed_usage_values:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                "message": f"usage must be one of {allowed_usage_values}",
-                "details": {"received": usage}
-            }
-        }
-        if legacy_format:
-            return {"error": f"usage must be one of {allowed_usage_values}"}
-        logger.debug("Wrapped bom_calculate error response in v1 envelope")
-        return error_response
-    
-    # Validate thickness_mm (must be in range [30, 250] per contract)
-    if not thickness or thickness <= 0:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INVALID_THICKNESS"],
-                "message": "thickness_mm is required and must be a positive number",
-                "details": {"received": thickness}
-            }
-        }
-        if legacy_format:
-            return {
-                "error": "thickness_mm is required and must be a positive number",
-                "received": thickness
-            }
-        logger.debug("Wrapped bom_calculate error response in v1 envelope")
-        return error_response
-    
-    try:
-        thickness_val = float(thickness)
-        if thickness_val < 30 or thickness_val > 250:
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": BOM_CALCULATE_ERROR_CODES["INVALID_THICKNESS"],
-                    "message": "thickness_mm must be between 30 and 250",
-                    "details": {"received": thickness}
-                }
-            }
-            if legacy_format:
-                return {"error": "thickness_mm must be between 30 and 250", "received": thickness}
-            logger.debug("Wrapped bom_calculate error response in v1 envelope")
-            return error_response
-    except (ValueError, TypeError):
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INVALID_THICKNESS"],
-                "message": "thickness_mm must be a valid number",
-                "details": {"received": thickness}
-            }
-        }
-        if legacy_format:
-            return {"error": "thickness_mm must be a valid number", "received": thickness}
-        logger.debug("Wrapped bom_calculate error response in v1 envelope")
-        return error_response
-    
-    # Validate length_m (must be in range (0, 30] per contract with exclusiveMinimum)
+    params = _to_params(arguments)
     try:
-        length_val = float(length)
-        if length_val <= 0 or length_val > 30:
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                    "message": "length_m must be greater than 0 and at most 30",
-                    "details": {"received": length}
-                }
-            }
-            if legacy_format:
-                return {"error": "length_m must be greater than 0 and at most 30"}
-            logger.debug("Wrapped bom_calculate error response in v1 envelope")
-            return error_response
-    except (ValueError, TypeError):
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                "message": "length_m must be a valid number",
-                "details": {"received": length}
-            }
-        }
-        if legacy_format:
-            return {"error": "length_m must be a valid number"}
-        logger.debug("Wrapped bom_calculate error response in v1 envelope")
-        return error_response
-    
-    # Validate width_m (must be in range (0, 20] per contract with exclusiveMinimum)
-    try:
-        width_val = float(width)
-        if width_val <= 0 or width_val > 20:
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                    "message": "width_m must be greater than 0 and at most 20",
-                    "details": {"received": width}
-                }
-            }
-            if legacy_format:
-                return {"error": "width_m must be greater than 0 and at most 20"}
-            logger.debug("Wrapped bom_calculate error response in v1 envelope")
-            return error_response
-    except (ValueError, TypeError):
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                "message": "width_m must be a valid number",
-                "details": {"received": width}
-            }
-        }
-        if legacy_format:
-            return {"error": "width_m must be a valid number"}
-        logger.debug("Wrapped bom_calculate error response in v1 envelope")
-        return error_response
-    
-    # Validate quantity_panels if provided (must be in range [1, 2000] per contract)
-    if qty_panels is not None:
-        try:
-            qty_panels_val = int(qty_panels)
-            if qty_panels_val < 1 or qty_panels_val > 2000:
-                error_response = {
-                    "ok": False,
-                    "contract_version": CONTRACT_VERSION,
-                    "error": {
-                        "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                        "message": "quantity_panels must be between 1 and 2000",
-                        "details": {"received": qty_panels}
-                    }
-                }
-                if legacy_format:
-                    return {"error": "quantity_panels must be between 1 and 2000"}
-                logger.debug("Wrapped bom_calculate error response in v1 envelope")
-                return error_response
-            qty_panels = qty_panels_val
-        except (ValueError, TypeError):
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"],
-                    "message": "quantity_panels must be a valid integer",
-                    "details": {"received": qty_panels}
-                }
-            }
-            if legacy_format:
-                return {"error": "quantity_panels must be a valid integer"}
-            logger.debug("Wrapped bom_calculate error response in v1 envelope")
-            return error_response
-
-    try:
-        rules = _load_bom_rules()
-        system_key = _resolve_system_key(family, core, usage)
-
-        if not system_key:
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": BOM_CALCULATE_ERROR_CODES["RULE_NOT_FOUND"],
-                    "message": f"No BOM rules found for {family} {core} {usage}",
-                    "details": {
-                        "hint": "Valid systems: techo_isoroof_3g, techo_isodec_eps, techo_isodec_pir, pared_isopanel_eps, pared_isowall_pir, pared_isofrig_pir"
-                    }
-                }
-            }
-            if legacy_format:
-                return {
-                    "error": f"No BOM rules found for {family} {core} {usage}",
-                    "hint": "Valid systems: techo_isoroof_3g, techo_isodec_eps, techo_isodec_pir, pared_isopanel_eps, pared_isowall_pir, pared_isofrig_pir",
-                }
-            logger.debug("Wrapped bom_calculate error response in v1 envelope")
-            return error_response
-
-        # Look up system rules
-        systems = rules.get("sistemas", rules.get("systems", {}))
-        system = systems.get(system_key)
-
-        if not system:
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": BOM_CALCULATE_ERROR_CODES["RULE_NOT_FOUND"],
-                    "message": f"System '{system_key}' not found in bom_rules.json",
-                    "details": {"available_systems": list(systems.keys())}
-                }
-            }
-            if legacy_format:
-                return {
-                    "error": f"System '{system_key}' not found in bom_rules.json",
-                    "available_systems": list(systems.keys()),
-                }
-            logger.debug("Wrapped bom_calculate error response in v1 envelope")
-            return error_response
-
-        # Basic panel calculation
-        panel_width_m = 1.0  # Default useful width in meters (most panels are ~1m useful)
-        if qty_panels is None:
-            qty_panels = max(1, int(length / panel_width_m + 0.5))
-
-        area_m2 = length * width
-        
-        # Calculate supports using correct formula: ROUNDUP((length_m / autoportancia) + 1)
-        # Use producto_ref from system to avoid duplicating mapping logic
-        producto_ref = system.get("producto_ref")
-        autoportancia = _get_autoportancia(family, core, thickness, producto_ref=producto_ref)
-        
-        if autoportancia and autoportancia > 0:
-            # Formula from quotation_calculator_v3.py:414-427 and bom_rules.json
-            n_supports = max(2, math.ceil((length / autoportancia) + 1))
-        else:
-            # Fallback if autoportancia not found
-            n_supports = max(2, math.ceil(length / 3.0) + 1)  # Conservative fallback: 3m span
-
-        # Build items array for v1 contract
-        items: list[dict[str, Any]] = []
-        
-        # Construct SKU for panel lookup - try to match pricing data format
-        # Pricing data has SKUs like "IROOF30", "IROOF50", etc.
-        # Try different SKU formats
-        thickness_int = int(thickness)
-        sku_candidates = [
-            f"{family.upper()}{thickness_int}",  # e.g., "ISODEC100"
-            f"{family.upper()}-{thickness_int}",  # e.g., "ISODEC-100"
-            f"{family.upper()}_{core.upper()}_{thickness_int}",  # e.g., "ISODEC_EPS_100"
-        ]
-        
-        # Try to fetch price for panels using pricing handler
-        panel_unit_price = 0.0
-        panel_sku = sku_candidates[0]  # Default to first format
-        
-        # Note: Internal calls to handle_price_check always use v1 format (legacy_format not passed)
-        # regardless of the format requested by external callers. This ensures consistent internal
-        # communication while maintaining backwards compatibility at the API boundary.
-        
-        # Parallelize SKU candidate price checks using asyncio.gather()
-        # NOTE: sku_candidates is a small, fixed list of format variants (currently 3).
-        # If this list is ever expanded to many dynamically generated candidates, add
-        # explicit concurrency limiting (e.g., using an asyncio.Semaphore around
-        # handle_price_check) to avoid creating too many parallel requests.
-        async def fetch_price(sku: str) -> tuple[str, dict | None]:
-            """Fetch price for a single SKU candidate."""
-            try:
-                result = await handle_price_check({"query": sku, "filter_type": "sku"})
-                if result.get("ok") and result.get("matches"):
-                    return (sku, result["matches"][0])
-            except Exception as e:
-                logger.debug(f"Failed to fetch price for SKU candidate '{sku}': {e}")
-            return (sku, None)
-        
-        # NOTE: sku_candidates is a small, fixed list of format variants (currently 3).
-        # If this list is ever expanded to many dynamically generated candidates, add
-        # explicit concurrency limiting (e.g., using an asyncio.Semaphore around
-        # handle_price_check) to avoid creating too many parallel requests.
-        # Fetch all SKU candidates in parallel
-        price_results = await asyncio.gather(*[fetch_price(sku) for sku in sku_candidates])
-        
-        # Use the first successful result
-        for sku_candidate, match in price_results:
-            if match:
-                panel_unit_price = match.get("price_usd_iva_inc", 0.0)
-                panel_sku = match.get("sku", sku_candidate)
-                break
-        
-        # Add panel item
-        panel_subtotal = panel_unit_price * qty_panels
-        items.append({
-            "item_type": "panel",
-            "sku": panel_sku,
-            "quantity": qty_panels,
-            "unit": "unit",
-            "unit_price_usd_iva_inc": panel_unit_price,
-            "subtotal_usd_iva_inc": panel_subtotal,
-        })
-        
-        # Calculate total
-        total_usd_iva_inc = sum(item["subtotal_usd_iva_inc"] for item in items)
-        
-        # Build v1 contract response
-        success_response = {
-            "ok": True,
-            "contract_version": CONTRACT_VERSION,
-            "summary": {
-                "area_m2": area_m2,
-                "panel_count": qty_panels,
-                "total_usd_iva_inc": total_usd_iva_inc,
-            },
-            "items": items,
-        }
-        
-        if legacy_format:
-            support_note = f"Calculated from length ({length}m) / autoportancia ({autoportancia}m)" if autoportancia else f"Fallback estimate (autoportancia not found for {family} {core} {thickness_int}mm)"
-            return {
-                "system": system_key,
-                "product": f"{family} {core} {thickness_int}mm",
-                "dimensions": {"length_m": length, "width_m": width, "area_m2": area_m2},
-                "panels": {"quantity": qty_panels, "note": "Verify against useful panel width from KB"},
-                "supports": n_supports,
-                "supports_note": support_note,
-                "bom_rules_applied": system,
-                "source": "bom_rules.json (Level 1.3) + accessories_catalog.json (Level 1.2)",
-                "note": "This is a parametric estimate. Final BOM should be validated against KB formulas in BMC_Base_Conocimiento_GPT-2.json.",
-            }
-        
-        logger.debug(f"Wrapped bom_calculate response in v1 envelope with {len(items)} items")
-        return success_response
-        
+        with span("bom.resolve_table"):
+            system_key, table, error = _resolve_table(params)
+        if error is not None:
+            return _error_response(error, legacy_format)
+        with span("bom.pricing"):
+            constants = _group_constants(table, params["family"], params["core"], params["thickness_int"])
+        with span("bom.assemble"):
+            row = _compute_rows([params], table, constants)[0]
+            return _build_bom(params, system_key, table, constants, row, legacy_format)
     except Exception as e:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": BOM_CALCULATE_ERROR_CODES["INTERNAL_ERROR"],
-                "message": f"Internal error during BOM calculation: {str(e)}",
-            }
-        }
-        if legacy_format:
-            return {"error": f"Internal error: {str(e)}"}
-        logger.exception("Internal error during BOM calculation")
-        return error_response
+        return _internal_error(e, legacy_format)
@@ -2,16 +2,56 @@
 
 Searches shopify_catalog_v1.json for products by name, category, or keyword.
 Returns lightweight results (id, title, handle, type, vendor, tags).
+
+The catalog file is keyed by handle (``products_by_handle``) and ships
+prebuilt ``indexes`` (sku_to_handle, by_type, by_category, by_tag,
+by_vendor). The file is parsed once per process and those indexes are
+translated into position lists so SKU lookups and type/tag filters never
+scan the full catalog.
+
+Free-text queries are ranked with BM25 over a tokenized inverted index of
+title/type/tags/handle (field-boosted term frequencies). Per-posting BM25
+impacts are precomputed at index time, so a query only sums the posting
+lists of its terms and picks the best ``limit`` hits with a heap. Terms
+come from the shared analyzer (accent folding, plural stemming, synonyms,
+abbreviations), applied identically at build and query time. Query terms
+that match nothing are corrected through a fuzzy (deletes dictionary)
+index over the vocabulary and reported back as ``suggestions``.
+
+Each product's CATEGORY_MAP membership is computed once at index time as a
+bitmask plus per-category position sets, so a category filter is a set
+intersection rather than a keyword scan per candidate.
+
+With ``MCP_CATALOG_LOAD_MODE=lean`` only the fields search results need
+(LEAN_PRODUCT_FIELDS) stay resident. Full records go to an offset-indexed
+NDJSON side file under ``MCP_CATALOG_CACHE_DIR`` and are read on demand by
+``get_product_record``; a manifest stamped with the catalog's mtime/size
+lets later processes skip parsing the full catalog entirely.
+
+In full mode the parsed file comes from the shared KB registry; a registry
+reload of the catalog drops the resident data and index together.
 """
 
 from __future__ import annotations
 
+import bisect
+import heapq
 import json
 import logging
+import math
+import os
+import tempfile
 import threading
+from collections import Counter
 from pathlib import Path
 from typing import Any
 
+from mcp.kb import registry as kb_registry
+from mcp.search.analyzer import analyze, fold
+from mcp.search.fuzzy import FuzzyIndex
+from mcp.search.record_store import OffsetRecordStore, StaleRecordsError
+from mcp.tracing import span
+from mcp.validation import validate_arguments
 from mcp_tools.contracts import CONTRACT_VERSION, CATALOG_SEARCH_ERROR_CODES
 
 logger = logging.getLogger(__name__)
@@ -19,6 +59,14 @@ logger = logging.getLogger(__name__)
 KB_ROOT = Path(__file__).resolve().parent.parent.parent
 CATALOG_FILE = KB_ROOT / "shopify_catalog_v1.json"
 
+# "full" keeps parsed products resident; "lean" keeps LEAN_PRODUCT_FIELDS only
+CATALOG_LOAD_MODE = os.getenv("MCP_CATALOG_LOAD_MODE", "full").strip().lower()
+CATALOG_CACHE_DIR = Path(
+    os.getenv("MCP_CATALOG_CACHE_DIR", str(Path(tempfile.gettempdir()) / "panelin_mcp"))
+)
+# Everything _map_to_v1_result and _to_lightweight read
+LEAN_PRODUCT_FIELDS = ("id", "handle", "title", "type", "product_category", "vendor", "tags", "status")
+
 # Category keyword mappings for filtering
 CATEGORY_MAP = {
     "techo": ["techo", "roof", "isoroof", "isodec", "cubierta"],
@@ -26,16 +74,37 @@ CATEGORY_MAP = {
     "camara": ["camara", "frio", "isofrig", "frigorifico"],
     "accesorio": ["accesorio", "accessory", "fijacion", "tornillo", "cumbrera", "babeta"],
 }
+# One bit per category, in CATEGORY_MAP (and _infer_category priority) order
+CATEGORY_BITS = {category: 1 << i for i, category in enumerate(CATEGORY_MAP)}
+
+# BM25 parameters and per-field boosts applied to term frequencies
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_BOOSTS = {
+    "title": 3.0,
+    "type": 2.0,
+    "tags": 1.5,
+    "handle": 1.0,
+}
+# Query terms with no exact posting fall back to vocabulary prefixes
+PREFIX_MIN_LENGTH = 3
+PREFIX_MAX_EXPANSIONS = 10
+PREFIX_WEIGHT = 0.5
 
-_catalog_data: list[dict[str, Any]] | None = None
+_catalog_data: dict[str, Any] | None = None
 _catalog_index: dict[str, Any] | None = None
+_catalog_records: OffsetRecordStore | None = None
 _normalized_category_keywords: dict[str, list[str]] | None = None
 _catalog_index_lock = threading.Lock()
 _category_keywords_lock = threading.Lock()
 
 
-def _normalize(text: str) -> str:
-    return text.lower().strip()
+def _normalize(text: str | None) -> str:
+    return fold(text).strip()
+
+
+def _normalize_sku(sku: str | None) -> str:
+    return _normalize(sku).replace("-", "").replace("_", "").replace(" ", "")
 
 
 def _get_normalized_category_keywords(category: str) -> list[str]:
@@ -62,117 +131,432 @@ def _get_normalized_category_keywords(category: str) -> list[str]:
     return _normalized_category_keywords.get(category, [])
 
 
-def _build_catalog_index(catalog: list[dict[str, Any]]) -> dict[str, Any]:
+def _category_mask(searchable: str) -> int:
+    """Bitmask of the CATEGORY_MAP categories whose keywords occur in ``searchable``."""
+    mask = 0
+    for category, bit in CATEGORY_BITS.items():
+        if any(kw in searchable for kw in _get_normalized_category_keywords(category)):
+            mask |= bit
+    return mask
+
+
+def _category_from_mask(mask: int) -> str:
+    """Highest-priority category set in ``mask`` (``"other"`` when empty)."""
+    for category, bit in CATEGORY_BITS.items():
+        if mask & bit:
+            return category
+    return "other"
+
+
+def _positions_from_shipped_index(
+    shipped: dict[str, list[str]] | None,
+    position_by_handle: dict[str, int],
+    normalize_key=_normalize,
+) -> dict[str, list[int]]:
+    """Translate a shipped ``{key: [handles]}`` index into ``{normalized_key: [positions]}``."""
+    translated: dict[str, list[int]] = {}
+    for key, handles in (shipped or {}).items():
+        norm_key = normalize_key(str(key))
+        if not norm_key:
+            continue
+        if isinstance(handles, str):
+            handles = [handles]
+        bucket = translated.setdefault(norm_key, [])
+        bucket.extend(
+            position_by_handle[handle] for handle in handles if handle in position_by_handle
+        )
+    # Keys that collapse under normalization may list a product twice
+    return {key: sorted(set(positions)) for key, positions in translated.items()}
+
+
+def _compute_facet_index(products: list[dict[str, Any]], field: str) -> dict[str, list[str]]:
+    """Compute a ``{value: [handles]}`` facet index when the file does not ship one."""
+    facet: dict[str, list[str]] = {}
+    for product in products:
+        values = product.get(field)
+        if not isinstance(values, list):
+            values = [values]
+        for value in values:
+            if value:
+                facet.setdefault(str(value), []).append(product.get("handle", ""))
+    return facet
+
+
+def _compute_sku_index(products: list[dict[str, Any]]) -> dict[str, str]:
+    """Compute a ``{sku: handle}`` index from variants when the file does not ship one."""
+    sku_to_handle: dict[str, str] = {}
+    for product in products:
+        for variant in product.get("variants") or []:
+            sku = variant.get("sku") if isinstance(variant, dict) else None
+            if sku:
+                sku_to_handle.setdefault(str(sku), product.get("handle", ""))
+    return sku_to_handle
+
+
+def _build_bm25_postings(
+    field_tokens: list[dict[str, list[str]]],
+) -> dict[str, list[tuple[int, float]]]:
+    """Build ``{token: [(position, bm25_impact)]}`` from per-product field tokens.
+
+    Term frequency is the boost-weighted sum over fields and document
+    length is the boost-weighted token count. Every part of the BM25 term
+    score is query-independent, so it is stored on the posting directly.
+    """
+    weighted_tf: list[Counter] = []
+    doc_len: list[float] = []
+    for fields in field_tokens:
+        tf: Counter = Counter()
+        for field, tokens in fields.items():
+            boost = FIELD_BOOSTS[field]
+            for tok in tokens:
+                tf[tok] += boost
+        weighted_tf.append(tf)
+        doc_len.append(sum(tf.values()))
+
+    n_docs = len(weighted_tf)
+    avg_len = (sum(doc_len) / n_docs) if n_docs else 0.0
+    doc_freq: Counter = Counter()
+    for tf in weighted_tf:
+        doc_freq.update(tf.keys())
+
+    postings: dict[str, list[tuple[int, float]]] = {}
+    for pos, tf in enumerate(weighted_tf):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * (doc_len[pos] / avg_len if avg_len else 0.0))
+        for tok, freq in tf.items():
+            df = doc_freq[tok]
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            impact = idf * freq * (BM25_K1 + 1) / (freq + norm)
+            postings.setdefault(tok, []).append((pos, impact))
+    return postings
+
+
+def _complete_shipped_indexes(
+    products_by_handle: dict[str, Any],
+    shipped: dict[str, Any] | None,
+) -> dict[str, Any]:
+    """Return the shipped handle-keyed indexes, computing any an older export lacks."""
+    indexes = dict(shipped or {})
+    products = [p for p in products_by_handle.values() if isinstance(p, dict)]
+    if indexes.get("sku_to_handle") is None:
+        indexes["sku_to_handle"] = _compute_sku_index(products)
+    for index_name, field in (
+        ("by_type", "type"),
+        ("by_category", "product_category"),
+        ("by_tag", "tags"),
+        ("by_vendor", "vendor"),
+    ):
+        if indexes.get(index_name) is None:
+            indexes[index_name] = _compute_facet_index(products, field)
+    return indexes
+
+
+def _build_catalog_index(catalog: dict[str, Any]) -> dict[str, Any]:
     """Build search index for fast catalog lookups.
-    
+
+    Products are addressed by their position in ``products_by_handle``
+    order. The shipped ``indexes`` are reused as-is (keys normalized,
+    handles translated to positions); they are only computed here when
+    an older export does not include them.
+
     Returns dict with:
-        - normalized_fields: {index: {title, type, tags, handle, searchable}} - pre-normalized
-        - by_type: {normalized_type: [indices]}
+        - products: [product] in file order
+        - position_by_handle: {handle: position}
+        - normalized_fields: {position: {title, type, tags, category, handle, searchable}}
+        - by_sku: {normalized_sku: [positions]}
+        - by_type / by_category / by_tag / by_vendor: {normalized_key: [positions]}
+        - postings: {token: [(position, bm25_impact)]}
+        - vocabulary: sorted tokens (for prefix expansion)
+        - fuzzy: FuzzyIndex over non-numeric tokens (for typo correction)
+        - category_masks: [CATEGORY_BITS mask] per position
+        - category_positions: {category: frozenset(positions)}
     """
-    normalized_fields = {}
-    by_type = {}
-    
-    for idx, product in enumerate(catalog):
+    products_by_handle = catalog.get("products_by_handle", {})
+    shipped = _complete_shipped_indexes(products_by_handle, catalog.get("indexes"))
+
+    products: list[dict[str, Any]] = []
+    position_by_handle: dict[str, int] = {}
+    normalized_fields: dict[int, dict[str, str]] = {}
+    field_tokens: list[dict[str, list[str]]] = []
+    category_masks: list[int] = []
+
+    for handle, product in products_by_handle.items():
         if not isinstance(product, dict):
             continue
-        
-        title = _normalize(product.get("title", ""))
-        ptype = _normalize(product.get("product_type", ""))
-        tags = _normalize(str(product.get("tags", "")))
-        handle = _normalize(product.get("handle", ""))
-        
+        pos = len(products)
+        products.append(product)
+        position_by_handle[handle] = pos
+
+        title = _normalize(product.get("title"))
+        ptype = _normalize(product.get("type"))
+        tags = _normalize(" ".join(str(t) for t in product.get("tags") or []))
+        category = _normalize(product.get("product_category"))
+        norm_handle = _normalize(handle)
+
         # Pre-build searchable string
-        searchable = f"{title} {ptype} {tags} {handle}"
-        
-        normalized_fields[idx] = {
+        normalized_fields[pos] = {
             "title": title,
             "type": ptype,
             "tags": tags,
-            "handle": handle,
-            "searchable": searchable
+            "category": category,
+            "handle": norm_handle,
+            "searchable": f"{title} {ptype} {tags} {category} {norm_handle}",
         }
-        
-        # Index by product type
-        if ptype:
-            if ptype not in by_type:
-                by_type[ptype] = []
-            by_type[ptype].append(idx)
-    
+        category_masks.append(_category_mask(normalized_fields[pos]["searchable"]))
+        field_tokens.append({
+            "title": analyze(title),
+            "type": analyze(ptype),
+            "tags": analyze(tags),
+            "handle": analyze(norm_handle),
+        })
+
+    sku_to_handle = shipped["sku_to_handle"]
+    facets = {
+        index_name: _positions_from_shipped_index(shipped[index_name], position_by_handle)
+        for index_name in ("by_type", "by_category", "by_tag", "by_vendor")
+    }
+
+    postings = _build_bm25_postings(field_tokens)
+    category_positions = {
+        category: frozenset(pos for pos, mask in enumerate(category_masks) if mask & bit)
+        for category, bit in CATEGORY_BITS.items()
+    }
+
     return {
+        "products": products,
+        "position_by_handle": position_by_handle,
         "normalized_fields": normalized_fields,
-        "by_type": by_type,
-        "products": catalog  # Keep reference to original list
+        "by_sku": _positions_from_shipped_index(
+            {sku: [handle] for sku, handle in sku_to_handle.items()},
+            position_by_handle,
+            normalize_key=_normalize_sku,
+        ),
+        **facets,
+        "postings": postings,
+        "vocabulary": sorted(postings),
+        "fuzzy": FuzzyIndex(token for token in postings if not token.isdigit()),
+        "category_masks": category_masks,
+        "category_positions": category_positions,
     }
 
 
-def _load_catalog() -> list[dict[str, Any]]:
+def _shape_catalog(raw: dict[str, Any] | list[Any]) -> dict[str, Any]:
+    if isinstance(raw, list):
+        # Older flat exports: key them by handle so one code path serves both
+        raw = {
+            "products_by_handle": {
+                p.get("handle", str(i)): p for i, p in enumerate(raw) if isinstance(p, dict)
+            },
+        }
+    return raw
+
+
+def _read_catalog_file() -> dict[str, Any]:
+    """Parse the catalog directly, bypassing the registry (lean mode must not keep it)."""
+    with open(CATALOG_FILE, encoding="utf-8") as f:
+        return _shape_catalog(json.load(f))
+
+
+def _to_lean(product: dict[str, Any]) -> dict[str, Any]:
+    return {field: product[field] for field in LEAN_PRODUCT_FIELDS if field in product}
+
+
+def _load_lean_catalog() -> dict[str, Any]:
+    """Load lean products plus shipped indexes, (re)writing the side files if stale.
+
+    Sets ``_catalog_records`` to the offset-indexed store of full records.
+    """
+    global _catalog_records
+    manifest_path = CATALOG_CACHE_DIR / f"{CATALOG_FILE.stem}.lean.json"
+    records_path = CATALOG_CACHE_DIR / f"{CATALOG_FILE.stem}.records.ndjson"
+    stat = CATALOG_FILE.stat()
+    stamp = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    manifest: dict[str, Any] | None = None
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # The records file carries the stamp too: another worker may have
+        # rewritten it for a newer catalog after this manifest was written
+        if manifest.get("source") != stamp or OffsetRecordStore.read_header(records_path) != stamp:
+            manifest = None
+    except (OSError, ValueError):
+        manifest = None
+
+    if manifest is None:
+        raw = _read_catalog_file()
+        products_by_handle = {
+            handle: product
+            for handle, product in raw.get("products_by_handle", {}).items()
+            if isinstance(product, dict)
+        }
+        store = OffsetRecordStore.write(records_path, products_by_handle.items(), header=stamp)
+        manifest = {
+            "source": stamp,
+            "products_by_handle": {h: _to_lean(p) for h, p in products_by_handle.items()},
+            "indexes": _complete_shipped_indexes(products_by_handle, raw.get("indexes")),
+            "offsets": store.offsets,
+        }
+        tmp_path = manifest_path.with_name(f"{manifest_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+        logger.info("Wrote lean catalog side files to %s", CATALOG_CACHE_DIR)
+
+    _catalog_records = OffsetRecordStore(records_path, manifest["offsets"], header=stamp)
+    return {
+        "products_by_handle": manifest["products_by_handle"],
+        "indexes": manifest["indexes"],
+    }
+
+
+def _load_catalog() -> dict[str, Any]:
     global _catalog_data
     if _catalog_data is None:
-        with open(CATALOG_FILE, encoding="utf-8") as f:
-            raw = json.load(f)
-        _catalog_data = raw if isinstance(raw, list) else raw.get("products", [])
+        if CATALOG_LOAD_MODE == "lean":
+            try:
+                _catalog_data = _load_lean_catalog()
+            except OSError as e:
+                logger.warning("Lean catalog load failed (%s); keeping full records resident", e)
+        if _catalog_data is None:
+            _catalog_data = _shape_catalog(kb_registry.load(CATALOG_FILE))
     return _catalog_data
 
 
+def _reset_catalog_caches() -> None:
+    """Drop the loaded catalog and its index; next search reloads both."""
+    global _catalog_data, _catalog_index, _catalog_records
+    with _catalog_index_lock:
+        _catalog_data = None
+        _catalog_index = None
+        _catalog_records = None
+
+
+kb_registry.subscribe((CATALOG_FILE,), _reset_catalog_caches)
+
+
+def get_product_record(handle: str) -> dict[str, Any] | None:
+    """Return the full catalog record for ``handle``.
+
+    In lean mode this reads the record from the side file; otherwise it
+    comes from the resident catalog.
+    """
+    catalog = _load_catalog()
+    if _catalog_records is not None:
+        try:
+            return _catalog_records.get(handle)
+        except StaleRecordsError:
+            # Rebuilt for a newer catalog elsewhere: reload against the current file
+            _reset_catalog_caches()
+            catalog = _load_catalog()
+            if _catalog_records is not None:
+                return _catalog_records.get(handle)
+    product = catalog.get("products_by_handle", {}).get(handle)
+    return product if isinstance(product, dict) else None
+
+
+def _get_catalog_index() -> dict[str, Any]:
+    """Return the catalog index, building it once with thread safety.
+
+    Uses the same double-checked locking pattern as the keyword cache.
+    """
+    global _catalog_index
+
+    # Fast path: check if already initialized (no lock needed for read)
+    if _catalog_index is not None:
+        return _catalog_index
+
+    catalog = _load_catalog()
+    # Slow path: need to build index with lock
+    with _catalog_index_lock:
+        # Double-check inside lock (another thread may have built it)
+        if _catalog_index is None:
+            _catalog_index = _build_catalog_index(catalog)
+    return _catalog_index
+
+
 def _to_lightweight(product: dict[str, Any]) -> dict[str, Any]:
     """Extract only the fields needed for search results."""
     return {
-        "id": product.get("id"),
+        "id": product.get("id") or product.get("handle", ""),
         "title": product.get("title", ""),
         "handle": product.get("handle", ""),
-        "product_type": product.get("product_type", ""),
+        "product_type": product.get("type") or "",
         "vendor": product.get("vendor", ""),
-        "tags": product.get("tags", ""),
+        "tags": product.get("tags") or [],
         "status": product.get("status", ""),
     }
 
 
-def _calculate_score(product: dict[str, Any], query: str, norm_query: str) -> float:
-    """Calculate relevance score (0.0-1.0) based on match quality."""
-    title = _normalize(product.get("title", ""))
-    ptype = _normalize(product.get("product_type", ""))
-    handle = _normalize(product.get("handle", ""))
-    
-    score = 0.0
-    
-    # Exact match in title gets highest score
-    if norm_query == title:
-        score = 1.0
-    # Title starts with query
-    elif title.startswith(norm_query):
-        score = 0.95
-    # Query is in title
-    elif norm_query in title:
-        score = 0.85
-    # Exact match in handle
-    elif norm_query == handle:
-        score = 0.8
-    # Handle contains query
-    elif norm_query in handle:
-        score = 0.7
-    # Product type match
-    elif norm_query in ptype:
-        score = 0.6
-    # General match (tags, etc)
-    else:
-        score = 0.5
-    
-    return score
+def _prefix_expansions(vocabulary: list[str], term: str) -> list[str]:
+    """Indexed tokens starting with ``term`` (bounded by ``PREFIX_MAX_EXPANSIONS``)."""
+    if len(term) < PREFIX_MIN_LENGTH:
+        return []
+    expansions: list[str] = []
+    i = bisect.bisect_left(vocabulary, term)
+    while (
+        i < len(vocabulary)
+        and vocabulary[i].startswith(term)
+        and len(expansions) < PREFIX_MAX_EXPANSIONS
+    ):
+        expansions.append(vocabulary[i])
+        i += 1
+    return expansions
+
+
+def _correct_terms(index: dict[str, Any], terms: list[str]) -> list[str]:
+    """Replace terms that match neither a token nor a prefix with their fuzzy correction."""
+    postings = index["postings"]
+    corrected: list[str] = []
+    for term in terms:
+        if term in postings or term.isdigit() or _prefix_expansions(index["vocabulary"], term):
+            corrected.append(term)
+        else:
+            corrected.append(index["fuzzy"].correct(term) or term)
+    return corrected
 
 
-def _map_to_v1_result(product: dict[str, Any], query: str, norm_query: str) -> dict[str, Any]:
-    """Map product to v1 contract result format."""
-    product_id = str(product.get("id", ""))
-    name = product.get("title", "")
-    category = product.get("product_type", "")
+def _bm25_scores(index: dict[str, Any], terms: list[str]) -> dict[int, float]:
+    """Accumulate BM25 scores for analyzed ``terms`` over the posting lists they touch.
+
+    Terms missing from the vocabulary expand to up to
+    ``PREFIX_MAX_EXPANSIONS`` indexed tokens sharing that prefix (at
+    ``PREFIX_WEIGHT``), which keeps partial-word queries such as ``isod``
+    working.
+    """
+    postings = index["postings"]
+    scores: dict[int, float] = {}
+
+    for term in dict.fromkeys(terms):
+        if term in postings:
+            expansions = [(term, 1.0)]
+        else:
+            expansions = [
+                (token, PREFIX_WEIGHT)
+                for token in _prefix_expansions(index["vocabulary"], term)
+            ]
+        for token, weight in expansions:
+            for pos, impact in postings[token]:
+                scores[pos] = scores.get(pos, 0.0) + impact * weight
+    return scores
+
+
+def _map_to_v1_result(
+    product: dict[str, Any],
+    score: float,
+) -> dict[str, Any]:
+    """Map product to v1 contract result format.
+
+    ``score`` is the relevance in [0.0, 1.0] computed by the caller.
+    """
     handle = product.get("handle", "")
+    # Catalog entries are keyed by handle; there is no numeric Shopify id
+    product_id = str(product.get("id") or handle)
+    name = product.get("title", "")
+    category = product.get("type") or product.get("product_category") or ""
     
     # Construct URL from handle (assuming BMC Uruguay shop structure)
     url = f"https://shop.bmcuruguay.com/products/{handle}" if handle else ""
     
-    # Calculate relevance score
-    score = _calculate_score(product, query, norm_query)
-    
     result: dict[str, Any] = {
         "product_id": product_id,
         "name": name,
@@ -187,50 +571,36 @@ def _map_to_v1_result(product: dict[str, Any], query: str, norm_query: str) -> d
     return result
 
 
+@validate_arguments(
+    "catalog_search",
+    CATALOG_SEARCH_ERROR_CODES["INVALID_CATEGORY"],
+    codes={"query": CATALOG_SEARCH_ERROR_CODES["QUERY_TOO_SHORT"]},
+    strip=("query",),
+    clamp=("limit",),
+    legacy_error=lambda error: {"error": error["message"], "results": []},
+)
 async def handle_catalog_search(arguments: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
     """Execute catalog_search tool and return lightweight results in v1 contract format.
     
     Args:
-        arguments: Tool arguments containing query, category, limit
+        arguments: Tool arguments containing query, category, limit and the
+            optional product_type / tag facet filters
         legacy_format: If True, return legacy format for backwards compatibility
     
     Returns:
         v1 contract envelope: {ok, contract_version, results} or {ok, contract_version, error}
     """
-    query = arguments.get("query", "")
-    category = arguments.get("category", "all")
-    limit = arguments.get("limit", 5)
-
-    # Strip whitespace from query before validation
-    query = query.strip()
-
-    # Validate query parameter (minLength: 2 per contract)
-    if not query or len(query) < 2:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": CATALOG_SEARCH_ERROR_CODES["QUERY_TOO_SHORT"],
-                "message": "Query parameter is required and must be at least 2 characters long",
-            }
-        }
-        if legacy_format:
-            return {"error": "Query parameter is required and must be at least 2 characters long", "results": []}
-        logger.debug("Wrapped catalog_search error response in v1 envelope")
-        return error_response
-    
-    # Validate and clamp limit parameter (must be in range [1, 30] per contract)
-    try:
-        limit = int(limit)
-        if limit < 1:
-            limit = 1
-        elif limit > 30:
-            limit = 30
-    except (ValueError, TypeError):
-        limit = 5  # Use default if conversion fails
+    # query (stripped), category, limit (clamped to [1, 30]) and the facets
+    # were checked against the catalog_search schema by @validate_arguments
+    query = arguments["query"]
+    category = arguments["category"]
+    limit = arguments["limit"]
+    product_type = arguments.get("product_type")
+    tag = arguments.get("tag")
 
     try:
-        catalog = _load_catalog()
+        with span("catalog.index"):
+            index = _get_catalog_index()
     except Exception as e:
         error_response = {
             "ok": False,
@@ -245,71 +615,73 @@ async def handle_catalog_search(arguments: dict[str, Any], legacy_format: bool =
         logger.debug("Wrapped catalog_search error response in v1 envelope")
         return error_response
 
-    catalog = _load_catalog()
-    norm_query = _normalize(query)
-
-    # Get pre-normalized category keywords (cached)
-    norm_category_keywords: list[str] = []
-    if category != "all":
-        if category in CATEGORY_MAP:
-            norm_category_keywords = _get_normalized_category_keywords(category)
-        else:
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": CATALOG_SEARCH_ERROR_CODES["INVALID_CATEGORY"],
-                    "message": f"Invalid category: {category}",
-                    "details": {"valid_categories": list(CATEGORY_MAP.keys()) + ["all"]}
-                }
-            }
-            if legacy_format:
-                return {"error": f"Invalid category: {category}", "results": []}
-            logger.debug("Wrapped catalog_search error response in v1 envelope")
-            return error_response
-
     try:
-        global _catalog_index
-        
-        # Build index on first call with thread safety
-        # Fast path: check if already initialized (no lock needed for read)
-        if _catalog_index is None:
-            # Slow path: need to build index with lock
-            with _catalog_index_lock:
-                # Double-check inside lock (another thread may have built it)
-                if _catalog_index is None:
-                    _catalog_index = _build_catalog_index(catalog)
-        
-        results: list[dict[str, Any]] = []
-        
-        # Use pre-normalized searchable strings from index
-        for idx, fields in _catalog_index["normalized_fields"].items():
-            if norm_query not in fields["searchable"]:
-                continue
-            
-            if norm_category_keywords:
-                if not any(kw in fields["searchable"] for kw in norm_category_keywords):
-                    continue
-            
-            results.append(_catalog_index["products"][idx])
-            if len(results) >= limit:
-                break
+        products = index["products"]
+
+        with span("catalog.filter"):
+            # Facet and category filters are precomputed position sets
+            allowed: set[int] | None = None
+            if category != "all":
+                allowed = set(index["category_positions"][category])
+            if product_type:
+                type_positions = set(index["by_type"].get(_normalize(str(product_type)), []))
+                allowed = type_positions if allowed is None else allowed & type_positions
+            if tag:
+                tag_positions = set(index["by_tag"].get(_normalize(str(tag)), []))
+                allowed = tag_positions if allowed is None else allowed & tag_positions
+
+        def _passes_filters(pos: int) -> bool:
+            return allowed is None or pos in allowed
+
+        # Exact SKU hits come first, straight from sku_to_handle
+        sku_hits = [
+            pos for pos in index["by_sku"].get(_normalize_sku(query), [])
+            if _passes_filters(pos)
+        ]
+        seen = set(sku_hits)
+
+        with span("catalog.rank"):
+            # Top-k over BM25 candidates; ties keep catalog order
+            # Misspelled terms are corrected before scoring and echoed back
+            terms = analyze(query)
+            corrected = _correct_terms(index, terms)
+            suggestions = [" ".join(corrected)] if corrected != terms else []
+            scores = _bm25_scores(index, corrected)
+            top = heapq.nlargest(
+                max(limit - len(sku_hits), 0),
+                (
+                    (score, -pos) for pos, score in scores.items()
+                    if pos not in seen and _passes_filters(pos)
+                ),
+            )
+        best = top[0][0] if top else 0.0
+
+        ranked: list[tuple[int, float]] = [(pos, 1.0) for pos in sku_hits[:limit]]
+        ranked.extend((-neg_pos, round(score / best, 4)) for score, neg_pos in top)
+
+        results = [products[pos] for pos, _ in ranked]
 
         # Map to v1 contract format
-        v1_results = [_map_to_v1_result(product, query, norm_query) for product in results]
+        with span("catalog.map", results=len(ranked)):
+            v1_results = [
+                _map_to_v1_result(products[pos], score=score)
+                for pos, score in ranked
+            ]
         
         success_response = {
             "ok": True,
             "contract_version": CONTRACT_VERSION,
             "results": v1_results,
         }
+        if suggestions:
+            success_response["suggestions"] = suggestions
         
         if legacy_format:
             return {
                 "message": f"Found {len(results)} product(s) for '{query}'",
                 "results": [_to_lightweight(p) for p in results],
                 "source": "shopify_catalog_v1.json (Level 1.6)",
-                "total_catalog_size": len(catalog),
+                "total_catalog_size": len(products),
             }
         
         logger.debug(f"Wrapped catalog_search response in v1 envelope with {len(v1_results)} results")
@@ -331,14 +703,9 @@ async def handle_catalog_search(arguments: dict[str, Any], legacy_format: bool =
 
 
 def _infer_category(searchable_text: str) -> str:
-    """Infer product category from searchable text."""
-    text = searchable_text.lower()
-    if any(kw in text for kw in CATEGORY_MAP["techo"]):
-        return "techo"
-    elif any(kw in text for kw in CATEGORY_MAP["pared"]):
-        return "pared"
-    elif any(kw in text for kw in CATEGORY_MAP["camara"]):
-        return "camara"
-    elif any(kw in text for kw in CATEGORY_MAP["accesorio"]):
-        return "accesorio"
-    return "other"
+    """Infer product category from searchable text.
+
+    Indexed products already carry their mask in ``category_masks``; use
+    ``_category_from_mask`` on that instead of re-scanning their text.
+    """
+    return _category_from_mask(_category_mask(_normalize(searchable_text)))
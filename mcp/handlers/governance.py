@@ -7,6 +7,12 @@ Provides enterprise-grade product governance through:
 - Change report generation
 - Commit endpoint for approved corrections
 
+KB files are read through the shared KB registry (mcp.kb.registry), so
+validations reuse the parsed data the handlers already hold; marking a
+correction applied reloads that file and every cache built from it.
+Validated changes wait for commit in the shared state store
+(mcp.storage.shared_state), which multi-worker deployments share.
+
 Flow:
     User proposes correction
        ↓
@@ -24,12 +30,15 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
-import threading
 from datetime import datetime, timezone
 from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
 from pathlib import Path
 from typing import Any, Optional
 
+from mcp.kb import registry as kb_registry
+from mcp.storage.shared_state import get_state_store
+from mcp.tracing import span
+from mcp.validation import validate_arguments
 from mcp_tools.contracts import (
     CONTRACT_VERSION,
     VALIDATE_CORRECTION_ERROR_CODES,
@@ -56,9 +65,10 @@ ALLOWED_KB_FILES = [
     "perfileria_index.json",
 ]
 
-# In-memory cache for validated changes pending commit
-_pending_changes: dict[str, dict[str, Any]] = {}
-_pending_changes_lock = threading.Lock()
+# Validated changes pending commit live in the shared state store, so a
+# change validated on one server worker can be committed on another
+PENDING_CHANGES_NAMESPACE = "governance.pending"
+PENDING_CHANGE_TTL_SECONDS = 24 * 3600
 
 MAX_IMPACT_QUOTATIONS = 50
 
@@ -70,12 +80,11 @@ def _generate_change_id(kb_file: str, field: str, proposed_value: str) -> str:
 
 
 def _load_kb_file(kb_file: str) -> Any:
-    """Load a KB file safely from the allowed whitelist."""
+    """Load a KB file from the allowed whitelist through the shared KB registry."""
     path = KB_ROOT / kb_file
     if not path.is_file():
         return None
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+    return kb_registry.load(path)
 
 
 def _resolve_field(data: Any, field_path: str) -> tuple[bool, Any]:
@@ -218,13 +227,13 @@ def _simulate_price_impact(
 
 def _load_corrections() -> dict[str, Any]:
     """Load corrections log."""
-    with open(CORRECTIONS_FILE, encoding="utf-8") as f:
+    with span("governance.load_corrections"), open(CORRECTIONS_FILE, encoding="utf-8") as f:
         return json.load(f)
 
 
 def _save_corrections(data: dict[str, Any]) -> None:
     """Save corrections log."""
-    with open(CORRECTIONS_FILE, "w", encoding="utf-8") as f:
+    with span("governance.save_corrections"), open(CORRECTIONS_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
 
@@ -243,6 +252,7 @@ def _next_correction_id(corrections: list[dict[str, Any]]) -> str:
     return f"COR-{last_num + 1:03d}"
 
 
+@validate_arguments("validate_correction", VALIDATE_CORRECTION_ERROR_CODES["FIELD_NOT_FOUND"])
 async def handle_validate_correction(
     arguments: dict[str, Any],
     legacy_format: bool = False,
@@ -268,17 +278,6 @@ async def handle_validate_correction(
     source = arguments.get("source", "user_correction")
     notes = arguments.get("notes", "")
 
-    # --- Validate required parameters ---
-    if not kb_file or not field or proposed_value is None:
-        return {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": VALIDATE_CORRECTION_ERROR_CODES["FIELD_NOT_FOUND"],
-                "message": "kb_file, field, and proposed_value are required",
-            },
-        }
-
     # --- Validate kb_file against whitelist ---
     kb_file_clean = str(kb_file).replace("/", "").replace("\\", "").replace("..", "")
     if kb_file_clean not in ALLOWED_KB_FILES:
@@ -293,7 +292,8 @@ async def handle_validate_correction(
 
     try:
         # --- Step 1: Load KB and validate field ---
-        kb_data = _load_kb_file(kb_file_clean)
+        with span("governance.load_kb", file=kb_file_clean):
+            kb_data = _load_kb_file(kb_file_clean)
         if kb_data is None:
             return {
                 "ok": False,
@@ -337,13 +337,15 @@ async def handle_validate_correction(
             }
 
         # --- Step 3: Simulate impact on recent quotations ---
-        recent_quotations = _load_recent_quotations(MAX_IMPACT_QUOTATIONS)
-        impact = _simulate_price_impact(
-            recent_quotations,
-            field,
-            actual_value if field_exists else current_value,
-            proposed_value,
-        )
+        with span("governance.load_quotations"):
+            recent_quotations = _load_recent_quotations(MAX_IMPACT_QUOTATIONS)
+        with span("governance.simulate_impact", quotations=len(recent_quotations)):
+            impact = _simulate_price_impact(
+                recent_quotations,
+                field,
+                actual_value if field_exists else current_value,
+                proposed_value,
+            )
 
         # --- Step 4: Generate change report ---
         change_id = _generate_change_id(kb_file_clean, field, str(proposed_value))
@@ -389,8 +391,7 @@ async def handle_validate_correction(
             "created_at": now,
         }
 
-        with _pending_changes_lock:
-            _pending_changes[change_id] = pending_entry
+        get_state_store().put(PENDING_CHANGES_NAMESPACE, change_id, pending_entry, ttl=PENDING_CHANGE_TTL_SECONDS)
 
         return {
             "ok": True,
@@ -413,6 +414,11 @@ async def handle_validate_correction(
         }
 
 
+@validate_arguments(
+    "commit_correction",
+    COMMIT_CORRECTION_ERROR_CODES["CHANGE_NOT_FOUND"],
+    codes={"confirm": COMMIT_CORRECTION_ERROR_CODES["CONFIRMATION_REQUIRED"]},
+)
 async def handle_commit_correction(
     arguments: dict[str, Any],
     legacy_format: bool = False,
@@ -430,18 +436,8 @@ async def handle_commit_correction(
     Returns:
         v1 contract envelope with commit confirmation
     """
-    change_id = arguments.get("change_id", "")
-    confirm = arguments.get("confirm", False)
-
-    if not change_id:
-        return {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": COMMIT_CORRECTION_ERROR_CODES["CHANGE_NOT_FOUND"],
-                "message": "change_id is required",
-            },
-        }
+    change_id = arguments["change_id"]
+    confirm = arguments["confirm"]
 
     if not confirm:
         return {
@@ -454,8 +450,7 @@ async def handle_commit_correction(
         }
 
     # --- Retrieve the validated change ---
-    with _pending_changes_lock:
-        pending = _pending_changes.pop(change_id, None)
+    pending = get_state_store().pop(PENDING_CHANGES_NAMESPACE, change_id)
 
     if pending is None:
         return {
@@ -514,8 +509,7 @@ async def handle_commit_correction(
     except Exception as e:
         logger.exception("Internal error during correction commit")
         # Re-cache the change so user can retry
-        with _pending_changes_lock:
-            _pending_changes[change_id] = pending
+        get_state_store().put(PENDING_CHANGES_NAMESPACE, change_id, pending, ttl=PENDING_CHANGE_TTL_SECONDS)
         return {
             "ok": False,
             "contract_version": CONTRACT_VERSION,
@@ -526,6 +520,11 @@ async def handle_commit_correction(
         }
 
 
+@validate_arguments(
+    "list_corrections",
+    "INVALID_STATUS",
+    codes={"limit": "INVALID_LIMIT", "offset": "INVALID_OFFSET"},
+)
 async def handle_list_corrections(
     arguments: dict[str, Any],
     legacy_format: bool = False,
@@ -548,27 +547,6 @@ async def handle_list_corrections(
     limit = arguments.get("limit", 50)
     offset = arguments.get("offset", 0)
 
-    # Validate limit and offset
-    if not isinstance(limit, int) or limit < 1 or limit > 500:
-        return {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": "INVALID_LIMIT",
-                "message": "Limit must be an integer between 1 and 500",
-            },
-        }
-
-    if not isinstance(offset, int) or offset < 0:
-        return {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": "INVALID_OFFSET",
-                "message": "Offset must be a non-negative integer",
-            },
-        }
-
     try:
         data = _load_corrections()
         corrections = data.get("corrections", [])
@@ -723,6 +701,11 @@ async def handle_update_correction_status(
         # Save changes
         _save_corrections(data)
 
+        # Applying (or reverting) a correction changes the KB file: drop its
+        # parsed data and every cache derived from it in one step
+        if "applied" in (old_status, new_status) and correction.get("kb_file") in ALLOWED_KB_FILES:
+            kb_registry.reload([KB_ROOT / correction["kb_file"]])
+
         return {
             "ok": True,
             "contract_version": CONTRACT_VERSION,
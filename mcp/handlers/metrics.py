@@ -0,0 +1,33 @@
+"""Handler for the server_metrics tool (live metrics over stdio).
+
+The SSE transport serves the same registry at /metrics; this tool gives
+stdio deployments, which have no HTTP listener, the same view.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from mcp.metrics import get_registry
+from mcp.validation import validate_arguments
+from mcp_tools.contracts import CONTRACT_VERSION
+
+
+@validate_arguments("server_metrics", "INVALID_FORMAT")
+async def handle_server_metrics(arguments: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
+    """Return the metrics registry as JSON (with percentiles) or Prometheus text."""
+    registry = get_registry()
+    prefix = arguments.get("prefix") or ""
+
+    if arguments["format"] == "prometheus":
+        text = registry.render()
+        if prefix:
+            text = "".join(
+                line + "\n"
+                for line in text.splitlines()
+                if line.split(" ", 3)[2 if line.startswith("#") else 0].startswith(prefix)
+            )
+        return {"ok": True, "contract_version": CONTRACT_VERSION, "format": "prometheus", "text": text}
+
+    metrics = {name: data for name, data in registry.snapshot().items() if name.startswith(prefix)}
+    return {"ok": True, "contract_version": CONTRACT_VERSION, "format": "json", "metrics": metrics}
@@ -0,0 +1,212 @@
+"""Handler for the multi_call meta tool.
+
+Runs an ordered list of tool invocations in one round trip, so a quote
+turn (catalog_search -> price_check -> bom_calculate -> quotation_store)
+costs one LLM tool call instead of four.
+
+A step's arguments may reference an earlier step's result with
+``{"$ref": "<step_id>.<path>"}``; ``path`` walks dict keys and list
+indexes (``search.results.0.sku``). References define the dependency
+graph: each step waits only for the steps it references, so independent
+steps run concurrently. Steps are dispatched through the server's normal
+execution path (injected with ``configure_multi_call``), not re-implemented
+here.
+
+A step fails when its tool raises or returns ``ok: false`` (or a legacy
+``error`` payload); steps that reference a failed step are skipped with
+DEPENDENCY_FAILED. The multi_call envelope itself is ``ok`` whenever the
+step list was valid; per-step outcomes are in ``steps`` and ``summary``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from mcp.validation import validate_arguments
+from mcp_tools.contracts import (
+    CONTRACT_VERSION,
+    DEPENDENCY_FAILED,
+    INTERNAL_ERROR,
+    INVALID_REFERENCE,
+    INVALID_STEPS,
+    UNKNOWN_TOOL,
+)
+
+logger = logging.getLogger(__name__)
+
+REF_KEY = "$ref"
+
+Dispatch = Callable[[str, dict[str, Any]], Awaitable[dict[str, Any]]]
+
+# Tool dispatcher — injected via configure_multi_call()
+_dispatch: Dispatch | None = None
+_tool_names: frozenset[str] = frozenset()
+
+
+def configure_multi_call(dispatch: Dispatch, tool_names: Iterable[str]) -> None:
+    """Inject the server's tool dispatcher and the tools steps may call.
+
+    Called once during server startup from mcp/server.py, following the
+    same pattern as configure_wolf_kb_client() in wolf_kb_write.py.
+    """
+    global _dispatch, _tool_names  # noqa: PLW0603
+    _dispatch = dispatch
+    _tool_names = frozenset(tool_names) - {"multi_call"}
+
+
+def _error(code: str, message: str, details: dict[str, Any] | None = None) -> dict[str, Any]:
+    error: dict[str, Any] = {"code": code, "message": message}
+    if details:
+        error["details"] = details
+    return error
+
+
+def _error_response(error: dict[str, Any]) -> dict[str, Any]:
+    return {"ok": False, "contract_version": CONTRACT_VERSION, "error": error}
+
+
+def _collect_refs(value: Any, found: list[str]) -> list[str]:
+    """All reference strings inside an arguments value."""
+    if isinstance(value, dict):
+        if set(value) == {REF_KEY} and isinstance(value[REF_KEY], str):
+            found.append(value[REF_KEY])
+        else:
+            for item in value.values():
+                _collect_refs(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_refs(item, found)
+    return found
+
+
+def _lookup(result: Any, path: list[str]) -> Any:
+    """Walk ``path`` into a step result; raises LookupError when absent."""
+    value = result
+    for part in path:
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.lstrip("-").isdigit():
+            value = value[int(part)]
+        else:
+            raise LookupError(part)
+    return value
+
+
+def _resolve(value: Any, results: dict[str, Any]) -> Any:
+    """Copy of ``value`` with every reference replaced by its target."""
+    if isinstance(value, dict):
+        if set(value) == {REF_KEY} and isinstance(value[REF_KEY], str):
+            step_id, *path = value[REF_KEY].split(".")
+            return _lookup(results[step_id], path)
+        return {key: _resolve(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, results) for item in value]
+    return value
+
+
+def _step_failed(result: Any) -> bool:
+    if not isinstance(result, dict):
+        return False
+    if "ok" in result:
+        return result["ok"] is False
+    return "error" in result
+
+
+def _plan(steps: list[dict[str, Any]]) -> tuple[list[dict[str, Any]] | None, dict[str, Any] | None]:
+    """Check steps and attach ids and dependencies, or return a v1 error."""
+    planned = []
+    seen: set[str] = set()
+    for index, step in enumerate(steps):
+        step_id = step.get("id") or str(index)
+        tool = step["tool"]
+        arguments = step.get("arguments") or {}
+        if step_id in seen:
+            return None, _error(INVALID_STEPS, f"Duplicate step id '{step_id}'", {"step": index})
+        if tool not in _tool_names:
+            return None, _error(UNKNOWN_TOOL, f"Unknown tool: {tool}", {"step": index, "tool": tool})
+
+        depends_on = []
+        for ref in _collect_refs(arguments, []):
+            target = ref.split(".", 1)[0]
+            if target not in seen:
+                return None, _error(
+                    INVALID_REFERENCE,
+                    f"Step '{step_id}' references '{ref}', which is not an earlier step",
+                    {"step": index, "ref": ref},
+                )
+            if target not in depends_on:
+                depends_on.append(target)
+
+        seen.add(step_id)
+        planned.append({"id": step_id, "tool": tool, "arguments": arguments, "depends_on": depends_on})
+    return planned, None
+
+
+@validate_arguments(
+    "multi_call",
+    INVALID_STEPS,
+    legacy_error=lambda error: {"error": error["message"]},
+)
+async def handle_multi_call(arguments: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
+    """Run the listed tool invocations, concurrently where independent."""
+    if _dispatch is None:
+        return _error_response(_error(INTERNAL_ERROR, "multi_call is not configured"))
+
+    planned, error = _plan(arguments["steps"])
+    if error is not None:
+        return _error_response(error)
+
+    results: dict[str, Any] = {}
+    outcomes: dict[str, dict[str, Any]] = {}
+    tasks: dict[str, asyncio.Task[None]] = {}
+
+    async def run_step(step: dict[str, Any]) -> None:
+        step_id, tool = step["id"], step["tool"]
+        if step["depends_on"]:
+            await asyncio.gather(*(tasks[dep] for dep in step["depends_on"]))
+        failed = [dep for dep in step["depends_on"] if not outcomes[dep]["ok"]]
+        if failed:
+            outcomes[step_id] = {
+                "ok": False,
+                "skipped": True,
+                "error": _error(DEPENDENCY_FAILED, f"Skipped: step(s) {', '.join(failed)} failed", {"failed": failed}),
+            }
+            return
+        try:
+            step_arguments = _resolve(step["arguments"], results)
+        except (LookupError, TypeError, ValueError) as e:
+            outcomes[step_id] = {
+                "ok": False,
+                "error": _error(INVALID_REFERENCE, f"Unresolvable reference in step '{step_id}': {e}"),
+            }
+            return
+        try:
+            result = await _dispatch(tool, step_arguments)
+        except Exception as e:
+            logger.exception("multi_call step %s (%s) failed", step_id, tool)
+            outcomes[step_id] = {"ok": False, "error": _error(INTERNAL_ERROR, str(e))}
+            return
+        results[step_id] = result
+        outcomes[step_id] = {"ok": not _step_failed(result), "result": result}
+
+    for step in planned:
+        tasks[step["id"]] = asyncio.create_task(run_step(step))
+    await asyncio.gather(*tasks.values())
+
+    steps_out = [{"id": step["id"], "tool": step["tool"], **outcomes[step["id"]]} for step in planned]
+    skipped = sum(1 for s in steps_out if s.get("skipped"))
+    succeeded = sum(1 for s in steps_out if s["ok"])
+    return {
+        "ok": True,
+        "contract_version": CONTRACT_VERSION,
+        "steps": steps_out,
+        "summary": {
+            "total": len(steps_out),
+            "succeeded": succeeded,
+            "failed": len(steps_out) - succeeded - skipped,
+            "skipped": skipped,
+        },
+    }
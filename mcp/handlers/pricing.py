@@ -2,16 +2,31 @@
 
 Loads bromyros_pricing_master.json and provides lookup by SKU, family, type,
 or free-text search. All prices are in USD with IVA 22% included.
+
+Free-text search runs over a term index built with the shared analyzer
+(accent folding, plural stemming, synonyms, abbreviations), so query
+variants like "cámara"/"camara" or "paneles"/"panel" resolve without a scan.
+When a query finds nothing, fuzzy indexes over SKUs and terms propose
+corrections ("IROF50" -> "IROOF50"); the first one that matches is used and
+all of them are returned as ``suggestions``.
+
+Panels are also indexed by (family, core, thickness) so callers such as
+bom_calculate resolve a panel's SKU and price with ``resolve_panel`` (one
+dict lookup) instead of guessing SKU spellings through price_check.
 """
 
 from __future__ import annotations
 
-import json
 import logging
-import threading
+import re
 from pathlib import Path
 from typing import Any
 
+from mcp.kb import registry as kb_registry
+from mcp.search.analyzer import analyze, fold
+from mcp.search.fuzzy import FuzzyIndex
+from mcp.tracing import span
+from mcp.validation import validate_arguments
 from mcp_tools.contracts import CONTRACT_VERSION, PRICE_CHECK_ERROR_CODES
 
 logger = logging.getLogger(__name__)
@@ -19,13 +34,39 @@ logger = logging.getLogger(__name__)
 KB_ROOT = Path(__file__).resolve().parent.parent.parent
 PRICING_FILE = KB_ROOT / "bromyros_pricing_master.json"
 
-_pricing_data: dict[str, Any] | list[Any] | None = None
-_pricing_index: dict[str, Any] | None = None
-_pricing_index_lock = threading.Lock()
+# Maximum "did you mean" candidates returned on a miss
+MAX_SUGGESTIONS = 5
 
 
 def _normalize(text: str) -> str:
-    return text.lower().strip().replace("-", "").replace("_", "").replace(" ", "")
+    return fold(text).strip().replace("-", "").replace("_", "").replace(" ", "")
+
+
+def _panel_spec_keys(product: dict[str, Any]) -> tuple[list[tuple[str, str, int]], list[tuple[str, str, int]]]:
+    """(family, core, thickness) keys for a panel product, or empty lists for non-panels.
+
+    Returns ``(primary, secondary)``: primary keys use the spec thickness,
+    secondary keys use a thickness stated in the name when it disagrees
+    (some master rows carry a copied spec, e.g. "ISODEC 120mm PIR" at 80).
+    Each list holds the exact-core key and a core-agnostic key ("").
+    """
+    if "panel" not in str(product.get("tipo", product.get("type", ""))).lower():
+        return [], []
+    family = str(product.get("familia", product.get("family", ""))).strip().upper()
+    core = str(product.get("sub_familia", "")).strip().upper()
+    specs = product.get("specifications", {})
+    try:
+        thickness = int(float(specs.get("thickness_mm"))) if isinstance(specs, dict) else None
+    except (TypeError, ValueError):
+        thickness = None
+    named = re.search(r"(\d+)\s*mm", str(product.get("name", "")), re.IGNORECASE)
+    named_thickness = int(named.group(1)) if named else None
+
+    def keys(t: int | None) -> list[tuple[str, str, int]]:
+        return [] if t is None or not family else [(family, core, t), (family, "", t)]
+
+    secondary = keys(named_thickness) if named_thickness != thickness else []
+    return keys(thickness), secondary
 
 
 def _build_pricing_index(products: list[dict[str, Any]]) -> dict[str, Any]:
@@ -36,10 +77,18 @@ def _build_pricing_index(products: list[dict[str, Any]]) -> dict[str, Any]:
         - by_family: {normalized_family: [products]}
         - by_type: {normalized_type: [products]}
         - normalized_fields: {index: {sku, family, type, name}} - pre-normalized for search
+        - by_term: {analyzed_term: [indices]} - for free-text search
+        - fuzzy_skus / fuzzy_terms: FuzzyIndex over normalized SKUs and
+          non-numeric terms - for typo suggestions
+        - panels_by_spec: {(FAMILY, CORE or "", thickness_mm): match} - first
+          panel per key in file order, mapped to the v1 match shape
     """
     by_sku = {}
     by_family = {}
     by_type = {}
+    by_term: dict[str, list[int]] = {}
+    panels_by_spec: dict[tuple[str, str, int], dict[str, Any]] = {}
+    named_panels: list[tuple[tuple[str, str, int], dict[str, Any]]] = []
     normalized_fields = {}
     
     for idx, product in enumerate(products):
@@ -65,6 +114,16 @@ def _build_pricing_index(products: list[dict[str, Any]]) -> dict[str, Any]:
             "name": norm_name,
             "searchable": f"{norm_sku} {norm_family} {norm_type} {norm_name}"
         }
+
+        # Panels by (family, core, thickness); name-only thicknesses fill gaps later
+        primary, secondary = _panel_spec_keys(product)
+        for key in primary:
+            panels_by_spec.setdefault(key, _map_product_to_match(product))
+        named_panels.extend((key, product) for key in secondary)
+
+        # Index analyzed terms (once per product even if repeated across fields)
+        for term in dict.fromkeys(analyze(f"{sku} {family} {ptype} {name}")):
+            by_term.setdefault(term, []).append(idx)
         
         # Index by SKU (unique)
         if norm_sku:
@@ -82,30 +141,32 @@ def _build_pricing_index(products: list[dict[str, Any]]) -> dict[str, Any]:
                 by_type[norm_type] = []
             by_type[norm_type].append(product)
     
+    for key, product in named_panels:
+        if key not in panels_by_spec:
+            panels_by_spec[key] = _map_product_to_match(product)
+
     return {
         "by_sku": by_sku,
         "by_family": by_family,
         "by_type": by_type,
+        "by_term": by_term,
+        "fuzzy_skus": FuzzyIndex(by_sku),
+        "fuzzy_terms": FuzzyIndex(
+            term for term, indices in by_term.items()
+            for _ in range(len(indices)) if not term.isdigit()
+        ),
+        "panels_by_spec": panels_by_spec,
         "normalized_fields": normalized_fields,
         "products": products  # Keep reference to original list
     }
 
 
 def _load_pricing() -> dict[str, Any] | list[Any]:
-    global _pricing_data
-    if _pricing_data is None:
-        with open(PRICING_FILE, encoding="utf-8") as f:
-            _pricing_data = json.load(f)
-    return _pricing_data
+    return kb_registry.load(PRICING_FILE)
 
 
-def _search_products(data: dict[str, Any] | list[Any], query: str, filter_type: str = "search",
-                     thickness_mm: float | None = None) -> list[dict[str, Any]]:
-    """Search pricing data for matching products using index for fast lookups."""
-    global _pricing_index
-    
-    norm_query = _normalize(query)
-    
+def _extract_products(data: dict[str, Any] | list[Any]) -> list[dict[str, Any]]:
+    """Return the product list from the pricing file's structure."""
     # Navigate the pricing structure — adapt to actual JSON shape
     # Handle nested data structure: {"data": {"products": [...]}}
     if isinstance(data, dict) and "data" in data:
@@ -123,55 +184,89 @@ def _search_products(data: dict[str, Any] | list[Any], query: str, filter_type:
             elif isinstance(value, list):
                 items.extend(value)
         products = items
-    
-    # Build index on first call with thread safety
-    # Fast path: check if already initialized (no lock needed for read)
-    if _pricing_index is None:
-        # Slow path: need to build index with lock
-        with _pricing_index_lock:
-            # Double-check inside lock (another thread may have built it)
-            if _pricing_index is None:
-                _pricing_index = _build_pricing_index(products)
-    
+    return products
+
+
+def _get_pricing_index() -> dict[str, Any]:
+    """Return the pricing index, built once per pricing master version."""
+    return kb_registry.derived(
+        "pricing.index",
+        (PRICING_FILE,),
+        lambda: _build_pricing_index(_extract_products(_load_pricing())),
+    )
+
+
+def resolve_panel(family: str, core: str | None, thickness_mm: float) -> dict[str, Any] | None:
+    """Return the v1 price match for a panel by (family, core, thickness), or None.
+
+    Falls back to any core of that family and thickness when the exact core
+    is not listed (e.g. ISOROOF only ships PIR).
+    """
+    panels = _get_pricing_index()["panels_by_spec"]
+    family_key = family.strip().upper()
+    thickness_key = int(float(thickness_mm))
+    return (
+        panels.get((family_key, (core or "").strip().upper(), thickness_key))
+        or panels.get((family_key, "", thickness_key))
+    )
+
+
+def _search_products(query: str, filter_type: str = "search",
+                     thickness_mm: float | None = None) -> list[dict[str, Any]]:
+    """Search pricing data for matching products using index for fast lookups."""
+    norm_query = _normalize(query)
+    pricing_index = _get_pricing_index()
+
     results: list[dict[str, Any]] = []
     
     # Use index for faster lookups
     if filter_type == "sku":
         # Direct SKU lookup - O(1)
-        product = _pricing_index["by_sku"].get(norm_query)
+        product = pricing_index["by_sku"].get(norm_query)
         if product:
             results.append(product)
         else:
             # Fallback to partial match - O(n) but only when exact match fails
             # This is acceptable for SKU queries which are typically exact matches
-            for sku_key, product in _pricing_index["by_sku"].items():
+            for sku_key, product in pricing_index["by_sku"].items():
                 if norm_query in sku_key:
                     results.append(product)
     elif filter_type == "family":
         # Family lookup with index - O(1)
-        family_products = _pricing_index["by_family"].get(norm_query, [])
+        family_products = pricing_index["by_family"].get(norm_query, [])
         results.extend(family_products)
         # Partial match fallback - O(families) only when exact match fails
         # Trade-off: simplicity vs perfect O(1) for all cases
         if not results:
-            for family_key, products_list in _pricing_index["by_family"].items():
+            for family_key, products_list in pricing_index["by_family"].items():
                 if norm_query in family_key:
                     results.extend(products_list)
     elif filter_type == "type":
         # Type lookup with index - O(1)
-        type_products = _pricing_index["by_type"].get(norm_query, [])
+        type_products = pricing_index["by_type"].get(norm_query, [])
         results.extend(type_products)
         # Partial match fallback - O(types) only when exact match fails
         # Trade-off: simplicity vs perfect O(1) for all cases
         if not results:
-            for type_key, products_list in _pricing_index["by_type"].items():
+            for type_key, products_list in pricing_index["by_type"].items():
                 if norm_query in type_key:
                     results.extend(products_list)
     else:  # filter_type == "search"
-        # General search using pre-normalized searchable strings - O(n) but unavoidable
-        for idx, fields in _pricing_index["normalized_fields"].items():
-            if norm_query in fields["searchable"]:
-                results.append(_pricing_index["products"][idx])
+        # Every query term must match: intersect the term posting lists
+        by_term = pricing_index["by_term"]
+        matched: set[int] | None = None
+        for term in dict.fromkeys(analyze(query)):
+            postings = set(by_term.get(term, ()))
+            matched = postings if matched is None else matched & postings
+            if not matched:
+                break
+        if matched:
+            results.extend(pricing_index["products"][idx] for idx in sorted(matched))
+        else:
+            # Substring fallback for partial words/SKU fragments ("iroof", "isd1")
+            for idx, fields in pricing_index["normalized_fields"].items():
+                if norm_query in fields["searchable"]:
+                    results.append(pricing_index["products"][idx])
     
     # Filter by thickness if specified
     if thickness_mm is not None and results:
@@ -198,6 +293,28 @@ def _search_products(data: dict[str, Any] | list[Any], query: str, filter_type:
     return results
 
 
+def _suggest_queries(query: str, filter_type: str) -> list[str]:
+    """Return "did you mean" queries for a query that matched nothing."""
+    pricing_index = _get_pricing_index()
+    suggestions: list[str] = []
+    if filter_type in ("sku", "search"):
+        for norm_sku, _ in pricing_index["fuzzy_skus"].lookup(_normalize(query), MAX_SUGGESTIONS):
+            product = pricing_index["by_sku"][norm_sku]
+            suggestions.append(str(product.get("sku", product.get("SKU", product.get("codigo", norm_sku)))))
+
+    if filter_type != "sku":
+        terms = analyze(query)
+        fuzzy_terms = pricing_index["fuzzy_terms"]
+        corrected = [
+            term if term.isdigit() or term in fuzzy_terms else (fuzzy_terms.correct(term) or term)
+            for term in terms
+        ]
+        if corrected != terms:
+            suggestions.append(" ".join(corrected))
+
+    return list(dict.fromkeys(suggestions))[:MAX_SUGGESTIONS]
+
+
 def _map_product_to_match(product: dict[str, Any]) -> dict[str, Any]:
     """Map product data to v1 contract match format."""
     # Extract SKU
@@ -242,6 +359,13 @@ def _map_product_to_match(product: dict[str, Any]) -> dict[str, Any]:
     return match_obj
 
 
+@validate_arguments(
+    "price_check",
+    PRICE_CHECK_ERROR_CODES["INVALID_FILTER"],
+    codes={"thickness_mm": PRICE_CHECK_ERROR_CODES["INVALID_THICKNESS"]},
+    strip=("query",),
+    legacy_error=lambda error: {"error": error["message"], "results": []},
+)
 async def handle_price_check(arguments: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
     """Execute price_check tool and return results in v1 contract format.
     
@@ -252,81 +376,26 @@ async def handle_price_check(arguments: dict[str, Any], legacy_format: bool = Fa
     Returns:
         v1 contract envelope: {ok, contract_version, matches} or {ok, contract_version, error}
     """
-    query = arguments.get("query", "")
-    filter_type = arguments.get("filter_type", "search")
+    # query (stripped), filter_type and thickness_mm were checked against the
+    # price_check schema by @validate_arguments
+    query = arguments["query"]
+    filter_type = arguments["filter_type"]
     thickness_mm = arguments.get("thickness_mm")
 
-    # Strip whitespace from query before validation
-    query = query.strip()
-
-    # Validate query parameter (minLength: 2 per contract)
-    if not query or len(query) < 2:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": PRICE_CHECK_ERROR_CODES["INVALID_FILTER"],
-                "message": "Query parameter is required and must be at least 2 characters long",
-            }
-        }
-        if legacy_format:
-            return {"error": "Query parameter is required and must be at least 2 characters long", "results": []}
-        logger.debug("Wrapped price_check error response in v1 envelope")
-        return error_response
-    
-    # Validate filter_type (must be one of allowed values per contract)
-    allowed_filter_types = ["sku", "family", "type", "search"]
-    if filter_type not in allowed_filter_types:
-        error_response = {
-            "ok": False,
-            "contract_version": CONTRACT_VERSION,
-            "error": {
-                "code": PRICE_CHECK_ERROR_CODES["INVALID_FILTER"],
-                "message": f"filter_type must be one of {allowed_filter_types}",
-                "details": {"received": filter_type}
-            }
-        }
-        if legacy_format:
-            return {"error": f"filter_type must be one of {allowed_filter_types}", "results": []}
-        logger.debug("Wrapped price_check error response in v1 envelope")
-        return error_response
-    
-    # Validate thickness_mm (must be in range [20, 250] per contract)
-    if thickness_mm is not None:
-        try:
-            thickness_val = float(thickness_mm)
-            if thickness_val < 20 or thickness_val > 250:
-                error_response = {
-                    "ok": False,
-                    "contract_version": CONTRACT_VERSION,
-                    "error": {
-                        "code": PRICE_CHECK_ERROR_CODES["INVALID_THICKNESS"],
-                        "message": "thickness_mm must be between 20 and 250",
-                        "details": {"received": thickness_mm}
-                    }
-                }
-                if legacy_format:
-                    return {"error": "thickness_mm must be between 20 and 250", "results": []}
-                logger.debug("Wrapped price_check error response in v1 envelope")
-                return error_response
-        except (ValueError, TypeError):
-            error_response = {
-                "ok": False,
-                "contract_version": CONTRACT_VERSION,
-                "error": {
-                    "code": PRICE_CHECK_ERROR_CODES["INVALID_THICKNESS"],
-                    "message": "thickness_mm must be a valid number",
-                    "details": {"received": thickness_mm}
-                }
-            }
-            if legacy_format:
-                return {"error": "thickness_mm must be a valid number", "results": []}
-            logger.debug("Wrapped price_check error response in v1 envelope")
-            return error_response
-
     try:
-        data = _load_pricing()
-        results = _search_products(data, query, filter_type, thickness_mm)
+        with span("pricing.search", filter_type=filter_type):
+            results = _search_products(query, filter_type, thickness_mm)
+
+        # On a miss, retry with the first suggestion that matches
+        suggestions: list[str] = []
+        if not results:
+            with span("pricing.suggest"):
+                suggestions = _suggest_queries(query, filter_type)
+            for i, suggestion in enumerate(suggestions):
+                results = _search_products(suggestion, filter_type, thickness_mm)
+                if results:
+                    suggestions.insert(0, suggestions.pop(i))
+                    break
 
         if not results:
             error_response = {
@@ -337,6 +406,8 @@ async def handle_price_check(arguments: dict[str, Any], legacy_format: bool = Fa
                     "message": f"No products found for query '{query}' (filter: {filter_type})",
                 }
             }
+            if suggestions:
+                error_response["error"]["details"] = {"suggestions": suggestions}
             if legacy_format:
                 return {
                     "message": f"No products found for query '{query}' (filter: {filter_type})",
@@ -347,13 +418,16 @@ async def handle_price_check(arguments: dict[str, Any], legacy_format: bool = Fa
             return error_response
 
         # Map results to v1 contract format
-        matches = [_map_product_to_match(product) for product in results[:20]]
+        with span("pricing.map", results=len(results)):
+            matches = [_map_product_to_match(product) for product in results[:20]]
         
         success_response = {
             "ok": True,
             "contract_version": CONTRACT_VERSION,
             "matches": matches,
         }
+        if suggestions:
+            success_response["suggestions"] = suggestions
         
         if legacy_format:
             return {
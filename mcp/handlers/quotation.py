@@ -13,6 +13,7 @@ import logging
 from typing import Any
 
 from mcp.storage.memory_store import MemoryStore
+from mcp.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -64,20 +65,23 @@ async def handle_quotation_store(arguments: dict[str, Any]) -> dict[str, Any]:
     
     # Validate quotation size to prevent resource exhaustion
     try:
-        serialized = json.dumps(quotation, ensure_ascii=False)
+        with span("quotation.size_check"):
+            serialized = json.dumps(quotation, ensure_ascii=False)
         if len(serialized.encode("utf-8")) > MAX_PAYLOAD_SIZE_BYTES:
             return {"error": f"quotation payload exceeds maximum size of {MAX_PAYLOAD_SIZE_BYTES} bytes"}
     except (TypeError, ValueError) as e:
         return {"error": f"quotation payload is not JSON-serializable: {e}"}
 
-    normalized_embedding = [float(x) for x in embedding]
+    with span("quotation.normalize_embedding", dims=len(embedding)):
+        normalized_embedding = [float(x) for x in embedding]
     
     # Get backend type for analytics
     backend_type = _backend_metadata.get("active_backend", "unknown")
     
     # Store quotation with error handling and analytics
     try:
-        store_result = await _memory_store.save_quotation(quotation, normalized_embedding)
+        with span("quotation.save", backend=backend_type):
+            store_result = await _memory_store.save_quotation(quotation, normalized_embedding)
         
         # Log successful storage with analytics
         analytics_payload = {
@@ -106,7 +110,8 @@ async def handle_quotation_store(arguments: dict[str, Any]) -> dict[str, Any]:
         try:
             # Clamp limit to valid range (schema defines 1-10)
             clamped_limit = max(1, min(limit, 10))
-            similar = await _memory_store.retrieve_similar(normalized_embedding, clamped_limit)
+            with span("quotation.retrieve_similar", backend=backend_type, limit=clamped_limit):
+                similar = await _memory_store.retrieve_similar(normalized_embedding, clamped_limit)
             
             # Log successful retrieval with analytics
             retrieval_payload = {
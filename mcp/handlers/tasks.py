@@ -7,7 +7,10 @@ clients invoke the background-task tools:
 - ``handle_bulk_price_check``: Submit bulk pricing background task
 - ``handle_full_quotation``: Submit full quotation background task
 - ``handle_task_status``: Query task progress/state
-- ``handle_task_result``: Retrieve completed task result
+- ``handle_task_result``: Retrieve completed task result, or the partial
+  results logged so far when called with ``offset``
+- ``handle_task_watch``: Wait for new partial results, sending progress
+  notifications meanwhile
 - ``handle_task_list``: List recent tasks with optional filters
 - ``handle_task_cancel``: Cancel a pending/running task
 """
@@ -16,8 +19,16 @@ from __future__ import annotations
 
 from typing import Any
 
+from ..progress import report_progress
 from ..tasks.manager import get_task_manager
-from ..tasks.models import TaskStatus, TaskType
+from ..tasks.models import Task, TaskStatus, TaskType
+
+# Partial results returned per task_result/task_watch page
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Longest a task_watch call waits for new results
+MAX_WATCH_SECONDS = 60.0
 
 
 async def handle_batch_bom_calculate(arguments: dict[str, Any]) -> dict[str, Any]:
@@ -104,7 +115,7 @@ async def handle_task_status(arguments: dict[str, Any]) -> dict[str, Any]:
         return {"error": "task_id is required"}
 
     manager = get_task_manager()
-    task = manager.get_task(task_id)
+    task = await manager.get_task(task_id)
 
     if task is None:
         return {
@@ -115,14 +126,56 @@ async def handle_task_status(arguments: dict[str, Any]) -> dict[str, Any]:
     return task.to_summary()
 
 
+def _page_arguments(arguments: dict[str, Any]) -> tuple[int, int] | dict[str, Any]:
+    """(offset, limit) from the arguments, or an error dict."""
+    try:
+        offset = int(arguments.get("offset") or 0)
+        limit = int(arguments.get("limit", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return {"error": "offset and limit must be valid integers"}
+    if offset < 0:
+        return {"error": "offset must be >= 0"}
+    return offset, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _results_page(task: Task, offset: int, items: list[dict[str, Any]]) -> dict[str, Any]:
+    """Partial results logged since ``offset``; ``next_offset`` continues the stream."""
+    next_offset = offset + len(items)
+    finished = task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+    page: dict[str, Any] = {
+        "task_id": task.task_id,
+        "status": task.status.value,
+        "progress": task.progress.to_dict(),
+        "offset": offset,
+        "next_offset": next_offset,
+        "items": items,
+        "complete": finished and next_offset >= task.results_count,
+    }
+    if task.error:
+        page["error_detail"] = task.error
+    return page
+
+
 async def handle_task_result(arguments: dict[str, Any]) -> dict[str, Any]:
-    """Retrieve the full result of a completed background task."""
+    """Retrieve the full result of a completed background task.
+
+    With ``offset``, return the per-item results logged so far instead,
+    for pending, running and finished tasks alike.
+    """
     task_id = arguments.get("task_id", "")
     if not task_id:
         return {"error": "task_id is required"}
 
     manager = get_task_manager()
-    task = manager.get_task(task_id)
+    page = None
+    if arguments.get("offset") is not None:
+        page = _page_arguments(arguments)
+        if isinstance(page, dict):
+            return page
+        # Only the requested slice of the log is read
+        task = await manager.get_summary(task_id)
+    else:
+        task = await manager.get_task(task_id)
 
     if task is None:
         return {
@@ -130,11 +183,16 @@ async def handle_task_result(arguments: dict[str, Any]) -> dict[str, Any]:
             "hint": "Use task_list to see available tasks",
         }
 
+    if page is not None:
+        offset, limit = page
+        return _results_page(task, offset, await manager.results_since(task, offset, limit))
+
     if task.status == TaskStatus.RUNNING:
         return {
             "error": f"Task '{task_id}' is still running",
             "progress": task.progress.to_dict(),
-            "hint": "Use task_status to poll until completed",
+            "hint": "Use task_status to poll until completed, or task_result with offset=0 "
+                    "(or task_watch) for the results available so far",
         }
 
     if task.status == TaskStatus.PENDING:
@@ -159,6 +217,41 @@ async def handle_task_result(arguments: dict[str, Any]) -> dict[str, Any]:
     return task.to_full_dict()
 
 
+async def handle_task_watch(arguments: dict[str, Any]) -> dict[str, Any]:
+    """Wait for partial results past ``offset``, the task's end, or ``timeout_s``.
+
+    While waiting, progress changes are sent as MCP progress notifications
+    when the request carries a progress token. Returns the same page as
+    ``task_result`` with ``offset``.
+    """
+    task_id = arguments.get("task_id", "")
+    if not task_id:
+        return {"error": "task_id is required"}
+
+    page = _page_arguments(arguments)
+    if isinstance(page, dict):
+        return page
+    offset, limit = page
+    try:
+        timeout = max(0.0, min(float(arguments.get("timeout_s", 25)), MAX_WATCH_SECONDS))
+    except (TypeError, ValueError):
+        return {"error": "timeout_s must be a number"}
+
+    async def on_progress(task: Task) -> None:
+        progress = task.progress
+        message = progress.current_item or task.status.value
+        await report_progress(progress.completed_items, progress.total_items or None, message)
+
+    found = await get_task_manager().wait_for_results(task_id, offset, limit, timeout, on_progress)
+    if found is None:
+        return {
+            "error": f"Task '{task_id}' not found",
+            "hint": "Use task_list to see available tasks",
+        }
+    task, items = found
+    return _results_page(task, offset, items)
+
+
 async def handle_task_list(arguments: dict[str, Any]) -> dict[str, Any]:
     """List recent background tasks."""
     manager = get_task_manager()
@@ -197,7 +290,7 @@ async def handle_task_list(arguments: dict[str, Any]) -> dict[str, Any]:
         except ValueError:
             return {"error": f"Invalid task_type: '{type_str}'. Valid: batch_bom_calculate, bulk_price_check, full_quotation"}
 
-    tasks = manager.list_tasks(status=status_filter, task_type=type_filter, limit=limit)
+    tasks = await manager.list_tasks(status=status_filter, task_type=type_filter, limit=limit)
 
     return {
         "total": len(tasks),
@@ -212,7 +305,7 @@ async def handle_task_cancel(arguments: dict[str, Any]) -> dict[str, Any]:
         return {"error": "task_id is required"}
 
     manager = get_task_manager()
-    task = manager.get_task(task_id)
+    task = await manager.get_task(task_id)
 
     if task is None:
         return {"error": f"Task '{task_id}' not found"}
@@ -0,0 +1 @@
+"""Process-wide knowledge-base file registry."""
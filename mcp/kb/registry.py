@@ -0,0 +1,218 @@
+"""Process-wide registry for knowledge-base JSON files.
+
+Every KB file is parsed once per process and shared by the MCP handlers,
+governance and quotation_calculator_v3. Each loaded file carries a version
+stamp (content hash plus mtime/size). Indexes built from one or more files
+are cached here through ``derived`` against those files, so ``reload`` or
+``refresh`` of a file drops its parsed data and every index built from it
+together, then notifies ``subscribe``-rs that keep their own module caches.
+
+Loaded data is shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+from ..tracing import span
+
+logger = logging.getLogger(__name__)
+
+KB_ROOT = Path(__file__).resolve().parent.parent.parent
+
+PRICING_MASTER = "bromyros_pricing_master.json"
+ACCESSORIES_CATALOG = "accessories_catalog.json"
+BOM_RULES = "bom_rules.json"
+SHOPIFY_CATALOG = "shopify_catalog_v1.json"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class KBEntry:
+    """One parsed KB file and the stamp it was parsed from."""
+
+    path: Path
+    data: Any
+    version: str  # first 12 hex chars of the file's sha256
+    mtime_ns: int
+    size: int
+
+
+_entries: dict[Path, KBEntry] = {}
+_derived: dict[str, tuple[frozenset[Path], Any]] = {}
+_subscribers: list[tuple[frozenset[Path], Callable[[], None]]] = []
+_generation = 0
+# Guards the dicts above; parsing and index builds happen under per-key
+# locks instead, so different files and indexes can warm up in parallel
+_lock = threading.RLock()
+_key_locks: dict[Any, threading.RLock] = {}
+
+
+def _lock_for(key: Any) -> threading.RLock:
+    lock = _key_locks.get(key)
+    if lock is None:
+        with _lock:
+            lock = _key_locks.setdefault(key, threading.RLock())
+    return lock
+
+
+def resolve_path(name: str | Path) -> Path:
+    """Absolute path for a KB file name (relative to KB_ROOT) or path."""
+    path = Path(name)
+    if not path.is_absolute():
+        path = KB_ROOT / path
+    return path.resolve()
+
+
+def _read(path: Path) -> KBEntry:
+    stat = path.stat()
+    raw = path.read_bytes()
+    return KBEntry(
+        path=path,
+        data=json.loads(raw),
+        version=hashlib.sha256(raw).hexdigest()[:12],
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+    )
+
+
+def entry(name: str | Path) -> KBEntry:
+    """Return the parsed entry for a KB file, parsing it on first use."""
+    path = resolve_path(name)
+    # Fast path: already parsed (no lock needed for read)
+    cached = _entries.get(path)
+    if cached is not None:
+        return cached
+    with _lock_for(path):
+        cached = _entries.get(path)
+        if cached is None:
+            started_generation = _generation
+            with span("kb.parse", file=path.name):
+                cached = _read(path)
+            with _lock:
+                # A reload while parsing may have made this copy stale; serve it once
+                if _generation == started_generation:
+                    _entries[path] = cached
+            logger.debug("Loaded KB file %s (version %s)", path.name, cached.version)
+    return cached
+
+
+def load(name: str | Path) -> Any:
+    """Parsed contents of a KB file (shared, read-only)."""
+    return entry(name).data
+
+
+def version(name: str | Path) -> str:
+    """Content version stamp of a KB file."""
+    return entry(name).version
+
+
+def versions() -> dict[str, str]:
+    """Version stamps of every loaded KB file, keyed by file name."""
+    return {path.name: loaded.version for path, loaded in _entries.items()}
+
+
+def generation() -> int:
+    """Counter bumped on every reload; changes whenever cached KB data may have."""
+    return _generation
+
+
+def derived(key: str, sources: Iterable[str | Path], builder: Callable[[], T]) -> T:
+    """Return a cached value built from ``sources``, building it once.
+
+    The value is dropped whenever any of ``sources`` is reloaded.
+    """
+    cached = _derived.get(key)
+    if cached is not None:
+        return cached[1]
+    with _lock_for(("derived", key)):
+        cached = _derived.get(key)
+        if cached is None:
+            started_generation = _generation
+            with span("kb.build", key=key):
+                cached = (frozenset(resolve_path(source) for source in sources), builder())
+            with _lock:
+                if _generation == started_generation:
+                    _derived[key] = cached
+    return cached[1]
+
+
+def subscribe(sources: Iterable[str | Path], callback: Callable[[], None]) -> None:
+    """Call ``callback`` after any of ``sources`` is reloaded."""
+    with _lock:
+        _subscribers.append((frozenset(resolve_path(source) for source in sources), callback))
+
+
+def reload(names: Iterable[str | Path] | None = None) -> list[str]:
+    """Drop parsed data, derived values and subscriber caches for ``names``.
+
+    ``None`` reloads everything. Files are re-parsed lazily on next use.
+    Returns the names of the invalidated files.
+    """
+    global _generation
+    with _lock:
+        if names is None:
+            paths = set(_entries) | {p for sources, _ in _derived.values() for p in sources}
+            paths |= {p for sources, _ in _subscribers for p in sources}
+        else:
+            paths = {resolve_path(name) for name in names}
+        for path in paths:
+            _entries.pop(path, None)
+        for key in [k for k, (sources, _) in _derived.items() if sources & paths]:
+            del _derived[key]
+        callbacks = [callback for sources, callback in _subscribers if sources & paths]
+        _generation += 1
+
+    # Outside the lock: subscribers may take their own locks and reload data
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("KB reload subscriber failed")
+    logger.info("Reloaded KB files: %s", ", ".join(sorted(p.name for p in paths)) or "none")
+    return sorted(path.name for path in paths)
+
+
+def refresh() -> list[str]:
+    """Reload loaded files whose mtime or size changed on disk."""
+    stale = []
+    for path, loaded in list(_entries.items()):
+        try:
+            stat = path.stat()
+        except OSError:
+            stale.append(path)
+            continue
+        if (stat.st_mtime_ns, stat.st_size) != (loaded.mtime_ns, loaded.size):
+            stale.append(path)
+    return reload(stale) if stale else []
+
+
+# --- Typed accessors -------------------------------------------------------
+
+
+def pricing_master() -> dict[str, Any]:
+    """bromyros_pricing_master.json"""
+    return load(PRICING_MASTER)
+
+
+def accessories_catalog() -> dict[str, Any]:
+    """accessories_catalog.json"""
+    return load(ACCESSORIES_CATALOG)
+
+
+def bom_rules() -> dict[str, Any]:
+    """bom_rules.json"""
+    return load(BOM_RULES)
+
+
+def shopify_catalog() -> dict[str, Any] | list[Any]:
+    """shopify_catalog_v1.json"""
+    return load(SHOPIFY_CATALOG)
@@ -0,0 +1,257 @@
+"""Asynchronous, batched NDJSON writer for tool invocation logs.
+
+Tool calls never touch the disk: ``emit`` only appends a flat tuple to an
+in-memory queue. A background thread stamps, encodes and writes records
+in batches, flushing when a batch fills up or ``flush_interval`` elapses
+after its first record, whichever comes first.
+
+Backpressure: when the queue holds ``max_queue`` records, new ones are
+dropped and counted instead of blocking the caller. The writer reports
+drops in the log itself (a ``log_records_dropped`` event) and through the
+``mcp_log_records_dropped_total`` metric.
+
+Rotation: the active file is renamed to ``<stem>.<YYYY-MM-DD>.<n><suffix>``
+when the UTC day of the next record differs from the file's day or when
+the file would exceed ``max_bytes``. Only the newest ``retention`` rotated
+files are kept.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TextIO
+
+from .encoding import encode_json
+from .metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_WRITTEN, LOG_ROTATIONS
+
+logger = logging.getLogger(__name__)
+
+# Field order of an emitted record (after the timestamp)
+FIELDS = (
+    "level",
+    "event",
+    "message",
+    "tool_name",
+    "request_id",
+    "session_id",
+    "latency_ms",
+    "cache_status",
+    "token_input",
+    "token_output",
+    "error_code",
+)
+
+_STOP = object()
+
+
+class _FlushMarker:
+    __slots__ = ("done",)
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+class BatchedLogWriter:
+    """Queue-fed NDJSON writer with batching, daily/size rotation and drop counting."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        max_bytes: int = 50 * 1024 * 1024,
+        retention: int = 30,
+    ) -> None:
+        self.path = Path(path)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+        self._queue: queue.SimpleQueue[Any] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._file: TextIO | None = None
+        self._file_day: str | None = None
+        self._file_size = 0
+
+    # --- producer side (any thread, never blocks) -------------------------
+
+    def emit(self, *record: Any, extra: dict[str, Any] | None = None) -> bool:
+        """Queue one record (values in FIELDS order, plus ``extra`` keys); False when dropped."""
+        if self._thread is None:
+            self._start()
+        if self._queue.qsize() >= self.max_queue:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+            return False
+        self._queue.put((time.time(), record, extra))
+        return True
+
+    def flush(self, timeout: float | None = 5.0) -> bool:
+        """Wait until everything queued before this call is on disk."""
+        if self._thread is None:
+            return True
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Write what is queued, close the file and stop the thread."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="mcp-log-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # --- writer thread ----------------------------------------------------
+
+    def _run(self) -> None:
+        batch: list[tuple[float, tuple[Any, ...], dict[str, Any] | None]] = []
+        markers: list[_FlushMarker] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if isinstance(item, _FlushMarker):
+                markers.append(item)
+            elif item is not None and not stop:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if stop or markers or len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch = []
+                for marker in markers:
+                    marker.done.set()
+                markers = []
+            if stop:
+                self._close_file()
+                return
+
+    def _format(self, ts: float, record: tuple[Any, ...], extra: dict[str, Any] | None) -> tuple[str, str]:
+        stamp = datetime.fromtimestamp(ts, timezone.utc)
+        payload = {"ts": stamp.isoformat()}
+        payload.update(zip(FIELDS, record))
+        if extra:
+            payload.update(extra)
+        return stamp.date().isoformat(), encode_json(payload) + "\n"
+
+    def _write_batch(self, batch: list[tuple[float, tuple[Any, ...], dict[str, Any] | None]]) -> None:
+        lines: list[tuple[str, str]] = [self._format(*item) for item in batch]
+        dropped = self.dropped - self._reported_dropped
+        if dropped:
+            self._reported_dropped += dropped
+            ts = time.time()
+            day = datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+            lines.append((day, encode_json({
+                "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                "level": "WARNING",
+                "event": "log_records_dropped",
+                "message": f"{dropped} log record(s) dropped: writer queue full",
+                "dropped": dropped,
+            }) + "\n"))
+        if not lines:
+            return
+
+        try:
+            # Consecutive lines for the same day go out in one write
+            chunk: list[str] = []
+            chunk_day = lines[0][0]
+            chunk_size = 0
+            for day, line in lines:
+                size = len(line.encode("utf-8"))
+                if chunk and (day != chunk_day or self._file_size + chunk_size + size > self.max_bytes):
+                    self._write(chunk_day, "".join(chunk), chunk_size)
+                    chunk, chunk_size = [], 0
+                chunk_day = day
+                chunk.append(line)
+                chunk_size += size
+            self._write(chunk_day, "".join(chunk), chunk_size)
+            self._file.flush()
+        except OSError:
+            logger.exception("Failed to write %d tool invocation log record(s)", len(lines))
+            self._close_file()
+            return
+        self.written += len(batch)
+        LOG_RECORDS_WRITTEN.inc(len(batch))
+
+    def _write(self, day: str, text: str, size: int) -> None:
+        if self._file is None:
+            self._open(day)
+        if day != self._file_day or (self._file_size and self._file_size + size > self.max_bytes):
+            self._rotate()
+            self._open(day)
+        self._file.write(text)
+        self._file_size += size
+
+    def _open(self, day: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._file_size = self._file.tell()
+        if self._file_size:
+            mtime = datetime.fromtimestamp(self.path.stat().st_mtime, timezone.utc)
+            self._file_day = mtime.date().isoformat()
+        else:
+            self._file_day = day
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def rotated_files(self) -> list[Path]:
+        """Rotated files, oldest first."""
+        pattern = f"{self.path.stem}.*{self.path.suffix}"
+        return sorted(
+            (p for p in self.path.parent.glob(pattern) if p != self.path),
+            key=lambda p: p.stat().st_mtime,
+        )
+
+    def _rotate(self) -> None:
+        self._close_file()
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        day = self._file_day or datetime.now(timezone.utc).date().isoformat()
+        index = 0
+        while True:
+            target = self.path.with_name(f"{self.path.stem}.{day}.{index}{self.path.suffix}")
+            if not target.exists():
+                break
+            index += 1
+        self.path.rename(target)
+        LOG_ROTATIONS.inc()
+        if self.retention > 0:
+            for stale in self.rotated_files()[: -self.retention]:
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
@@ -0,0 +1,302 @@
+"""In-process metrics registry: counters, gauges and fixed-bucket histograms.
+
+Metrics are fed by the observability hooks (``log_tool_invocation_*``),
+the execution layer and the TaskManager, and exposed in Prometheus text
+format at ``/metrics`` on the SSE transport and as JSON through the
+``server_metrics`` tool.
+
+The hot path is kept allocation-light: label children are created once
+and cached per label tuple, counters and gauges update a float slot, and a
+histogram observation is one ``bisect`` plus two slot updates. Updates
+happen on the event loop thread (or under the GIL from worker threads)
+and take no locks; a scrape may see a histogram mid-update, which is the
+usual trade-off for lock-free counters.
+
+Each metric family caps its label combinations (``MAX_CHILDREN``); extra
+combinations, such as arbitrary tool names from unknown-tool calls, are
+folded into an ``other`` child so cardinality stays bounded.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+MAX_CHILDREN = 256
+OVERFLOW_LABEL = "other"
+
+# Milliseconds; covers memo hits (<1 ms) up to slow Wolf API calls
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+TASK_DURATION_BUCKETS_MS = (10, 50, 100, 500, 1000, 5000, 10000, 30000, 60000, 300000)
+
+# (name, kind, help, labels, value) samples produced at scrape time
+Sample = tuple[str, str, str, dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+
+class Counter:
+    """Monotonic counter child."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Gauge child that can go up and down."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """Fixed-bucket histogram child (non-cumulative counts; the last bucket is +Inf)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the q-quantile by linear interpolation inside its bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(self.bounds):
+                    return float(self.bounds[-1])
+                low = self.bounds[index - 1] if index else 0.0
+                high = self.bounds[index]
+                return round(low + (high - low) * (rank - seen) / bucket_count, 3)
+            seen += bucket_count
+        return float(self.bounds[-1])
+
+
+class MetricFamily:
+    """A named metric with fixed label names and one child per label tuple."""
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] | None = None,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets is not None else None
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def _new_child(self) -> Any:
+        if self.kind == "counter":
+            return Counter()
+        if self.kind == "gauge":
+            return Gauge()
+        return Histogram(self.buckets or LATENCY_BUCKETS_MS)
+
+    def labels(self, *values: str) -> Any:
+        """Child for a label tuple, created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(self._children) >= MAX_CHILDREN:
+                values = (OVERFLOW_LABEL,) * len(self.labelnames)
+                child = self._children.get(values)
+            if child is None:
+                child = self._children[values] = self._new_child()
+        return child
+
+    def children(self) -> list[tuple[dict[str, str], Any]]:
+        return [(dict(zip(self.labelnames, values)), child) for values, child in list(self._children.items())]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str], extra: tuple[str, str] | None = None) -> str:
+    items = list(labels.items())
+    if extra is not None:
+        items.append(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """Holds metric families and scrape-time collectors."""
+
+    def __init__(self) -> None:
+        self._families: dict[str, MetricFamily] = {}
+        self._collectors: list[Collector] = []
+
+    def _family(self, name: str, kind: str, help_text: str, labelnames: Sequence[str], buckets=None) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(name, kind, help_text, labelnames, buckets)
+        elif family.kind != kind:
+            raise ValueError(f"Metric {name} already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, "counter", help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._family(name, "gauge", help_text, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS_MS,
+    ) -> MetricFamily:
+        return self._family(name, "histogram", help_text, labelnames, buckets)
+
+    def register_collector(self, collector: Collector) -> None:
+        """Add a callback that yields samples computed at scrape time."""
+        self._collectors.append(collector)
+
+    def _collected(self) -> list[Sample]:
+        samples: list[Sample] = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception:  # noqa: BLE001 - one broken collector must not break the scrape
+                continue
+        return samples
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for family in self._families.values():
+            children = family.children()
+            if not children:
+                continue
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, child in children:
+                if family.kind != "histogram":
+                    lines.append(f"{family.name}{_format_labels(labels)} {_format_value(child.value)}")
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip((*child.bounds, math.inf), child.counts):
+                    cumulative += bucket_count
+                    le = _format_value(float(bound))
+                    lines.append(f"{family.name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(child.sum)}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {child.count}")
+
+        described: set[str] = set()
+        for name, kind, help_text, labels, value in self._collected():
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(float(value))}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-ready view; histograms report count, sum and p50/p95/p99 estimates."""
+        result: dict[str, Any] = {}
+        for family in self._families.values():
+            entries = []
+            for labels, child in family.children():
+                if family.kind == "histogram":
+                    entries.append({
+                        "labels": labels,
+                        "count": child.count,
+                        "sum": round(child.sum, 3),
+                        "p50": child.quantile(0.5),
+                        "p95": child.quantile(0.95),
+                        "p99": child.quantile(0.99),
+                    })
+                else:
+                    entries.append({"labels": labels, "value": child.value})
+            if entries:
+                result[family.name] = {"type": family.kind, "values": entries}
+        for name, kind, _, labels, value in self._collected():
+            result.setdefault(name, {"type": kind, "values": []})["values"].append({"labels": labels, "value": value})
+        return result
+
+
+REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return REGISTRY
+
+
+# --- Metric families --------------------------------------------------------
+
+TOOL_CALLS = REGISTRY.counter("mcp_tool_calls_total", "Tool invocations by outcome", ("tool", "outcome"))
+TOOL_ERRORS = REGISTRY.counter("mcp_tool_errors_total", "Failed tool invocations by error code", ("tool", "code"))
+TOOL_LATENCY = REGISTRY.histogram("mcp_tool_latency_ms", "Tool invocation latency in milliseconds", ("tool",))
+TOOL_IN_FLIGHT = REGISTRY.gauge("mcp_tool_in_flight", "Tool invocations currently executing", ("tool",))
+TOOL_TOKENS = REGISTRY.counter("mcp_tool_tokens_total", "Estimated tokens by direction", ("tool", "direction"))
+TOOL_CACHE = REGISTRY.counter("mcp_tool_cache_total", "Tool invocations by cache status", ("tool", "status"))
+
+EXEC_QUEUE_WAIT = REGISTRY.histogram(
+    "mcp_exec_queue_wait_ms", "Time a handler waited for its execution class slot, in milliseconds", ("class",)
+)
+
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "mcp_admission_rejections_total", "Tool calls rejected by admission control", ("class", "reason")
+)
+ADMISSION_QUEUE_WAIT = REGISTRY.histogram(
+    "mcp_admission_queue_wait_ms", "Time an admitted call waited for a server slot, in milliseconds", ("class",)
+)
+ADMISSION_QUEUED = REGISTRY.gauge("mcp_admission_queued", "Tool calls waiting for a server slot", ("class",))
+
+TASKS_SUBMITTED = REGISTRY.counter("mcp_tasks_submitted_total", "Background tasks submitted", ("type",))
+TASKS_FINISHED = REGISTRY.counter("mcp_tasks_finished_total", "Background tasks finished by status", ("type", "status"))
+TASKS_RESUMED = REGISTRY.counter(
+    "mcp_tasks_resumed_total", "Interrupted background tasks taken over and resumed from their checkpoint", ("type",)
+)
+TASKS_RUNNING = REGISTRY.gauge("mcp_tasks_running", "Background tasks currently running", ("type",))
+TASK_DURATION = REGISTRY.histogram(
+    "mcp_task_duration_ms", "Background task run time in milliseconds", ("type",), TASK_DURATION_BUCKETS_MS
+)
+
+# Unlabelled: the module-level names are the single children
+LOG_RECORDS_WRITTEN = REGISTRY.counter("mcp_log_records_written_total", "Invocation log records written to disk").labels()
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "mcp_log_records_dropped_total", "Invocation log records dropped because the writer queue was full"
+).labels()
+LOG_ROTATIONS = REGISTRY.counter("mcp_log_rotations_total", "Invocation log file rotations").labels()
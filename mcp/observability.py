@@ -1,16 +1,27 @@
-"""Observability utilities for MCP tool invocation telemetry."""
+"""Observability utilities for MCP tool invocation telemetry.
+
+Each hook queues one NDJSON record for the batched background writer
+(mcp.log_writer), so logging never adds disk latency to a tool call, and
+updates the live metrics in mcp.metrics (in-flight calls, latency
+histogram, errors, tokens and cache status per tool).
+
+Environment: MCP_TOOL_LOG_PATH, MCP_TOOL_LOG_QUEUE_SIZE,
+MCP_TOOL_LOG_BATCH_SIZE, MCP_TOOL_LOG_FLUSH_MS, MCP_TOOL_LOG_MAX_BYTES,
+MCP_TOOL_LOG_RETENTION (rotated files kept).
+"""
 
 from __future__ import annotations
 
-import json
-import logging
 import os
 import time
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from .log_writer import BatchedLogWriter
+from .metrics import TOOL_CACHE, TOOL_CALLS, TOOL_ERRORS, TOOL_IN_FLIGHT, TOOL_LATENCY, TOOL_TOKENS
+from .tracing import Trace
+
 DEFAULT_LOG_PATH = Path("observability/logs/tool_invocations.ndjson")
 
 
@@ -24,44 +35,26 @@ class ToolInvocationContext:
     cache_status: str | None = None
 
 
-class JsonLineFormatter(logging.Formatter):
-    """Formatter that writes logging records as compact JSON lines."""
-
-    def format(self, record: logging.LogRecord) -> str:
-        payload = {
-            "ts": datetime.now(timezone.utc).isoformat(),
-            "level": record.levelname,
-            "event": getattr(record, "event", "log"),
-            "message": record.getMessage(),
-            "tool_name": getattr(record, "tool_name", None),
-            "request_id": getattr(record, "request_id", None),
-            "session_id": getattr(record, "session_id", None),
-            "latency_ms": getattr(record, "latency_ms", None),
-            "cache_status": getattr(record, "cache_status", None),
-            "token_input": getattr(record, "token_input", None),
-            "token_output": getattr(record, "token_output", None),
-            "error_code": getattr(record, "error_code", None),
-        }
-        return json.dumps(payload, ensure_ascii=False)
-
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
 
-def _build_logger() -> logging.Logger:
-    logger = logging.getLogger("mcp.observability")
-    if logger.handlers:
-        return logger
 
-    logger.setLevel(logging.INFO)
-    log_path = Path(os.environ.get("MCP_TOOL_LOG_PATH", DEFAULT_LOG_PATH))
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
-    file_handler.setFormatter(JsonLineFormatter())
-    logger.addHandler(file_handler)
-    logger.propagate = False
-    return logger
+def _build_writer() -> BatchedLogWriter:
+    """Writer configured from the environment; the file is opened on first record."""
+    return BatchedLogWriter(
+        Path(os.environ.get("MCP_TOOL_LOG_PATH", DEFAULT_LOG_PATH)),
+        max_queue=int(_env_number("MCP_TOOL_LOG_QUEUE_SIZE", 10_000)),
+        batch_size=int(_env_number("MCP_TOOL_LOG_BATCH_SIZE", 256)),
+        flush_interval=_env_number("MCP_TOOL_LOG_FLUSH_MS", 500) / 1000,
+        max_bytes=int(_env_number("MCP_TOOL_LOG_MAX_BYTES", 50 * 1024 * 1024)),
+        retention=int(_env_number("MCP_TOOL_LOG_RETENTION", 30)),
+    )
 
 
-LOGGER = _build_logger()
+WRITER = _build_writer()
 
 
 def get_invocation_context(tool_name: str, arguments: dict[str, Any]) -> ToolInvocationContext:
@@ -88,16 +81,11 @@ def get_invocation_context(tool_name: str, arguments: dict[str, Any]) -> ToolInv
 def log_tool_invocation_start(context: ToolInvocationContext, token_input: int | None) -> float:
     """Log start event and return monotonic timer for duration measurement."""
     start_time = time.perf_counter()
-    LOGGER.info(
-        "tool invocation started",
-        extra={
-            "event": "tool_invocation_start",
-            "tool_name": context.tool_name,
-            "request_id": context.request_id,
-            "session_id": context.session_id,
-            "cache_status": context.cache_status,
-            "token_input": token_input,
-        },
+    TOOL_IN_FLIGHT.labels(context.tool_name).inc()
+    WRITER.emit(
+        "INFO", "tool_invocation_start", "tool invocation started",
+        context.tool_name, context.request_id, context.session_id,
+        None, context.cache_status, token_input, None, None,
     )
     return start_time
 
@@ -109,19 +97,22 @@ def log_tool_invocation_success(
     token_output: int | None,
 ) -> None:
     """Log successful completion with latency and token totals."""
-    latency_ms = round((time.perf_counter() - start_time) * 1000, 2)
-    LOGGER.info(
-        "tool invocation completed",
-        extra={
-            "event": "tool_invocation_success",
-            "tool_name": context.tool_name,
-            "request_id": context.request_id,
-            "session_id": context.session_id,
-            "latency_ms": latency_ms,
-            "cache_status": context.cache_status,
-            "token_input": token_input,
-            "token_output": token_output,
-        },
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    latency_ms = round(elapsed_ms, 2)
+    tool = context.tool_name
+    TOOL_IN_FLIGHT.labels(tool).dec()
+    TOOL_CALLS.labels(tool, "ok").inc()
+    TOOL_LATENCY.labels(tool).observe(elapsed_ms)
+    if token_input:
+        TOOL_TOKENS.labels(tool, "input").inc(token_input)
+    if token_output:
+        TOOL_TOKENS.labels(tool, "output").inc(token_output)
+    if context.cache_status:
+        TOOL_CACHE.labels(tool, context.cache_status).inc()
+    WRITER.emit(
+        "INFO", "tool_invocation_success", "tool invocation completed",
+        tool, context.request_id, context.session_id,
+        latency_ms, context.cache_status, token_input, token_output, None,
     )
 
 
@@ -132,17 +123,28 @@ def log_tool_invocation_error(
     token_input: int | None,
 ) -> None:
     """Log failed completion with latency and normalized error code."""
-    latency_ms = round((time.perf_counter() - start_time) * 1000, 2)
-    LOGGER.error(
-        "tool invocation failed",
-        extra={
-            "event": "tool_invocation_error",
-            "tool_name": context.tool_name,
-            "request_id": context.request_id,
-            "session_id": context.session_id,
-            "latency_ms": latency_ms,
-            "cache_status": context.cache_status,
-            "token_input": token_input,
-            "error_code": error_code,
-        },
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    latency_ms = round(elapsed_ms, 2)
+    tool = context.tool_name
+    TOOL_IN_FLIGHT.labels(tool).dec()
+    TOOL_CALLS.labels(tool, "error").inc()
+    TOOL_ERRORS.labels(tool, error_code).inc()
+    TOOL_LATENCY.labels(tool).observe(elapsed_ms)
+    WRITER.emit(
+        "ERROR", "tool_invocation_error", "tool invocation failed",
+        tool, context.request_id, context.session_id,
+        latency_ms, context.cache_status, token_input, None, error_code,
+    )
+
+
+def log_tool_trace(context: ToolInvocationContext, trace: Trace) -> None:
+    """Log the spans (and profile summary, if any) of a traced invocation."""
+    extra: dict[str, Any] = {"spans": trace.finished_spans()}
+    if trace.profile_summary:
+        extra["profile"] = trace.profile_summary
+    WRITER.emit(
+        "INFO", "tool_trace", "tool invocation trace",
+        context.tool_name, context.request_id, context.session_id,
+        trace.duration_ms, context.cache_status, None, None, None,
+        extra=extra,
     )
@@ -0,0 +1,235 @@
+"""Pre-forking multi-worker mode for the SSE transport.
+
+``python -m mcp.server --transport sse --workers N`` runs one master and N
+worker processes that share the listening socket, so tool calls spread
+over every core.
+
+The master parses every KB file and builds every index once
+(``run_warmup``), freezes those objects out of the garbage collector and
+only then forks, so workers start warm and share the read-only KB
+snapshot copy-on-write. It then supervises the workers, restarting any
+that die, and stops them on SIGTERM/SIGINT.
+
+Shared mutable state (pending governance changes, the coalescing memo,
+cross-process locks for exclusive tool groups) moves to the SQLite state
+store (mcp.storage.shared_state) and background tasks to the SQLite task
+store (mcp.tasks.store); the master switches ``MCP_STATE_BACKEND`` and
+``MCP_TASK_STORE`` to ``sqlite`` before forking. Each worker re-checks
+its loaded KB files every ``kb_refresh_interval`` seconds, so a KB file
+changed through one worker is reloaded by all of them.
+
+SSE sessions live in the worker that opened them, but the kernel hands
+each new connection to any worker. Every worker therefore also listens on
+a private loopback port and advertises ``/messages/<index>`` as its
+message endpoint; a POST that lands on another worker is forwarded there
+(``forward_request``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from collections.abc import Callable
+from typing import Any
+
+from .kb import registry as kb_registry
+from .storage.shared_state import BACKEND_SQLITE, configure_state_store
+from .tasks.store import STORE_SQLITE
+from .warmup import Readiness, run_warmup
+
+logger = logging.getLogger(__name__)
+
+# (worker index, private port of every worker) -> ASGI app
+AppFactory = Callable[[int, list[int]], Any]
+
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_UPTIME_SECONDS = 1.0
+
+_HOP_HEADERS = frozenset({b"host", b"content-length", b"connection", b"transfer-encoding", b"keep-alive"})
+
+
+def preload_kb() -> dict[str, Any]:
+    """Parse every KB file and build every index in this process before forking."""
+    status = run_warmup(readiness=Readiness())
+    gc.collect()
+    # Keep the collector from touching (and so copying) the inherited pages
+    gc.freeze()
+    return status
+
+
+async def _watch_kb(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(kb_registry.refresh)
+        except Exception:  # noqa: BLE001
+            logger.exception("KB refresh failed")
+
+
+async def _serve_worker(app: Any, sockets: list[socket.socket], kb_refresh_interval: float) -> None:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, log_level="info"))
+    watcher = asyncio.create_task(_watch_kb(kb_refresh_interval)) if kb_refresh_interval > 0 else None
+    try:
+        await server.serve(sockets=sockets)
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+def _run_worker(
+    index: int,
+    app_factory: AppFactory,
+    listener: socket.socket,
+    private: list[socket.socket],
+    kb_refresh_interval: float,
+) -> None:
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+    for position, sock in enumerate(private):
+        if position != index:
+            sock.close()
+    ports = [sock.getsockname()[1] for sock in private]
+    app = app_factory(index, ports)
+    asyncio.run(_serve_worker(app, [listener, private[index]], kb_refresh_interval))
+
+
+def serve_prefork(
+    app_factory: AppFactory,
+    host: str,
+    port: int,
+    workers: int,
+    kb_refresh_interval: float = 1.0,
+) -> None:
+    """Run ``workers`` forked worker processes serving ``app_factory``'s apps."""
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-worker mode needs os.fork (POSIX only)")
+
+    if os.environ.get("MCP_STATE_BACKEND", BACKEND_SQLITE) != BACKEND_SQLITE:
+        logger.warning("MCP_STATE_BACKEND=%s is process-local; using sqlite", os.environ["MCP_STATE_BACKEND"])
+    os.environ["MCP_STATE_BACKEND"] = BACKEND_SQLITE
+    configure_state_store(None)
+    if os.environ.get("MCP_TASK_STORE", STORE_SQLITE) != STORE_SQLITE:
+        logger.warning("MCP_TASK_STORE=%s is process-local; using sqlite", os.environ["MCP_TASK_STORE"])
+    os.environ["MCP_TASK_STORE"] = STORE_SQLITE
+
+    preload_kb()
+
+    listener = socket.create_server((host, port), backlog=2048)
+    private = [socket.create_server(("127.0.0.1", 0)) for _ in range(workers)]
+    children: dict[int, tuple[int, float]] = {}  # pid -> (index, start time)
+    stopping = False
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(index, app_factory, listener, private, kb_refresh_interval)
+            except BaseException:  # noqa: BLE001 - never return into the master's loop
+                logger.exception("Worker %d crashed", index)
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+        logger.info("Started worker %d (pid %d)", index, pid)
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for index in range(workers):
+        spawn(index)
+    logger.info("Serving on %s:%d with %d workers", host, port, workers)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index, started = children.pop(pid, (None, 0.0))
+        if index is None or stopping:
+            continue
+        logger.warning("Worker %d (pid %d) exited with status %d; restarting", index, pid, status)
+        if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+            time.sleep(MIN_WORKER_UPTIME_SECONDS)
+        spawn(index)
+    logger.info("All workers stopped")
+
+
+def _dechunk(payload: bytes) -> bytes:
+    body = bytearray()
+    while payload:
+        size_line, _, payload = payload.partition(b"\r\n")
+        size = int(size_line.split(b";")[0], 16)
+        if size == 0:
+            break
+        body += payload[:size]
+        payload = payload[size + 2:]
+    return bytes(body)
+
+
+async def forward_request(scope: dict[str, Any], receive: Callable, send: Callable, port: int) -> None:
+    """Replay an HTTP request on another worker's loopback port and relay its response."""
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+
+    target = scope.get("raw_path") or scope["path"].encode("utf-8")
+    if scope.get("query_string"):
+        target += b"?" + scope["query_string"]
+    head = [
+        scope["method"].encode("ascii") + b" " + target + b" HTTP/1.1",
+        b"host: 127.0.0.1",
+        b"connection: close",
+        b"content-length: " + str(len(body)).encode("ascii"),
+    ]
+    head.extend(name + b": " + value for name, value in scope.get("headers", []) if name.lower() not in _HOP_HEADERS)
+
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            writer.write(b"\r\n".join(head) + b"\r\n\r\n" + bytes(body))
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        raw_head, _, payload = response.partition(b"\r\n\r\n")
+        lines = raw_head.split(b"\r\n")
+        status = int(lines[0].split()[1])
+    except (OSError, IndexError, ValueError):
+        logger.exception("Failed to forward %s to worker port %d", scope["path"], port)
+        await send({"type": "http.response.start", "status": 502, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"Worker unavailable"})
+        return
+
+    headers = []
+    chunked = False
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"transfer-encoding" and b"chunked" in value.lower():
+            chunked = True
+        if name not in _HOP_HEADERS:
+            headers.append((name, value.strip()))
+    if chunked:
+        payload = _dechunk(payload)
+    headers.append((b"content-length", str(len(payload)).encode("ascii")))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,46 @@
+"""Progress notifications for long-running tool calls.
+
+When a tools/call request carries ``_meta.progressToken``, the server binds
+a reporter for the duration of that call (``bind``/``unbind``); handlers
+call ``report_progress`` to send MCP ``notifications/progress`` messages to
+the calling session, which in SSE mode arrive on the client's event
+stream. Without a token, or outside a tool call, ``report_progress`` does
+nothing, so handlers can report unconditionally.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# (progress, total, message) -> notification sent
+ProgressReporter = Callable[[float, "float | None", "str | None"], Awaitable[None]]
+
+_reporter: contextvars.ContextVar[ProgressReporter | None] = contextvars.ContextVar(
+    "mcp_progress_reporter", default=None
+)
+
+
+def bind(reporter: ProgressReporter | None) -> contextvars.Token:
+    """Route ``report_progress`` in the current context to ``reporter``."""
+    return _reporter.set(reporter)
+
+
+def unbind(token: contextvars.Token) -> None:
+    _reporter.reset(token)
+
+
+async def report_progress(progress: float, total: float | None = None, message: str | None = None) -> bool:
+    """Send a progress notification for the current call; False when none was sent."""
+    reporter = _reporter.get()
+    if reporter is None:
+        return False
+    try:
+        await reporter(progress, total, message)
+    except Exception:  # noqa: BLE001 - a closed stream must not fail the call
+        logger.debug("Progress notification failed", exc_info=True)
+        return False
+    return True
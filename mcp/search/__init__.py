@@ -0,0 +1 @@
+"""Text analysis and lookup indexes shared by the search handlers."""
@@ -0,0 +1,97 @@
+"""Shared text analyzer for the pricing and catalog search indexes.
+
+Both handlers run product text through ``analyze`` when they build their
+indexes and run queries through the same function, so accent variants
+("cámara"/"camara"), plurals ("techos"/"techo"), synonyms
+("cubierta"/"techo") and abbreviations ("galv."/"galvanizado") collapse to
+one indexed term and a query term resolves with a single dict lookup.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+
+# Runs of letters or digits; "100mm" and "IROOF30" split into two terms
+_TERM_RE = re.compile(r"[a-z]+|[0-9]+")
+
+# Abbreviations seen in product names, keyed by the folded form without the dot
+ABBREVIATIONS = {
+    "galv": "galvanizado",
+    "prep": "prepintado",
+    "perf": "perfil",
+    "ch": "chapa",
+    "esp": "espesor",
+    "solv": "solvente",
+    "cal": "calibre",
+    "mts": "metro",
+    "mt": "metro",
+    "unid": "unidad",
+    "pulg": "pulgada",
+    "alum": "aluminio",
+}
+
+# Abbreviations that are also common words ("un" is the indefinite
+# article): expanded only right after a number ("10 un", "10un")
+UNIT_ABBREVIATIONS = {
+    "un": "unidad",
+}
+
+# Category synonyms (see catalog.CATEGORY_MAP), keyed by stemmed term
+SYNONYMS = {
+    "roof": "techo",
+    "cubierta": "techo",
+    "wall": "pared",
+    "frigorifico": "camara",
+    "frigorifica": "camara",
+    "accessory": "accesorio",
+}
+
+# Consonants after which Spanish plurals take "-es" (panel-es, canalon-es)
+_ES_PLURAL_STEMS = frozenset("lnrdzj")
+_VOWELS = frozenset("aeiou")
+
+
+def fold(text: str | None) -> str:
+    """Lowercase and strip diacritics ("Canalón" -> "canalon")."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def stem(term: str) -> str:
+    """Light Spanish stemmer: strips plural endings only.
+
+    Deliberately conservative (no gender or verb suffixes) so product
+    names never conflate; numbers are returned unchanged.
+    """
+    if term.isdigit():
+        return term
+    if len(term) > 4 and term.endswith("es") and term[-3] in _ES_PLURAL_STEMS:
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s") and term[-2] in _VOWELS:
+        return term[:-1]
+    return term
+
+
+@lru_cache(maxsize=4096)
+def analyze_term(raw: str) -> str:
+    """Map one folded raw term to its indexed form."""
+    term = ABBREVIATIONS.get(raw, raw)
+    term = stem(term)
+    return SYNONYMS.get(term, term)
+
+
+def analyze(text: str | None) -> list[str]:
+    """Fold, split, expand, stem and canonicalize ``text`` into index terms."""
+    terms = []
+    previous = ""
+    for raw in _TERM_RE.findall(fold(text)):
+        if previous.isdigit() and raw in UNIT_ABBREVIATIONS:
+            terms.append(analyze_term(UNIT_ABBREVIATIONS[raw]))
+        else:
+            terms.append(analyze_term(raw))
+        previous = raw
+    return terms
@@ -0,0 +1,123 @@
+"""Typo-tolerant term lookup using a SymSpell-style deletes dictionary.
+
+Every indexed term is stored under all strings reachable from it by
+deleting up to ``max_distance`` characters (from its first
+``prefix_length`` characters). A lookup generates the same deletes for the
+query term, so candidate terms come from a handful of dict hits and only
+those candidates are verified with a bounded edit distance. Lookups cost
+microseconds regardless of vocabulary size.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+DEFAULT_MAX_DISTANCE = 2
+DEFAULT_PREFIX_LENGTH = 7
+# Terms this short only tolerate one edit ("pir" must not become "pu")
+SHORT_TERM_LENGTH = 4
+
+
+def _deletes(term: str, max_distance: int) -> set[str]:
+    """All strings obtained by deleting up to ``max_distance`` characters."""
+    results = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            if len(word) <= 1:
+                continue
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, or ``max_distance + 1`` once exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    return prev[-1] if prev[-1] <= max_distance else max_distance + 1
+
+
+class FuzzyIndex:
+    """Deletes-dictionary over a fixed vocabulary.
+
+    ``add`` accumulates a frequency per term; ``lookup`` returns the
+    closest terms ordered by (distance, -frequency, term).
+    """
+
+    def __init__(
+        self,
+        terms: Iterable[str] = (),
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        prefix_length: int = DEFAULT_PREFIX_LENGTH,
+    ):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._frequency: dict[str, int] = {}
+        self._deletes: dict[str, list[str]] = {}
+        for term in terms:
+            self.add(term)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._frequency
+
+    def __len__(self) -> int:
+        return len(self._frequency)
+
+    def add(self, term: str, count: int = 1) -> None:
+        if not term:
+            return
+        if term in self._frequency:
+            self._frequency[term] += count
+            return
+        self._frequency[term] = count
+        for variant in _deletes(term[: self.prefix_length], self.max_distance):
+            self._deletes.setdefault(variant, []).append(term)
+
+    def _distance_for(self, term: str) -> int:
+        if len(term) <= SHORT_TERM_LENGTH:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def lookup(self, term: str, max_results: int = 5) -> list[tuple[str, int]]:
+        """Return up to ``max_results`` ``(term, distance)`` pairs closest to ``term``."""
+        if not term:
+            return []
+        if term in self._frequency:
+            return [(term, 0)]
+
+        max_distance = self._distance_for(term)
+        prefix = term[: self.prefix_length]
+        candidates: set[str] = set()
+        for variant in _deletes(prefix, max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        scored: list[tuple[int, int, str]] = []
+        for candidate in candidates:
+            distance = edit_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, -self._frequency[candidate], candidate))
+        scored.sort()
+        return [(candidate, distance) for distance, _, candidate in scored[:max_results]]
+
+    def correct(self, term: str) -> str | None:
+        """Best correction for ``term``, or None if nothing is within range."""
+        matches = self.lookup(term, max_results=1)
+        return matches[0][0] if matches else None
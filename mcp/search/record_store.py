@@ -0,0 +1,87 @@
+"""Offset-indexed NDJSON side file for full records read on demand.
+
+Large KB files only need a few fields resident for search; the full
+records are written once to a newline-delimited JSON file and addressed by
+``key -> (offset, length)``, so fetching one record is a seek and a read.
+
+The file may start with a header line (e.g. the stamp of the source file
+it was built from). A store created with a ``header`` checks it on every
+read and raises ``StaleRecordsError`` when another process has rewritten
+the file since its offsets were computed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+
+class StaleRecordsError(ValueError):
+    """The records file no longer matches the offsets it was opened with."""
+
+
+class OffsetRecordStore:
+    """Read-only view over an NDJSON file with a ``{key: [offset, length]}`` map."""
+
+    def __init__(self, path: Path, offsets: dict[str, list[int]], header: dict[str, Any] | None = None):
+        self.path = path
+        self.offsets = offsets
+        self.header = header
+        self._expected = None if header is None else _header_line(header)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @classmethod
+    def write(
+        cls, path: Path, records: Iterable[tuple[str, dict[str, Any]]], header: dict[str, Any] | None = None
+    ) -> OffsetRecordStore:
+        """Write ``(key, record)`` pairs (after ``header``) to ``path`` atomically and return the store."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        offsets: dict[str, list[int]] = {}
+        offset = 0
+        with open(tmp_path, "wb") as f:
+            if header is not None:
+                line = _header_line(header)
+                f.write(line)
+                offset = len(line)
+            for key, record in records:
+                line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets[key] = [offset, len(line)]
+                offset += len(line)
+        os.replace(tmp_path, path)
+        return cls(path, offsets, header)
+
+    @staticmethod
+    def read_header(path: Path) -> dict[str, Any] | None:
+        """The header line of ``path``, or None if it has none or cannot be read."""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return None
+        return header.get("header") if isinstance(header, dict) else None
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Read one record by key, or None if the key is unknown."""
+        location = self.offsets.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.path, "rb") as f:
+            if self._expected is not None and f.read(len(self._expected)) != self._expected:
+                raise StaleRecordsError(f"{self.path} was rewritten for another source")
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+
+def _header_line(header: dict[str, Any]) -> bytes:
+    return json.dumps({"header": header}, sort_keys=True).encode("utf-8") + b"\n"
@@ -21,10 +21,15 @@ Background task processing tools (async, long-running operations):
 - bulk_price_check: Submit bulk pricing lookups
 - full_quotation: Submit combined BOM + pricing + catalog quotation
 - task_status: Check background task progress
-- task_result: Retrieve completed task output
+- task_result: Retrieve completed task output (or partial results by offset)
+- task_watch: Wait for new partial results with progress notifications
 - task_list: List recent background tasks
 - task_cancel: Cancel a pending/running task
 
+Meta tools:
+- multi_call: Run several tool invocations in one round trip
+- server_metrics: Live metrics (latency percentiles, queue waits, cache hits)
+
 Usage:
     # stdio transport (for OpenAI Custom GPT Actions / local testing)
     python -m mcp.server
@@ -32,15 +37,53 @@ Usage:
     # SSE transport (for remote hosting)
     python -m mcp.server --transport sse --port 8000
 
+    # SSE transport on 4 worker processes (shared state in SQLite)
+    python -m mcp.server --transport sse --port 8000 --workers 4
+
+Each call first passes per-session admission control (mcp.admission: rate
+limits, in-flight caps and weighted fair queuing between interactive and
+batch tools). Handlers run through mcp.execution: CPU-bound and blocking-IO tools are
+dispatched to worker pools so they never stall the event loop. Identical
+concurrent price_check/catalog_search/bom_calculate calls share one
+execution (mcp.coalescing); the invocation log's cache_status says whether
+a call ran (miss), joined one in flight (coalesced) or hit the memo.
+
+Tool schemas are loaded and checked once in create_server. In SSE mode
+GET /tools serves the precomputed tools/list JSON with an ETag, so a
+reconnecting client that sends If-None-Match gets a 304.
+
+create_server starts a background warmup (mcp.warmup) that builds the KB
+indexes in parallel and replays the configured warm queries; in SSE mode
+GET /ready returns 503 until it has finished.
+
+Live metrics (mcp.metrics) are served at GET /metrics in SSE mode and by
+the server_metrics tool. A sampled fraction of calls is traced per stage
+(mcp.tracing) and written to the invocation log as tool_trace records.
+
+Calls that carry a progress token can report progress (mcp.progress);
+task_watch uses it to stream a background task's progress as MCP
+notifications while it waits for new partial results.
+
+Background tasks can be persisted in the task store (mcp.tasks.store;
+MCP_TASK_STORE=sqlite, always on in multi-worker mode): while serving,
+tasks interrupted by a crash or redeploy are resumed from their last
+checkpoint, and a clean shutdown hands unfinished tasks back to the store
+for the next start. The shipped default keeps tasks in memory.
+
 Requires: mcp>=1.0.0 (pip install mcp)
 """
 
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
 import json
 import os
+import re
 import sys
+from collections.abc import AsyncIterator
+from dataclasses import replace
 from pathlib import Path
 from typing import Any
 
@@ -73,19 +116,33 @@ from .handlers.wolf_kb_write import (
     handle_lookup_customer,
 )
 from .handlers.file_ops import handle_write_file, handle_read_file
+from .handlers.multi_call import configure_multi_call, handle_multi_call
+from .handlers.metrics import handle_server_metrics
 from .storage.factory import initialize_memory_store
+from .config.settings import load_runtime_settings
+from .warmup import get_readiness, start_warmup
+from .metrics import get_registry
+from .admission import AdmissionRejected, get_admission
+from .coalescing import get_singleflight
+from .encoding import encode_json, encode_with_estimate, estimate_tokens
+from .execution import get_executor
 from .observability import (
     get_invocation_context,
     log_tool_invocation_error,
     log_tool_invocation_start,
     log_tool_invocation_success,
+    log_tool_trace,
 )
+from .progress import ProgressReporter, bind as bind_progress, unbind as unbind_progress
+from .tracing import end_trace, should_emit, span, start_trace
+from .prefork import forward_request, serve_prefork
 from .handlers.tasks import (
     handle_batch_bom_calculate,
     handle_bulk_price_check,
     handle_full_quotation,
     handle_task_status,
     handle_task_result,
+    handle_task_watch,
     handle_task_list,
     handle_task_cancel,
 )
@@ -100,6 +157,60 @@ def _load_tool_schema(name: str) -> dict[str, Any]:
         return json.load(f)
 
 
+def _check_tool_schema(name: str, schema: dict[str, Any]) -> list[str]:
+    """Structural problems with a tool definition (empty when valid)."""
+    problems = []
+    if schema.get("name") != name:
+        problems.append(f"{name}.json: name is {schema.get('name')!r}, expected {name!r}")
+    if not isinstance(schema.get("description"), str) or not schema["description"]:
+        problems.append(f"{name}.json: description must be a non-empty string")
+    input_schema = schema.get("inputSchema")
+    if not isinstance(input_schema, dict) or input_schema.get("type") != "object":
+        problems.append(f"{name}.json: inputSchema must be an object schema")
+    return problems
+
+
+def build_tool_listing(names: list[str] | None = None) -> dict[str, Any]:
+    """Load and check every tool schema once; precompute the tools/list payload.
+
+    Returns ``{"schemas", "body", "etag"}``: the schemas in TOOL_NAMES order,
+    the serialized ``{"tools": [...]}`` response and a strong ETag over it so
+    clients that already hold the list can skip the transfer.
+    Raises ValueError listing every malformed schema.
+    """
+    schemas = []
+    problems: list[str] = []
+    for name in names if names is not None else TOOL_NAMES:
+        schema = _load_tool_schema(name)
+        problems.extend(_check_tool_schema(name, schema))
+        schemas.append({
+            "name": schema.get("name"),
+            "description": schema.get("description"),
+            "inputSchema": schema.get("inputSchema"),
+        })
+    if problems:
+        raise ValueError("Invalid tool schemas:\n" + "\n".join(problems))
+
+    body = json.dumps({"tools": schemas}, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return {
+        "schemas": schemas,
+        "body": body,
+        "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+    }
+
+
+# Built by create_server; served by list_tools and the SSE /tools endpoint
+_tool_listing: dict[str, Any] | None = None
+
+
+def get_tool_listing() -> dict[str, Any]:
+    """Return the tool listing built at startup (building it if needed)."""
+    global _tool_listing
+    if _tool_listing is None:
+        _tool_listing = build_tool_listing()
+    return _tool_listing
+
+
 # Tool handler dispatch — core tools + background task tools
 TOOL_HANDLERS = {
     # Core tools (synchronous)
@@ -127,17 +238,59 @@ TOOL_HANDLERS = {
     "full_quotation": handle_full_quotation,
     "task_status": handle_task_status,
     "task_result": handle_task_result,
+    "task_watch": handle_task_watch,
     "task_list": handle_task_list,
     "task_cancel": handle_task_cancel,
+    # Meta tools
+    "multi_call": handle_multi_call,
+    "server_metrics": handle_server_metrics,
 }
 
 TOOL_NAMES = list(TOOL_HANDLERS.keys())
 
 
-def _estimate_token_count(payload: Any) -> int:
-    """Estimate token count using a conservative character heuristic."""
-    serialized = json.dumps(payload, ensure_ascii=False, default=str)
-    return max(1, round(len(serialized) / 4))
+async def dispatch_tool(name: str, arguments: dict[str, Any]) -> dict[str, Any]:
+    """Run one tool through the execution layer (used by multi_call steps)."""
+    return await get_executor().run(name, TOOL_HANDLERS[name], arguments)
+
+
+def _collect_runtime_metrics():
+    """Scrape-time gauges from the executor, admission, singleflight, warmup and task manager."""
+    from .tasks.manager import get_task_manager
+
+    for cls, stats in get_executor().stats().items():
+        labels = {"class": cls}
+        yield "mcp_exec_waiting", "gauge", "Handlers waiting for an execution slot", labels, stats["waiting"]
+        yield "mcp_exec_running", "gauge", "Handlers running in an execution class", labels, stats["running"]
+        yield "mcp_exec_limit", "gauge", "Concurrency limit per execution class (0 = unlimited)", labels, stats["limit"]
+    admission = get_admission().stats()
+    yield "mcp_admission_active", "gauge", "Tool calls holding a server slot", {}, admission["active"]
+    yield "mcp_admission_sessions", "gauge", "Sessions tracked by admission control", {}, admission["sessions"]
+    flight = get_singleflight().stats()
+    yield "mcp_singleflight_inflight", "gauge", "Distinct coalesced executions in flight", {}, flight["inflight"]
+    yield "mcp_singleflight_memo_entries", "gauge", "Memoized coalesced replies", {}, flight["memo_entries"]
+    yield "mcp_ready", "gauge", "1 once startup warmup has finished", {}, int(get_readiness().ready)
+    for status, count in sorted(get_task_manager().status_counts().items()):
+        yield "mcp_tasks_tracked", "gauge", "Background tasks held by the task manager", {"status": status}, count
+
+
+def _progress_reporter(server: Any) -> ProgressReporter | None:
+    """Reporter sending notifications/progress for the current request, if it asked for them."""
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    token = getattr(ctx.meta, "progressToken", None) if ctx.meta is not None else None
+    if token is None:
+        return None
+
+    async def send(progress: float, total: float | None, message: str | None) -> None:
+        try:
+            await ctx.session.send_progress_notification(token, progress, total, message=message)
+        except TypeError:  # SDK releases without progress messages
+            await ctx.session.send_progress_notification(token, progress, total)
+
+    return send
 
 
 def _init_task_workers() -> None:
@@ -188,56 +341,184 @@ def create_server() -> Any:
         wolf_client = WolfClient(api_key=wolf_api_key, base_url=wolf_api_url)
         configure_wolf_kb_client(wolf_client)
 
+    configure_multi_call(dispatch_tool, TOOL_NAMES)
+
+    get_registry().register_collector(_collect_runtime_metrics)
+
+    # Parse KB files and build indexes in the background before traffic arrives
+    warmup = load_runtime_settings().warmup
+    start_warmup(TOOL_HANDLERS, warmup.queries, enabled=warmup.enabled)
+
+    # Tool schemas are read and checked once; list_tools serves them from memory
+    global _tool_listing
+    _tool_listing = build_tool_listing()
+    tools = [
+        Tool(name=schema["name"], description=schema["description"], inputSchema=schema["inputSchema"])
+        for schema in _tool_listing["schemas"]
+    ]
+
     @server.list_tools()
     async def list_tools() -> list[Tool]:
-        tools = []
-        for name in TOOL_NAMES:
-            schema = _load_tool_schema(name)
-            tools.append(
-                Tool(
-                    name=schema["name"],
-                    description=schema["description"],
-                    inputSchema=schema["inputSchema"],
-                )
-            )
-        return tools
+        return list(tools)
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         context = get_invocation_context(name, arguments)
-        token_input = _estimate_token_count(arguments)
+        token_input = estimate_tokens(encode_json(arguments))
         started_at = log_tool_invocation_start(context, token_input)
 
         handler = TOOL_HANDLERS.get(name)
         if not handler:
             log_tool_invocation_error(context, started_at, "UNKNOWN_TOOL", token_input)
-            return [TextContent(type="text", text=json.dumps({"error": f"Unknown tool: {name}"}))]
+            return [TextContent(type="text", text=encode_json({"error": f"Unknown tool: {name}"}))]
 
         try:
-            result = await handler(arguments)
+            ticket = await get_admission().acquire(context.session_id, name)
+        except AdmissionRejected as rejected:
+            log_tool_invocation_error(context, started_at, rejected.code, token_input)
+            return [TextContent(type="text", text=encode_json(rejected.to_envelope()))]
+
+        async def execute() -> tuple[str, int]:
+            with span("execute"):
+                result = await get_executor().run(name, handler, arguments)
+            # Encoded once: the same text is measured, sent and shared with coalesced calls
+            with span("serialize"):
+                return encode_with_estimate(result)
+
+        trace_token = progress_token = None
+        # Opened right after admission so the ticket is released whatever fails
+        try:
+            trace_token = start_trace(name, context.request_id)
+            progress_token = bind_progress(_progress_reporter(server))
+            singleflight = get_singleflight()
+            key = singleflight.key(name, arguments)
+            if key is None:
+                text, token_output = await execute()
+            else:
+                (text, token_output), cache_status = await singleflight.do(key, execute)
+                context = replace(context, cache_status=cache_status)
         except Exception as exc:  # noqa: BLE001
             error_code = getattr(exc, "code", exc.__class__.__name__.upper())
             log_tool_invocation_error(context, started_at, str(error_code), token_input)
             raise
+        finally:
+            ticket.release()
+            if progress_token is not None:
+                unbind_progress(progress_token)
+            if trace_token is not None:
+                trace = end_trace(trace_token)
+                if trace is not None and should_emit(trace):
+                    log_tool_trace(context, trace)
 
-        token_output = _estimate_token_count(result)
         log_tool_invocation_success(context, started_at, token_input, token_output)
-        return [TextContent(type="text", text=json.dumps(result, ensure_ascii=False, default=str))]
+        return [TextContent(type="text", text=text)]
 
     return server
 
 
+@contextlib.asynccontextmanager
+async def _task_recovery() -> AsyncIterator[None]:
+    """Resume interrupted background tasks while serving; release unfinished ones on exit."""
+    from .tasks.manager import get_task_manager
+
+    manager = get_task_manager()
+    manager.start_recovery()
+    try:
+        yield
+    finally:
+        await manager.shutdown()
+
+
 async def main_stdio() -> None:
     """Run server with stdio transport."""
     server = create_server()
-    async with stdio_server() as (read_stream, write_stream):
+    async with _task_recovery(), stdio_server() as (read_stream, write_stream):
         await server.run(read_stream, write_stream, server.create_initialization_options())
 
 
+def build_sse_app(worker_index: int | None = None, worker_ports: list[int] | None = None) -> Any:
+    """Starlette app for the SSE transport.
+
+    In multi-worker mode (``worker_index`` set) the message endpoint is
+    ``/messages/<index>`` and POSTs for another worker's sessions are
+    forwarded to its loopback port.
+    """
+    from mcp.server.sse import SseServerTransport
+    from starlette.applications import Starlette
+    from starlette.routing import Route, Mount
+
+    from starlette.responses import Response
+
+    server = create_server()
+    endpoint = "/messages" if worker_index is None else f"/messages/{worker_index}"
+    sse = SseServerTransport(endpoint)
+
+    async def handle_tools(request):
+        """Precomputed tools/list payload; 304 when the client's ETag matches."""
+        listing = get_tool_listing()
+        headers = {"ETag": listing["etag"], "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == listing["etag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(listing["body"], media_type="application/json", headers=headers)
+
+    async def handle_ready(request):
+        """Readiness probe: 503 until startup warmup has finished."""
+        status = get_readiness().status()
+        return Response(
+            encode_json(status),
+            status_code=200 if status["ready"] else 503,
+            media_type="application/json",
+            headers={"Cache-Control": "no-store"},
+        )
+
+    async def handle_metrics(request):
+        """Prometheus scrape endpoint."""
+        return Response(
+            get_registry().render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+            headers={"Cache-Control": "no-store"},
+        )
+
+    async def handle_sse_app(scope, receive, send):
+        async with sse.connect_sse(scope, receive, send) as streams:
+            await server.run(streams[0], streams[1], server.create_initialization_options())
+
+    async def handle_worker_messages(scope, receive, send):
+        """Deliver to this worker's sessions; forward to the owning worker otherwise."""
+        match = re.search(r"(\d+)/?$", scope["path"])
+        owner = int(match.group(1)) if match else worker_index
+        if owner == worker_index or not 0 <= owner < len(worker_ports or ()):
+            await sse.handle_post_message(scope, receive, send)
+        else:
+            await forward_request(scope, receive, send, worker_ports[owner])
+
+    if worker_index is None:
+        messages = Route("/messages", endpoint=sse.handle_post_message, methods=["POST"])
+    else:
+        messages = Mount("/messages", app=handle_worker_messages)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with _task_recovery():
+            yield
+
+    return Starlette(routes=[
+        Mount("/sse", app=handle_sse_app),
+        messages,
+        Route("/tools", endpoint=handle_tools, methods=["GET"]),
+        Route("/ready", endpoint=handle_ready, methods=["GET"]),
+        Route("/metrics", endpoint=handle_metrics, methods=["GET"]),
+    ], lifespan=lifespan)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="GPT-PANELIN MCP Server")
     parser.add_argument("--transport", choices=["stdio", "sse"], default="stdio")
     parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("MCP_WORKERS", "1")),
+        help="SSE worker processes (default 1; more share state through the SQLite state store)",
+    )
     args = parser.parse_args()
 
     if not HAS_MCP_SDK:
@@ -245,27 +526,17 @@ def main() -> None:
         sys.exit(1)
 
     if args.transport == "stdio":
+        if args.workers > 1:
+            print("ERROR: --workers applies to the sse transport only", file=sys.stderr)
+            sys.exit(1)
         import asyncio
         asyncio.run(main_stdio())
-    elif args.transport == "sse":
-        from mcp.server.sse import SseServerTransport
-        from starlette.applications import Starlette
-        from starlette.routing import Route, Mount
+    elif args.workers > 1:
+        serve_prefork(build_sse_app, host="0.0.0.0", port=args.port, workers=args.workers)
+    else:
         import uvicorn
 
-        server = create_server()
-        sse = SseServerTransport("/messages")
-
-        async def handle_sse_app(scope, receive, send):
-            async with sse.connect_sse(scope, receive, send) as streams:
-                await server.run(streams[0], streams[1], server.create_initialization_options())
-
-        app = Starlette(routes=[
-            Mount("/sse", app=handle_sse_app),
-            Route("/messages", endpoint=sse.handle_post_message, methods=["POST"]),
-        ])
-        uvicorn.run(app, host="0.0.0.0", port=args.port)
-
+        uvicorn.run(build_sse_app(), host="0.0.0.0", port=args.port)
 
 if __name__ == "__main__":
     main()
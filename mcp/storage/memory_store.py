@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import math
+import threading
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -31,11 +33,17 @@ class MemoryStore(Protocol):
 
 
 class FileStore:
-    """JSON file backed memory store used as default fallback backend."""
+    """JSON file backed memory store used as default fallback backend.
+
+    Every call reads (and a save rewrites) the whole file, so file access
+    runs in a worker thread instead of on the event loop; saves are
+    serialized so concurrent ones do not drop each other's records.
+    """
 
     def __init__(self, path: Path):
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
 
     def _load_items(self) -> list[dict[str, Any]]:
         if not self.path.exists():
@@ -48,16 +56,20 @@ class FileStore:
         with open(self.path, "w", encoding="utf-8") as f:
             json.dump({"items": items}, f, ensure_ascii=False, indent=2)
 
+    def _append_item(self, item: dict[str, Any]) -> None:
+        with self._write_lock:
+            items = self._load_items()
+            items.append(item)
+            self._save_items(items)
+
     async def save_quotation(self, payload: dict[str, Any], embedding: list[float]) -> dict[str, Any]:
-        items = self._load_items()
         record = StoredQuotation(
             quotation_id=f"Q-{uuid.uuid4().hex}",
             timestamp=datetime.now(timezone.utc).isoformat(),
             payload=payload,
             embedding=embedding,
         )
-        items.append(record.__dict__)
-        self._save_items(items)
+        await asyncio.to_thread(self._append_item, record.__dict__)
         return {
             "quotation_id": record.quotation_id,
             "timestamp": record.timestamp,
@@ -67,7 +79,7 @@ class FileStore:
     async def retrieve_similar(self, embedding: list[float], limit: int) -> list[dict[str, Any]]:
         if not embedding:
             return []
-        items = self._load_items()
+        items = await asyncio.to_thread(self._load_items)
         scored: list[tuple[float, dict[str, Any]]] = []
         for item in items:
             vector = item.get("embedding") or []
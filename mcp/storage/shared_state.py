@@ -0,0 +1,326 @@
+"""Shared mutable server state behind a pluggable key/value store.
+
+State that must be visible to every server process lives here instead of
+in module globals: governance changes pending commit and the coalescing
+memo (background tasks have their own store, mcp.tasks.store). Values
+are JSON-compatible and grouped by namespace; each entry may carry a TTL.
+
+Backends:
+
+- ``MemoryStateStore``: process-local dicts (single-process default).
+- ``SQLiteStateStore``: one SQLite database in WAL mode shared by the
+  workers of a multi-worker deployment (``python -m mcp.server
+  --transport sse --workers N``). Its ``lock`` is an ``fcntl`` file lock,
+  so read-modify-write of shared files (corrections_log.json) stays
+  serialized across processes.
+
+``shared`` tells callers whether other processes see the same state;
+components keep their cheaper in-process paths when it is False.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+from mcp.config.settings import load_runtime_settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+
+# SQLiteStateStore deletes expired rows once every this many writes
+PURGE_EVERY_WRITES = 256
+
+# The SQLite stores here and in mcp.tasks.store use RETURNING (3.35+)
+SQLITE_MIN_VERSION = (3, 35, 0)
+
+
+def check_sqlite_version() -> None:
+    """Fail early when the linked SQLite library is too old for the SQLite stores."""
+    if sqlite3.sqlite_version_info < SQLITE_MIN_VERSION:
+        required = ".".join(map(str, SQLITE_MIN_VERSION))
+        raise RuntimeError(
+            f"SQLite {sqlite3.sqlite_version} is too old for the SQLite stores (needs {required}+ for RETURNING); "
+            "use the memory backends or a Python built against a newer SQLite"
+        )
+
+
+class StateStore:
+    """Namespaced key/value store for JSON-compatible values."""
+
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        raise NotImplementedError
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    def put_if_absent(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> bool:
+        """Store ``value`` unless a live entry exists; True when stored."""
+        raise NotImplementedError
+
+    def pop(self, namespace: str, key: str) -> Any | None:
+        """Remove and return an entry atomically (None when missing)."""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        """Live entries of a namespace."""
+        raise NotImplementedError
+
+    def lock(self, name: str) -> contextlib.AbstractContextManager[None]:
+        """Mutual exclusion for ``name`` across every user of this store."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _expiry(ttl: float | None) -> float | None:
+    return None if ttl is None else time.time() + ttl
+
+
+class MemoryStateStore(StateStore):
+    """Process-local store; the default for a single server process."""
+
+    shared = False
+
+    def __init__(self) -> None:
+        self._data: dict[tuple[str, str], tuple[float | None, Any]] = {}
+        self._mutex = threading.Lock()
+        self._locks: dict[str, threading.Lock] = {}
+
+    def _live(self, slot: tuple[str, str]) -> tuple[float | None, Any] | None:
+        entry = self._data.get(slot)
+        if entry is not None and entry[0] is not None and entry[0] <= time.time():
+            del self._data[slot]
+            return None
+        return entry
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        with self._mutex:
+            entry = self._live((namespace, key))
+        return None if entry is None else entry[1]
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> None:
+        with self._mutex:
+            self._data[(namespace, key)] = (_expiry(ttl), value)
+
+    def put_if_absent(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> bool:
+        with self._mutex:
+            if self._live((namespace, key)) is not None:
+                return False
+            self._data[(namespace, key)] = (_expiry(ttl), value)
+            return True
+
+    def pop(self, namespace: str, key: str) -> Any | None:
+        with self._mutex:
+            entry = self._live((namespace, key))
+            if entry is None:
+                return None
+            del self._data[(namespace, key)]
+            return entry[1]
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._mutex:
+            self._data.pop((namespace, key), None)
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        with self._mutex:
+            slots = [slot for slot in self._data if slot[0] == namespace]
+            return [(slot[1], entry[1]) for slot in slots if (entry := self._live(slot)) is not None]
+
+    def lock(self, name: str) -> contextlib.AbstractContextManager[None]:
+        with self._mutex:
+            return self._locks.setdefault(name, threading.Lock())  # type: ignore[return-value]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+
+class SQLiteStateStore(StateStore):
+    """Store shared by several processes through one SQLite file (WAL mode).
+
+    Connections are per thread and per process, so a store created before
+    ``fork`` is safe to use in the children. Expired rows are deleted every
+    ``PURGE_EVERY_WRITES`` writes, so short-lived entries (the coalescing
+    memo) do not accumulate in the file.
+    """
+
+    shared = True
+
+    def __init__(self, path: str | Path, timeout: float = 5.0) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._thread_locks: dict[str, threading.Lock] = {}
+        self._mutex = threading.Lock()
+        self._writes = itertools.count(1)
+        check_sqlite_version()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Autocommit; multi-statement updates open their own transaction
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, ensure_ascii=False, default=str), _expiry(ttl)),
+        )
+        self._maybe_purge()
+
+    def put_if_absent(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> bool:
+        conn = self._conn()
+        with self._transaction(conn):
+            conn.execute(
+                "DELETE FROM state WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                (namespace, key, time.time()),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False, default=str), _expiry(ttl)),
+            )
+        self._maybe_purge()
+        return cursor.rowcount == 1
+
+    def pop(self, namespace: str, key: str) -> Any | None:
+        row = self._conn().execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ? RETURNING value, expires_at",
+            (namespace, key),
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._conn().execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def items(self, namespace: str) -> list[tuple[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT key, value FROM state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time()),
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        return self._conn().execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def _maybe_purge(self) -> None:
+        if next(self._writes) % PURGE_EVERY_WRITES == 0:
+            try:
+                self.purge_expired()
+            except sqlite3.Error:  # busy: the next round retries
+                logger.debug("Purging expired state entries failed", exc_info=True)
+
+    @contextlib.contextmanager
+    def lock(self, name: str) -> Iterator[None]:
+        # The thread lock keeps threads of this process off the file lock's
+        # blocking call; the file lock serializes processes
+        with self._mutex:
+            thread_lock = self._thread_locks.setdefault(name, threading.Lock())
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_name(f"{self.path.name}.{name}.lock"), "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _transaction(conn: sqlite3.Connection) -> Iterator[None]:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+
+
+def build_state_store(backend: str | None = None, path: str | Path | None = None) -> StateStore:
+    """Store for ``backend`` (default: the shared_state settings)."""
+    if backend is None or (backend == BACKEND_SQLITE and path is None):
+        settings = load_runtime_settings().shared_state
+        backend = backend or settings.backend
+        path = path or settings.sqlite_path
+    if backend == BACKEND_SQLITE:
+        return SQLiteStateStore(path)
+    if backend != BACKEND_MEMORY:
+        logger.warning("Unknown shared state backend %r; using memory", backend)
+    return MemoryStateStore()
+
+
+_store: StateStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    """Return the process-wide state store, creating it on first access."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = build_state_store()
+    return _store
+
+
+def configure_state_store(store: StateStore | None) -> None:
+    """Replace the process-wide store (None: rebuild from settings on next use)."""
+    global _store
+    with _store_lock:
+        _store = store
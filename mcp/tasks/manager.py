@@ -3,37 +3,91 @@
 Manages task lifecycle, dispatches workers, and provides thread-safe
 access to task state. Uses asyncio for concurrency within the MCP
 server event loop.
+
+With a durable ``store`` (mcp.tasks.store) every task is saved on each
+transition and, while it is pending or running, checked every
+``sync_interval`` seconds: a task whose progress moved is saved (summary,
+the checkpoint its worker keeps in ``task.checkpoint`` and the new
+results-log entries), the others are only heartbeaten. Store calls run
+on one dedicated thread, in submission order, never on the event loop.
+That gives:
+
+- Restart recovery: tasks interrupted by a crash or redeploy are claimed
+  by ``resume_interrupted`` (run periodically by ``start_recovery``) and
+  re-dispatched; workers continue after their last completed item.
+- Multi-worker visibility: a task runs in the process that accepted it,
+  but any process sharing the store can answer task_status /
+  task_result / task_list. Cancelling a task owned by another process
+  sets a flag that the owner picks up on its next sync.
 """
 
 from __future__ import annotations
 
 import asyncio
 import logging
+import os
+import socket
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Callable, Awaitable
 
+from ..config.settings import load_runtime_settings
+from ..metrics import TASK_DURATION, TASKS_FINISHED, TASKS_RESUMED, TASKS_RUNNING, TASKS_SUBMITTED
 from .models import Task, TaskProgress, TaskStatus, TaskType
+from .store import TaskSnapshot, TaskStore, build_task_store
 
 logger = logging.getLogger(__name__)
 
 # Type alias for worker coroutines
 WorkerFn = Callable[[Task], Awaitable[dict[str, Any]]]
 
+_TERMINAL = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+
+def _sync_state(task: Task) -> tuple[Any, ...]:
+    """What a sync compares to decide whether a task needs saving or just a heartbeat."""
+    progress = task.progress
+    return task.status, progress.total_items, progress.completed_items, progress.current_item, len(task.results_log)
+
 
 class TaskManager:
     """In-process async task manager.
 
     Stores tasks in memory and dispatches background workers via
-    ``asyncio.create_task``.  Designed for single-process deployments
-    (suitable for the Panelin MCP server's scale).
+    ``asyncio.create_task``. With a ``store`` the tasks are also persisted
+    there and survive restarts.
     """
 
-    def __init__(self, max_concurrent: int = 5, max_history: int = 100) -> None:
+    def __init__(
+        self,
+        max_concurrent: int = 5,
+        max_history: int = 100,
+        store: TaskStore | None = None,
+        sync_interval: float = 0.5,
+        stale_after: float = 10.0,
+    ) -> None:
         self._tasks: dict[str, Task] = {}
         self._workers: dict[TaskType, WorkerFn] = {}
         self._semaphore = asyncio.Semaphore(max_concurrent)
         self._max_history = max_history
         self._running_tasks: dict[str, asyncio.Task[None]] = {}
+        self._store = store
+        self._sync_interval = sync_interval
+        self._stale_after = stale_after
+        # Owner id written with every saved task: unique per manager instance
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._syncer: asyncio.Task[None] | None = None
+        self._recovery: asyncio.Task[None] | None = None
+        self._closing = False
+        # One thread for every store call: blocking SQLite stays off the
+        # event loop and writes land in the order they were made
+        self._store_thread = ThreadPoolExecutor(1, thread_name_prefix="task-store") if store is not None else None
+        # Sync state of each task at its last save by the sync loop
+        self._synced: dict[str, tuple[Any, ...]] = {}
+        # Stored tasks per status, refreshed on the store thread by status_counts
+        self._status_counts: dict[str, int] = {}
+        self._counts_refresh: Future[None] | None = None
 
     # ------------------------------------------------------------------
     # Worker registration
@@ -70,43 +124,130 @@ class TaskManager:
             arguments=arguments,
         )
         self._tasks[task_id] = task
+        await self._save(task)
+        TASKS_SUBMITTED.labels(task_type.value).inc()
 
         # Evict oldest completed tasks if history limit exceeded
-        self._evict_old_tasks()
-
-        # Dispatch the worker coroutine
-        asyncio_task = asyncio.create_task(self._run_worker(task, worker))
-        self._running_tasks[task_id] = asyncio_task
+        await self._evict_old_tasks()
 
+        self._dispatch(task, worker)
         logger.info("Submitted task %s (type=%s)", task_id, task_type.value)
         return task
 
+    def _dispatch(self, task: Task, worker: WorkerFn) -> None:
+        """Start the worker coroutine (and the store sync loop)."""
+        self._running_tasks[task.task_id] = asyncio.create_task(self._run_worker(task, worker))
+        if self._store is not None and (self._syncer is None or self._syncer.done()):
+            self._syncer = asyncio.create_task(self._sync_loop())
+
     # ------------------------------------------------------------------
     # Task queries
     # ------------------------------------------------------------------
 
-    def get_task(self, task_id: str) -> Task | None:
+    async def get_task(self, task_id: str) -> Task | None:
         """Retrieve a task by ID, or None if not found."""
-        return self._tasks.get(task_id)
+        task = self._tasks.get(task_id)
+        if task is None and self._store is not None:
+            task = await self._in_store(self._store.load, task_id)
+        return task
 
-    def list_tasks(
+    async def list_tasks(
         self,
         *,
         status: TaskStatus | None = None,
         task_type: TaskType | None = None,
         limit: int = 20,
     ) -> list[Task]:
-        """List tasks, optionally filtered by status and/or type."""
-        tasks = list(self._tasks.values())
+        """List tasks, optionally filtered by status and/or type.
 
-        if status is not None:
-            tasks = [t for t in tasks if t.status == status]
-        if task_type is not None:
-            tasks = [t for t in tasks if t.task_type == task_type]
+        Tasks read from the store (other processes, earlier runs) are
+        summaries without arguments, result or results log.
+        """
+        def matches(task: Task) -> bool:
+            return (status is None or task.status == status) and (task_type is None or task.task_type == task_type)
+
+        tasks = {task_id: t for task_id, t in self._tasks.items() if matches(t)}
+        if self._store is not None:
+            # Local tasks are saved too, but their stored status may lag:
+            # over-fetch by their number so filtering them out keeps ``limit``
+            stored = await self._in_store(self._store.list, status, task_type, limit + len(self._tasks))
+            tasks.update((t.task_id, t) for t in stored if t.task_id not in self._tasks)
 
         # Most recent first
-        tasks.sort(key=lambda t: t.created_at, reverse=True)
-        return tasks[:limit]
+        return sorted(tasks.values(), key=lambda t: t.created_at, reverse=True)[:limit]
+
+    def status_counts(self) -> dict[str, int]:
+        """Number of tasks per status value, for scrape-time gauges.
+
+        With a store this returns the counts last read on the store thread
+        (one indexed ``GROUP BY`` over every stored task) and schedules
+        the next read there, so a scrape never waits on SQLite; the values
+        are one call old.
+        """
+        if self._store is not None:
+            if not self._closing and (self._counts_refresh is None or self._counts_refresh.done()):
+                self._counts_refresh = self._store_thread.submit(self._refresh_status_counts)
+            return dict(self._status_counts)
+        counts: dict[str, int] = {}
+        for task in self._tasks.values():
+            counts[task.status.value] = counts.get(task.status.value, 0) + 1
+        return counts
+
+    def _refresh_status_counts(self) -> None:
+        """Re-read the stored status counts (store thread)."""
+        try:
+            self._status_counts = self._store.status_counts()
+        except Exception:  # noqa: BLE001 - keep the previous counts
+            logger.exception("Failed to count stored tasks")
+
+    async def get_summary(self, task_id: str) -> Task | None:
+        """A task's status and progress: the local task, or its stored summary.
+
+        Cheaper than ``get_task`` for tasks of other processes: the stored
+        arguments, result and results log are not read.
+        """
+        task = self._tasks.get(task_id)
+        if task is None and self._store is not None:
+            task = await self._in_store(self._store.load_summary, task_id)
+        return task
+
+    async def results_since(self, task: Task, offset: int, limit: int) -> list[dict[str, Any]]:
+        """Up to ``limit`` results-log entries of ``task`` from ``offset``, read from the store for summaries."""
+        if task.results_logged is None or self._store is None:
+            return task.results_since(offset, limit)
+        return await self._in_store(self._store.results_since, task.task_id, offset, limit)
+
+    async def wait_for_results(
+        self,
+        task_id: str,
+        offset: int,
+        limit: int,
+        timeout: float,
+        on_progress: Callable[[Task], Awaitable[None]] | None = None,
+        poll_interval: float = 0.1,
+    ) -> tuple[Task, list[dict[str, Any]]] | None:
+        """Wait until ``task_id`` has results-log entries past ``offset`` or finishes.
+
+        Returns the latest task state with up to ``limit`` entries from
+        ``offset``, at the latest after ``timeout`` seconds, or None if
+        the task does not exist. ``on_progress`` is awaited whenever the
+        task's progress or status changes meanwhile. Tasks owned by
+        another process are polled as stored summaries; their entries are
+        read once the wait ends.
+        """
+        deadline = time.monotonic() + timeout
+        seen = None
+        while True:
+            task = await self.get_summary(task_id)
+            if task is None:
+                return None
+            state = (task.status, task.progress.completed_items, task.progress.current_item)
+            if on_progress is not None and state != seen:
+                await on_progress(task)
+            seen = state
+            if task.results_count > offset or task.status in _TERMINAL or time.monotonic() >= deadline:
+                return task, await self.results_since(task, offset, limit)
+            await asyncio.sleep(min(poll_interval, max(deadline - time.monotonic(), 0)))
 
     # ------------------------------------------------------------------
     # Task cancellation
@@ -116,9 +257,9 @@ class TaskManager:
         """Cancel a pending or running task. Returns True if cancelled."""
         task = self._tasks.get(task_id)
         if task is None:
-            return False
+            return await self._cancel_remote(task_id)
 
-        if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
+        if task.status in _TERMINAL:
             return False  # Already terminal
 
         # Cancel the asyncio task if running
@@ -127,9 +268,131 @@ class TaskManager:
             asyncio_task.cancel()
 
         task.mark_cancelled()
+        await self._save(task)
         logger.info("Cancelled task %s", task_id)
         return True
 
+    async def _cancel_remote(self, task_id: str) -> bool:
+        """Flag a task owned by another process; its owner cancels it on the next sync."""
+        if self._store is None or not await self._in_store(self._store.request_cancel, task_id):
+            return False
+        logger.info("Requested cancellation of task %s owned by another process", task_id)
+        return True
+
+    # ------------------------------------------------------------------
+    # Durable store
+    # ------------------------------------------------------------------
+
+    async def _in_store(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking store call on the store thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._store_thread, fn, *args)
+
+    async def _save(self, task: Task) -> bool:
+        """Persist ``task``; False once another manager has taken it over."""
+        if self._store is None:
+            return True
+        try:
+            return await self._in_store(self._store.save, TaskSnapshot.of(task), self.instance_id)
+        except Exception:  # noqa: BLE001 - the task itself must not fail on a store error
+            logger.exception("Failed to save task %s", task.task_id)
+            return True
+
+    def _sync(self, changed: list[TaskSnapshot], idle: list[str]) -> set[str]:
+        """Save ``changed``, heartbeat ``idle``; returns the ids now owned elsewhere (store thread)."""
+        lost = {snapshot.task_id for snapshot in changed if not self._store.save(snapshot, self.instance_id)}
+        return lost | (set(idle) - self._store.heartbeat(idle, self.instance_id))
+
+    async def _sync_loop(self) -> None:
+        """Checkpoint and heartbeat local unfinished tasks; honour remote cancellation."""
+        while True:
+            await asyncio.sleep(self._sync_interval)
+            active = [t for t in self._tasks.values() if t.status not in _TERMINAL]
+            self._synced = {t.task_id: self._synced[t.task_id] for t in active if t.task_id in self._synced}
+            if not active:
+                return
+            try:
+                cancelled = await self._in_store(self._store.cancel_requested, [t.task_id for t in active])
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to read task cancellation flags")
+                cancelled = set()
+            for task_id in cancelled:
+                await self.cancel_task(task_id)
+
+            changed, idle, states = [], [], {}
+            for task in active:
+                if task.task_id in cancelled:
+                    continue
+                states[task.task_id] = state = _sync_state(task)
+                if self._synced.get(task.task_id) == state:
+                    idle.append(task.task_id)
+                else:
+                    changed.append(TaskSnapshot.of(task))
+            try:
+                lost = await self._in_store(self._sync, changed, idle)
+            except Exception:  # noqa: BLE001 - retried on the next round
+                logger.exception("Failed to sync tasks to the store")
+                continue
+            for snapshot in changed:
+                self._synced[snapshot.task_id] = states[snapshot.task_id]
+            for task_id in lost:
+                # Presumed dead and resumed elsewhere: stop the duplicate run
+                logger.warning("Task %s was taken over by another process", task_id)
+                self._tasks.pop(task_id, None)
+                asyncio_task = self._running_tasks.get(task_id)
+                if asyncio_task is not None:
+                    asyncio_task.cancel()
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    async def resume_interrupted(self) -> list[Task]:
+        """Claim tasks whose owner stopped heartbeating and resume them here.
+
+        Each task is re-dispatched with its stored checkpoint, so its
+        worker continues after the last completed item. Tasks with a
+        pending cancellation, or without a registered worker, are
+        finished instead.
+        """
+        if self._store is None:
+            return []
+        resumed = []
+        claimed = await self._in_store(self._store.claim_orphans, self.instance_id, self._stale_after)
+        for task, cancel in claimed:
+            worker = self._workers.get(task.task_type)
+            if cancel or worker is None:
+                if cancel:
+                    task.mark_cancelled()
+                else:
+                    task.mark_failed(f"No worker registered for task type: {task.task_type.value}")
+                await self._save(task)
+                continue
+            task.status = TaskStatus.PENDING
+            self._tasks[task.task_id] = task
+            await self._save(task)
+            TASKS_RESUMED.labels(task.task_type.value).inc()
+            self._dispatch(task, worker)
+            resumed.append(task)
+            logger.info(
+                "Resuming task %s at %d/%d items (attempt %d)",
+                task.task_id, task.progress.completed_items, task.progress.total_items, task.attempts + 1,
+            )
+        return resumed
+
+    def start_recovery(self, interval: float | None = None) -> None:
+        """Run ``resume_interrupted`` now and every ``interval`` seconds (default ``stale_after``)."""
+        if self._store is None or (self._recovery is not None and not self._recovery.done()):
+            return
+        self._recovery = asyncio.create_task(self._recovery_loop(interval or self._stale_after))
+
+    async def _recovery_loop(self, interval: float) -> None:
+        while True:
+            try:
+                await self.resume_interrupted()
+            except Exception:  # noqa: BLE001 - keep recovering on the next round
+                logger.exception("Task recovery failed")
+            await asyncio.sleep(interval)
+
     # ------------------------------------------------------------------
     # Internal worker execution
     # ------------------------------------------------------------------
@@ -138,31 +401,43 @@ class TaskManager:
         """Execute the worker within the concurrency semaphore."""
         async with self._semaphore:
             task.mark_running()
+            await self._save(task)
             logger.info("Running task %s", task.task_id)
+            task_type = task.task_type.value
+            running = TASKS_RUNNING.labels(task_type)
+            running.inc()
+            started = time.perf_counter()
 
             try:
                 result = await worker(task)
                 task.mark_completed(result)
+                task.checkpoint = None
                 logger.info("Task %s completed successfully", task.task_id)
             except asyncio.CancelledError:
-                task.mark_cancelled()
-                logger.info("Task %s was cancelled", task.task_id)
+                if self._closing and self._store is not None:
+                    # Left running with its checkpoint; the next start resumes it
+                    logger.info("Task %s interrupted by shutdown", task.task_id)
+                else:
+                    task.mark_cancelled()
+                    logger.info("Task %s was cancelled", task.task_id)
             except Exception as exc:
                 task.mark_failed(str(exc))
                 logger.error("Task %s failed: %s", task.task_id, exc, exc_info=True)
             finally:
                 self._running_tasks.pop(task.task_id, None)
+                if task.status in _TERMINAL:
+                    await self._save(task)
+                running.dec()
+                TASK_DURATION.labels(task_type).observe((time.perf_counter() - started) * 1000)
+                TASKS_FINISHED.labels(task_type, task.status.value).inc()
 
     # ------------------------------------------------------------------
     # History management
     # ------------------------------------------------------------------
 
-    def _evict_old_tasks(self) -> None:
+    async def _evict_old_tasks(self) -> None:
         """Remove oldest completed/failed/cancelled tasks beyond max_history."""
-        terminal = [
-            t for t in self._tasks.values()
-            if t.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
-        ]
+        terminal = [t for t in self._tasks.values() if t.status in _TERMINAL]
         if len(terminal) <= self._max_history:
             return
 
@@ -170,13 +445,26 @@ class TaskManager:
         to_evict = terminal[: len(terminal) - self._max_history]
         for t in to_evict:
             self._tasks.pop(t.task_id, None)
+        if self._store is not None:
+            try:
+                await self._in_store(self._store.prune, self._max_history)
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to prune the task store")
 
     # ------------------------------------------------------------------
     # Shutdown
     # ------------------------------------------------------------------
 
     async def shutdown(self) -> None:
-        """Cancel all running tasks and clean up."""
+        """Cancel all running tasks and clean up.
+
+        With a store, unfinished tasks are not marked cancelled: they are
+        released with their checkpoint so the next start resumes them.
+        """
+        self._closing = True
+        for loop_task in (self._syncer, self._recovery):
+            if loop_task is not None:
+                loop_task.cancel()
         for task_id, asyncio_task in list(self._running_tasks.items()):
             if not asyncio_task.done():
                 asyncio_task.cancel()
@@ -184,6 +472,11 @@ class TaskManager:
         if self._running_tasks:
             await asyncio.gather(*self._running_tasks.values(), return_exceptions=True)
         self._running_tasks.clear()
+        if self._store is not None:
+            for task in self._tasks.values():
+                if task.status not in _TERMINAL:
+                    await self._in_store(self._store.release, TaskSnapshot.of(task), self.instance_id)
+            self._store_thread.shutdown(wait=False)
         logger.info("Task manager shut down")
 
 
@@ -192,8 +485,15 @@ _manager: TaskManager | None = None
 
 
 def get_task_manager() -> TaskManager:
-    """Return the singleton TaskManager, creating it on first access."""
+    """Return the singleton TaskManager, creating it on first access.
+
+    Its store follows the ``tasks`` settings (MCP_TASK_STORE).
+    """
     global _manager
     if _manager is None:
-        _manager = TaskManager()
+        settings = load_runtime_settings().tasks
+        _manager = TaskManager(
+            store=build_task_store(settings.store, settings.sqlite_path),
+            stale_after=settings.stale_after_seconds,
+        )
     return _manager
@@ -2,6 +2,8 @@
 
 Defines the task lifecycle: pending -> running -> completed | failed | cancelled.
 Each task carries its type, input arguments, progress, and result/error.
+Workers also append each finished item to the task's results log, so
+clients can read partial results by offset while the task still runs.
 """
 
 from __future__ import annotations
@@ -67,10 +69,20 @@ class Task:
     created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
     started_at: str | None = None
     completed_at: str | None = None
+    # Worker-defined resume point, saved with the task so a restarted
+    # server continues after the last completed item
+    checkpoint: dict[str, Any] | None = None
+    attempts: int = 0
+    # Per-item results in completion order; offsets into it are stable
+    results_log: list[dict[str, Any]] = field(default_factory=list)
+    # Length of the results log for summaries read from the task store
+    # without it (``results_log`` is then empty)
+    results_logged: int | None = None
 
     def mark_running(self) -> None:
         """Transition task to running state."""
         self.status = TaskStatus.RUNNING
+        self.attempts += 1
         self.started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
     def mark_completed(self, result: dict[str, Any]) -> None:
@@ -90,6 +102,15 @@ class Task:
         self.status = TaskStatus.CANCELLED
         self.completed_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
+    @property
+    def results_count(self) -> int:
+        """Entries in the results log, also for summaries read without it."""
+        return len(self.results_log) if self.results_logged is None else self.results_logged
+
+    def results_since(self, offset: int, limit: int) -> list[dict[str, Any]]:
+        """Up to ``limit`` results-log entries starting at ``offset``."""
+        return self.results_log[offset:offset + limit]
+
     def to_summary(self) -> dict[str, Any]:
         """Return a lightweight summary (no result data)."""
         summary: dict[str, Any] = {
@@ -106,8 +127,53 @@ class Task:
             summary["progress"] = self.progress.to_dict()
         if self.error:
             summary["error"] = self.error
+        if self.attempts > 1:
+            summary["attempts"] = self.attempts
+        if self.results_count and self.status in (TaskStatus.PENDING, TaskStatus.RUNNING):
+            summary["results_available"] = self.results_count
         return summary
 
+    def to_record(self) -> dict[str, Any]:
+        """Every field as JSON-compatible data, for the task store."""
+        return {
+            "task_id": self.task_id,
+            "task_type": self.task_type.value,
+            "status": self.status.value,
+            "arguments": self.arguments,
+            "result": self.result,
+            "error": self.error,
+            "progress": {
+                "total_items": self.progress.total_items,
+                "completed_items": self.progress.completed_items,
+                "current_item": self.progress.current_item,
+            },
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "checkpoint": self.checkpoint,
+            "attempts": self.attempts,
+            "results_log": self.results_log,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> Task:
+        """Rebuild a task written by ``to_record``."""
+        return cls(
+            task_id=record["task_id"],
+            task_type=TaskType(record["task_type"]),
+            status=TaskStatus(record["status"]),
+            arguments=record.get("arguments") or {},
+            result=record.get("result"),
+            error=record.get("error"),
+            progress=TaskProgress(**(record.get("progress") or {})),
+            created_at=record["created_at"],
+            started_at=record.get("started_at"),
+            completed_at=record.get("completed_at"),
+            checkpoint=record.get("checkpoint"),
+            attempts=record.get("attempts", 0),
+            results_log=record.get("results_log") or [],
+        )
+
     def to_full_dict(self) -> dict[str, Any]:
         """Return full task data including result."""
         data = self.to_summary()
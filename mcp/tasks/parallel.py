@@ -0,0 +1,152 @@
+"""Bounded-parallel, chunked execution of item-level work inside a task.
+
+The TaskManager semaphore only limits how many tasks run at once; inside a
+task, batch workers split their items into chunks and run them with
+``run_chunks``. Each chunk goes through the execution layer
+(mcp.execution) in the ``BATCH`` class: a pool and limit of its own, so
+chunks queue behind each other rather than in front of interactive
+``price_check`` / ``bom_calculate`` calls on the CPU pool. Up to
+``concurrency`` chunks of one task are in flight; the batch limit caps
+them across tasks. The batch pool is a thread pool by default, which
+keeps the loop free but gives no multi-core speedup for these
+pure-Python chunks; set ``MCP_EXEC_BATCH_POOL=process`` to use every core.
+
+A batch BOM chunk is one ``calculate_bom_batch`` call, whose grouping
+only pays off within a chunk, so ``min_chunk_size`` keeps a batch of
+handler size (50 items) in a single chunk; only larger batches are split.
+
+Chunks finish in any order but are committed in order: each contiguous
+run of finished chunks is handed to ``on_commit`` (which logs results and
+checkpoints), so the results log stays ordered and a resumed task never
+skips an item. ``task.progress.completed_items`` counts every finished
+item, committed or not.
+
+Per task type settings (``DEFAULT_POLICIES``) can be overridden with
+MCP_TASK_CHUNK_SIZE_<TYPE> (the largest chunk), MCP_TASK_MIN_CHUNK_SIZE_<TYPE>
+and MCP_TASK_CONCURRENCY_<TYPE>, where <TYPE> is the upper-cased task type
+(e.g. ``MCP_TASK_CONCURRENCY_BULK_PRICE_CHECK``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+from dataclasses import dataclass, replace
+from typing import Any, Callable
+
+from ..execution import Handler, ToolExecutor, get_executor
+from .models import Task, TaskType
+
+logger = logging.getLogger(__name__)
+
+# (finished entries, index after them) -> None
+CommitFn = Callable[[list[dict[str, Any]], int], None]
+
+
+@dataclass(frozen=True)
+class ChunkPolicy:
+    """How one task type splits and parallelizes its items."""
+
+    # Tool whose execution policy (handler class, pool) the chunks run under
+    tool: str
+    # Largest chunk; a run uses smaller ones when that spreads its items
+    # over ``concurrency`` chunks, so even short batches run in parallel
+    # and commit incrementally
+    chunk_size: int
+    # Chunks of one task in flight at once
+    concurrency: int
+    # Smallest chunk a run spreads down to
+    min_chunk_size: int = 1
+
+
+# Matches the default batch lane (MCP_EXEC_BATCH_WORKERS)
+_LANE_WIDTH = max(1, (os.cpu_count() or 1) // 2)
+
+DEFAULT_POLICIES: dict[TaskType, ChunkPolicy] = {
+    TaskType.BULK_PRICING: ChunkPolicy("price_check.chunk", chunk_size=4, concurrency=_LANE_WIDTH),
+    TaskType.BATCH_BOM: ChunkPolicy(
+        "bom_calculate.chunk", chunk_size=200, concurrency=_LANE_WIDTH, min_chunk_size=50,
+    ),
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        logger.warning("Ignoring non-integer %s=%r", name, os.environ.get(name))
+        return default
+
+
+def get_chunk_policy(task_type: TaskType) -> ChunkPolicy:
+    """The chunk policy for ``task_type``, with environment overrides applied."""
+    policy = DEFAULT_POLICIES[task_type]
+    suffix = task_type.value.upper()
+    return replace(
+        policy,
+        chunk_size=_env_int(f"MCP_TASK_CHUNK_SIZE_{suffix}", policy.chunk_size),
+        min_chunk_size=_env_int(f"MCP_TASK_MIN_CHUNK_SIZE_{suffix}", policy.min_chunk_size),
+        concurrency=_env_int(f"MCP_TASK_CONCURRENCY_{suffix}", policy.concurrency),
+    )
+
+
+def chunk_size_for(remaining: int, policy: ChunkPolicy) -> int:
+    """Items per chunk: enough chunks to fill ``concurrency``, within the policy's bounds."""
+    spread = math.ceil(remaining / policy.concurrency)
+    return max(1, min(policy.chunk_size, max(policy.min_chunk_size, spread)))
+
+
+async def run_chunks(
+    task: Task,
+    items: list[Any],
+    start: int,
+    chunk_handler: Handler,
+    on_commit: CommitFn,
+    policy: ChunkPolicy | None = None,
+    executor: ToolExecutor | None = None,
+) -> None:
+    """Process ``items[start:]`` in parallel chunks, committing results in order.
+
+    ``chunk_handler`` receives ``{"start": index, "items": chunk}`` and must
+    return ``{"entries": [...]}`` with one entry per item; it runs in the
+    pool of ``policy.tool``, so with a process pool it must be picklable
+    (a module-level function). A chunk that raises fails the task.
+    """
+    policy = policy or get_chunk_policy(task.task_type)
+    executor = executor or get_executor()
+    chunk_size = chunk_size_for(len(items) - start, policy)
+    starts = iter(range(start, len(items), chunk_size))
+    in_flight: dict[asyncio.Future[dict[str, Any]], int] = {}
+    finished: dict[int, list[dict[str, Any]]] = {}
+    next_commit = start
+    done_items = start
+
+    def launch() -> bool:
+        chunk_start = next(starts, None)
+        if chunk_start is None:
+            return False
+        arguments = {"start": chunk_start, "items": items[chunk_start:chunk_start + chunk_size]}
+        in_flight[asyncio.ensure_future(executor.run(policy.tool, chunk_handler, arguments))] = chunk_start
+        return True
+
+    try:
+        while len(in_flight) < policy.concurrency and launch():
+            pass
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for job in done:
+                chunk_start = in_flight.pop(job)
+                entries = job.result()["entries"]
+                finished[chunk_start] = entries
+                done_items += len(entries)
+                launch()
+            while next_commit in finished:
+                entries = finished.pop(next_commit)
+                next_commit += len(entries)
+                on_commit(entries, next_commit)
+            task.progress.completed_items = done_items
+    finally:
+        for job in in_flight:
+            job.cancel()
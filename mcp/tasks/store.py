@@ -0,0 +1,410 @@
+"""Durable task storage for the TaskManager.
+
+``SQLiteTaskStore`` keeps one row per task in a WAL-mode SQLite file: its
+status, a small JSON summary (progress, timestamps, error), arguments,
+checkpoint and result, the id of the process that owns it and that
+owner's last heartbeat. The results log lives in an append-only child
+table (one row per entry, keyed by task and index), so saving a running
+task writes only its summary, checkpoint and the entries logged since the
+previous save; a task whose progress has not changed is only heartbeaten.
+
+Ownership makes the store safe to share between server processes (the
+multi-worker SSE mode) and across restarts: a pending/running task whose
+owner has not heartbeaten for ``stale_after`` seconds is an orphan, and
+``claim_orphans`` hands it to exactly one live manager, which resumes it
+from its checkpoint. Saves by a previous owner are ignored once the task
+has been claimed. A manager that shuts down hands its unfinished tasks
+back (``release``) so they are claimable immediately.
+
+Store calls block; the manager makes them from its store thread, writing
+``TaskSnapshot``s taken on the event loop. Requires SQLite 3.35+
+(``RETURNING``), checked when a store is created.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ..config.settings import load_runtime_settings
+from ..storage.shared_state import check_sqlite_version
+from .models import Task, TaskStatus, TaskType
+
+logger = logging.getLogger(__name__)
+
+STORE_MEMORY = "memory"
+STORE_SQLITE = "sqlite"
+
+_ACTIVE = (TaskStatus.PENDING.value, TaskStatus.RUNNING.value)
+_TERMINAL = (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value, TaskStatus.CANCELLED.value)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        task_id TEXT PRIMARY KEY,
+        task_type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        arguments TEXT NOT NULL,
+        checkpoint TEXT,
+        result TEXT,
+        log_length INTEGER NOT NULL DEFAULT 0,
+        owner TEXT,
+        heartbeat_at REAL NOT NULL,
+        cancel_requested INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created_at)",
+    "CREATE INDEX IF NOT EXISTS tasks_created ON tasks (created_at)",
+    """
+    CREATE TABLE IF NOT EXISTS task_results (
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        entry TEXT NOT NULL,
+        PRIMARY KEY (task_id, idx)
+    ) WITHOUT ROWID
+    """,
+)
+
+_TASK_COLUMNS = "task_id, task_type, status, created_at, summary, arguments, checkpoint, result"
+_SUMMARY_COLUMNS = "task_id, task_type, status, created_at, summary, log_length"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+@dataclass(frozen=True)
+class TaskSnapshot:
+    """A task's mutable state captured on the event loop, for writing from the store thread.
+
+    Workers update the log and checkpoint together between awaits, so a
+    snapshot always pairs a checkpoint with the log length it was taken
+    at. The log itself is only appended to; entries below ``log_length``
+    are read from ``task`` at write time.
+    """
+
+    task: Task
+    status: str
+    summary: str
+    checkpoint: str | None
+    log_length: int
+
+    @classmethod
+    def of(cls, task: Task) -> TaskSnapshot:
+        summary = {
+            "progress": {
+                "total_items": task.progress.total_items,
+                "completed_items": task.progress.completed_items,
+                "current_item": task.progress.current_item,
+            },
+            "started_at": task.started_at,
+            "completed_at": task.completed_at,
+            "error": task.error,
+            "attempts": task.attempts,
+        }
+        checkpoint = None if task.checkpoint is None else _dumps(task.checkpoint)
+        return cls(task, task.status.value, _dumps(summary), checkpoint, len(task.results_log))
+
+    @property
+    def task_id(self) -> str:
+        return self.task.task_id
+
+
+class TaskStore:
+    """Persistence interface used by ``TaskManager``."""
+
+    def save(self, snapshot: TaskSnapshot, owner: str) -> bool:
+        """Upsert the task as owned by ``owner``; False when another owner holds it."""
+        raise NotImplementedError
+
+    def heartbeat(self, task_ids: list[str], owner: str) -> set[str]:
+        """Refresh ``owner``'s heartbeat on ``task_ids``; returns the ids it still owns."""
+        raise NotImplementedError
+
+    def release(self, snapshot: TaskSnapshot, owner: str) -> bool:
+        """Save the task and give up ownership so the next ``claim_orphans`` takes it at once."""
+        raise NotImplementedError
+
+    def load(self, task_id: str) -> Task | None:
+        raise NotImplementedError
+
+    def list(
+        self, status: TaskStatus | None = None, task_type: TaskType | None = None, limit: int = 20
+    ) -> list[Task]:
+        """Newest tasks first, as summaries: no arguments, checkpoint, result or results log."""
+        raise NotImplementedError
+
+    def status_counts(self) -> dict[str, int]:
+        """Number of stored tasks per status value."""
+        raise NotImplementedError
+
+    def load_summary(self, task_id: str) -> Task | None:
+        """One task as a summary, like ``list`` returns it."""
+        raise NotImplementedError
+
+    def results_since(self, task_id: str, offset: int, limit: int) -> list[dict[str, Any]]:
+        """Up to ``limit`` results-log entries of ``task_id`` starting at ``offset``."""
+        raise NotImplementedError
+
+    def request_cancel(self, task_id: str) -> bool:
+        """Flag a pending/running task for cancellation; False when it is not active."""
+        raise NotImplementedError
+
+    def cancel_requested(self, task_ids: list[str]) -> set[str]:
+        """Which of ``task_ids`` have a cancellation request."""
+        raise NotImplementedError
+
+    def claim_orphans(self, owner: str, stale_after: float) -> list[tuple[Task, bool]]:
+        """Take over active tasks whose owner stopped heartbeating.
+
+        Returns ``(task, cancel_requested)`` pairs now owned by ``owner``.
+        """
+        raise NotImplementedError
+
+    def prune(self, keep: int) -> int:
+        """Delete all but the ``keep`` newest finished tasks; returns the count removed."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteTaskStore(TaskStore):
+    """Task store in one SQLite file (WAL mode), shareable between processes."""
+
+    def __init__(self, path: str | Path, timeout: float = 5.0) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        check_sqlite_version()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self) -> contextlib.AbstractContextManager[sqlite3.Connection]:
+        return _immediate(self._conn())
+
+    def save(self, snapshot: TaskSnapshot, owner: str) -> bool:
+        with self._transaction() as conn:
+            return _write(conn, snapshot, owner)
+
+    def heartbeat(self, task_ids: list[str], owner: str) -> set[str]:
+        if not task_ids:
+            return set()
+        rows = self._conn().execute(
+            f"UPDATE tasks SET heartbeat_at = ? WHERE owner = ? AND task_id IN ({_placeholders(task_ids)}) "
+            "RETURNING task_id",
+            (time.time(), owner, *task_ids),
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def release(self, snapshot: TaskSnapshot, owner: str) -> bool:
+        with self._transaction() as conn:
+            if not _write(conn, snapshot, owner):
+                return False
+            conn.execute("UPDATE tasks SET owner = NULL, heartbeat_at = 0 WHERE task_id = ?", (snapshot.task_id,))
+        return True
+
+    def load(self, task_id: str) -> Task | None:
+        conn = self._conn()
+        row = conn.execute(f"SELECT {_TASK_COLUMNS} FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return None if row is None else _task_from_row(conn, row)
+
+    def list(
+        self, status: TaskStatus | None = None, task_type: TaskType | None = None, limit: int = 20
+    ) -> list[Task]:
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status.value)
+        if task_type is not None:
+            clauses.append("task_type = ?")
+            params.append(task_type.value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM tasks {where} ORDER BY created_at DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [_summary_from_row(row) for row in rows]
+
+    def load_summary(self, task_id: str) -> Task | None:
+        row = self._conn().execute(f"SELECT {_SUMMARY_COLUMNS} FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return None if row is None else _summary_from_row(row)
+
+    def results_since(self, task_id: str, offset: int, limit: int) -> list[dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT entry FROM task_results WHERE task_id = ? AND idx >= ? ORDER BY idx LIMIT ?",
+            (task_id, offset, limit),
+        ).fetchall()
+        return [json.loads(entry) for entry, in rows]
+
+    def status_counts(self) -> dict[str, int]:
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    def request_cancel(self, task_id: str) -> bool:
+        cursor = self._conn().execute(
+            f"UPDATE tasks SET cancel_requested = 1 WHERE task_id = ? AND status IN ({_placeholders(_ACTIVE)})",
+            (task_id, *_ACTIVE),
+        )
+        return cursor.rowcount == 1
+
+    def cancel_requested(self, task_ids: list[str]) -> set[str]:
+        if not task_ids:
+            return set()
+        rows = self._conn().execute(
+            f"SELECT task_id FROM tasks WHERE cancel_requested = 1 AND task_id IN ({_placeholders(task_ids)})",
+            task_ids,
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def claim_orphans(self, owner: str, stale_after: float) -> list[tuple[Task, bool]]:
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {_TASK_COLUMNS}, cancel_requested FROM tasks
+                WHERE status IN ({_placeholders(_ACTIVE)}) AND heartbeat_at < ?
+                    AND (owner IS NULL OR owner != ?)
+                ORDER BY created_at
+                """,
+                (*_ACTIVE, now - stale_after, owner),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET owner = ?, heartbeat_at = ? WHERE task_id = ?",
+                [(owner, now, row[0]) for row in rows],
+            )
+            return [(_task_from_row(conn, row[:-1]), bool(row[-1])) for row in rows]
+
+    def prune(self, keep: int) -> int:
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"""
+                DELETE FROM tasks WHERE status IN ({_placeholders(_TERMINAL)}) AND task_id NOT IN (
+                    SELECT task_id FROM tasks WHERE status IN ({_placeholders(_TERMINAL)})
+                    ORDER BY created_at DESC LIMIT ?
+                )
+                RETURNING task_id
+                """,
+                (*_TERMINAL, *_TERMINAL, keep),
+            ).fetchall()
+            conn.executemany("DELETE FROM task_results WHERE task_id = ?", rows)
+        return len(rows)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+
+
+@contextlib.contextmanager
+def _immediate(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _write(conn: sqlite3.Connection, snapshot: TaskSnapshot, owner: str) -> bool:
+    """Upsert a snapshot and append its new log entries, inside a transaction."""
+    task = snapshot.task
+    result = None if task.result is None else _dumps(task.result)
+    row = conn.execute("SELECT owner, log_length FROM tasks WHERE task_id = ?", (task.task_id,)).fetchone()
+    if row is None:
+        logged = 0
+        conn.execute(
+            """
+            INSERT INTO tasks (task_id, task_type, status, created_at, summary, arguments, checkpoint, result,
+                               log_length, owner, heartbeat_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (task.task_id, task.task_type.value, snapshot.status, task.created_at, snapshot.summary,
+             _dumps(task.arguments), snapshot.checkpoint, result, snapshot.log_length, owner, time.time()),
+        )
+    elif row[0] != owner:
+        return False
+    else:
+        logged = row[1]
+        conn.execute(
+            """
+            UPDATE tasks SET status = ?, summary = ?, checkpoint = ?, result = ?, log_length = MAX(log_length, ?),
+                heartbeat_at = ?
+            WHERE task_id = ?
+            """,
+            (snapshot.status, snapshot.summary, snapshot.checkpoint, result, snapshot.log_length, time.time(),
+             task.task_id),
+        )
+    if snapshot.log_length > logged:
+        conn.executemany(
+            "INSERT OR REPLACE INTO task_results (task_id, idx, entry) VALUES (?, ?, ?)",
+            [(task.task_id, idx, _dumps(task.results_log[idx])) for idx in range(logged, snapshot.log_length)],
+        )
+    return True
+
+
+def _task_from_row(conn: sqlite3.Connection, row: tuple[Any, ...]) -> Task:
+    """Rebuild a task from a ``_TASK_COLUMNS`` row and its results log."""
+    task_id, task_type, status, created_at, summary, arguments, checkpoint, result = row
+    log = conn.execute("SELECT entry FROM task_results WHERE task_id = ? ORDER BY idx", (task_id,)).fetchall()
+    return Task.from_record({
+        **json.loads(summary),
+        "task_id": task_id,
+        "task_type": task_type,
+        "status": status,
+        "created_at": created_at,
+        "arguments": json.loads(arguments),
+        "checkpoint": None if checkpoint is None else json.loads(checkpoint),
+        "result": None if result is None else json.loads(result),
+        "results_log": [json.loads(entry) for entry, in log],
+    })
+
+
+def _summary_from_row(row: tuple[Any, ...]) -> Task:
+    """A task without arguments, checkpoint, result or log from a ``_SUMMARY_COLUMNS`` row."""
+    task_id, task_type, status, created_at, summary, log_length = row
+    task = Task.from_record(
+        {**json.loads(summary), "task_id": task_id, "task_type": task_type, "status": status, "created_at": created_at}
+    )
+    task.results_logged = log_length
+    return task
+
+
+def _placeholders(values: tuple[str, ...] | list[str]) -> str:
+    return ", ".join("?" * len(values))
+
+
+def build_task_store(backend: str | None = None, path: str | Path | None = None) -> TaskStore | None:
+    """Store for ``backend`` (default: the ``tasks`` settings); None keeps tasks in memory only."""
+    if backend is None or (backend == STORE_SQLITE and path is None):
+        settings = load_runtime_settings().tasks
+        backend = backend or settings.store
+        path = path or settings.sqlite_path
+    if backend == STORE_SQLITE:
+        return SQLiteTaskStore(path)
+    if backend != STORE_MEMORY:
+        logger.warning("Unknown task store %r; keeping tasks in memory", backend)
+    return None
@@ -24,8 +24,9 @@ import mcp.tasks.manager as manager_mod
 
 
 @pytest.fixture(autouse=True)
-def reset_task_manager():
+def reset_task_manager(monkeypatch):
     """Reset the singleton task manager before each test."""
+    monkeypatch.setenv("MCP_TASK_STORE", "memory")
     manager_mod._manager = None
     manager = get_task_manager()
     manager.register_worker(TaskType.BATCH_BOM, batch_bom_worker)
@@ -269,3 +270,78 @@ async def test_handle_task_cancel_empty():
     """Test cancel with empty task_id."""
     result = await handle_task_cancel({"task_id": ""})
     assert "error" in result
+
+
+async def _streaming_worker(task):
+    """Logs one result per release of the task's gate."""
+    task.progress.total_items = 3
+    for index in range(3):
+        await _gates[task.task_id].get()
+        task.results_log.append({"index": index, "value": index * 2})
+        task.progress.completed_items = index + 1
+        task.progress.current_item = f"item {index}"
+    return {"done": True}
+
+
+_gates: dict = {}
+
+
+@pytest.mark.asyncio
+async def test_task_result_with_offset_returns_partial_results():
+    """Partial results are readable by offset while the task runs."""
+    manager = get_task_manager()
+    manager.register_worker(TaskType.BULK_PRICING, _streaming_worker)
+    task = await manager.submit(TaskType.BULK_PRICING, {"queries": []})
+    gate = _gates[task.task_id] = asyncio.Queue()
+    gate.put_nowait(None)
+    await asyncio.sleep(0.01)
+
+    page = await handle_task_result({"task_id": task.task_id, "offset": 0})
+    assert page["status"] == "running"
+    assert page["items"] == [{"index": 0, "value": 0}]
+    assert page["next_offset"] == 1 and page["complete"] is False
+    assert (await handle_task_status({"task_id": task.task_id}))["results_available"] == 1
+
+    gate.put_nowait(None)
+    gate.put_nowait(None)
+    await asyncio.sleep(0.01)
+    page = await handle_task_result({"task_id": task.task_id, "offset": 1, "limit": 1})
+    assert page["items"] == [{"index": 1, "value": 2}] and page["complete"] is False
+    page = await handle_task_result({"task_id": task.task_id, "offset": 2})
+    assert page["status"] == "completed" and page["complete"] is True
+
+    assert "error" in await handle_task_result({"task_id": task.task_id, "offset": -1})
+
+
+@pytest.mark.asyncio
+async def test_task_watch_waits_for_new_results_and_reports_progress():
+    """task_watch returns once results pass the offset, sending progress meanwhile."""
+    from mcp import progress
+    from mcp.handlers.tasks import handle_task_watch
+
+    manager = get_task_manager()
+    manager.register_worker(TaskType.BULK_PRICING, _streaming_worker)
+    task = await manager.submit(TaskType.BULK_PRICING, {"queries": []})
+    gate = _gates[task.task_id] = asyncio.Queue()
+    notifications = []
+
+    async def reporter(value, total, message):
+        notifications.append((value, total, message))
+
+    token = progress.bind(reporter)
+    try:
+        watch = asyncio.create_task(handle_task_watch({"task_id": task.task_id, "offset": 0, "timeout_s": 5}))
+        await asyncio.sleep(0.05)
+        assert not watch.done()
+        gate.put_nowait(None)
+        page = await watch
+    finally:
+        progress.unbind(token)
+
+    assert page["items"] == [{"index": 0, "value": 0}]
+    assert notifications[-1] == (1, 3, "item 0")
+
+    timed_out = await handle_task_watch({"task_id": task.task_id, "offset": 1, "timeout_s": 0})
+    assert timed_out["items"] == [] and timed_out["next_offset"] == 1
+    assert "error" in await handle_task_watch({"task_id": "TASK-NONEXIST", "timeout_s": 0})
+    await manager.cancel_task(task.task_id)
@@ -80,14 +80,14 @@ async def test_submit_failing_worker(manager):
 async def test_get_task_found(manager):
     """Test retrieving a task by ID."""
     task = await manager.submit(TaskType.BATCH_BOM, {})
-    found = manager.get_task(task.task_id)
+    found = await manager.get_task(task.task_id)
     assert found is task
 
 
 @pytest.mark.asyncio
 async def test_get_task_not_found(manager):
     """Test retrieving a non-existent task."""
-    assert manager.get_task("TASK-NONEXIST") is None
+    assert await manager.get_task("TASK-NONEXIST") is None
 
 
 @pytest.mark.asyncio
@@ -98,13 +98,24 @@ async def test_list_tasks(manager):
 
     await asyncio.sleep(0.1)
 
-    all_tasks = manager.list_tasks()
+    all_tasks = await manager.list_tasks()
     assert len(all_tasks) == 2
 
-    completed = manager.list_tasks(status=TaskStatus.COMPLETED)
+    completed = await manager.list_tasks(status=TaskStatus.COMPLETED)
     assert len(completed) == 2
 
 
+@pytest.mark.asyncio
+async def test_status_counts(manager):
+    """Test per-status counts used by the metrics gauges."""
+    await manager.submit(TaskType.BATCH_BOM, {})
+    await manager.submit(TaskType.FULL_QUOTATION, {})  # will fail
+
+    await asyncio.sleep(0.1)
+
+    assert manager.status_counts() == {"completed": 1, "failed": 1}
+
+
 @pytest.mark.asyncio
 async def test_list_tasks_by_type(manager):
     """Test listing tasks filtered by type."""
@@ -113,7 +124,7 @@ async def test_list_tasks_by_type(manager):
 
     await asyncio.sleep(0.1)
 
-    bom_only = manager.list_tasks(task_type=TaskType.BATCH_BOM)
+    bom_only = await manager.list_tasks(task_type=TaskType.BATCH_BOM)
     assert len(bom_only) == 1
     assert bom_only[0].task_type == TaskType.BATCH_BOM
 
@@ -175,7 +186,7 @@ async def test_eviction(manager):
     await asyncio.sleep(0.2)
 
     # After eviction, only max_history completed tasks + any non-terminal should remain
-    all_tasks = m.list_tasks(limit=100)
+    all_tasks = await m.list_tasks(limit=100)
     assert len(all_tasks) <= 5  # At most 5 since some may be evicted on next submit
 
 
@@ -0,0 +1,118 @@
+"""Tests for chunked, bounded-parallel item execution inside tasks."""
+
+import asyncio
+
+import pytest
+
+from mcp.execution import ExecutionPolicy, HandlerClass, ToolExecutor
+from mcp.tasks.models import Task, TaskType
+from mcp.tasks.parallel import ChunkPolicy, chunk_size_for, get_chunk_policy, run_chunks
+
+
+def _executor():
+    return ToolExecutor(policies={"chunk": ExecutionPolicy(HandlerClass.ASYNC)})
+
+
+def _task():
+    return Task(task_id="TASK-PARALLEL", task_type=TaskType.BULK_PRICING)
+
+
+@pytest.mark.asyncio
+async def test_chunks_run_in_parallel_and_commit_in_order():
+    in_flight = peak = 0
+
+    async def chunk_handler(arguments):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later chunks finish first
+        await asyncio.sleep(0.03 - arguments["start"] * 0.001)
+        in_flight -= 1
+        return {"entries": [{"index": arguments["start"] + i, "value": item * 2}
+                            for i, item in enumerate(arguments["items"])]}
+
+    task = _task()
+    commits = []
+    await run_chunks(
+        task, list(range(23)), 0, chunk_handler, lambda entries, next_index: commits.append((entries, next_index)),
+        policy=ChunkPolicy("chunk", chunk_size=5, concurrency=3), executor=_executor(),
+    )
+
+    assert peak == 3
+    assert [next_index for _, next_index in commits] == [5, 10, 15, 20, 23]
+    logged = [entry for entries, _ in commits for entry in entries]
+    assert [entry["index"] for entry in logged] == list(range(23))
+    assert logged[22]["value"] == 44
+    assert task.progress.completed_items == 23
+
+
+@pytest.mark.asyncio
+async def test_resume_start_and_progress_counts_uncommitted_items():
+    release_first = asyncio.Event()
+    progress_seen = []
+
+    async def chunk_handler(arguments):
+        if arguments["start"] == 4:
+            await release_first.wait()
+        return {"entries": [{"index": arguments["start"] + i} for i in range(len(arguments["items"]))]}
+
+    task = _task()
+    commits = []
+    run = asyncio.create_task(run_chunks(
+        task, list(range(10)), 4, chunk_handler, lambda entries, next_index: commits.append(next_index),
+        policy=ChunkPolicy("chunk", chunk_size=2, concurrency=3), executor=_executor(),
+    ))
+    await asyncio.sleep(0.01)
+    # Chunks 6-7 and 8-9 are done but wait behind chunk 4-5
+    progress_seen.append(task.progress.completed_items)
+    assert commits == []
+    release_first.set()
+    await run
+    assert progress_seen == [8]
+    assert commits == [6, 8, 10]
+
+
+@pytest.mark.asyncio
+async def test_failing_chunk_fails_the_run():
+    async def chunk_handler(arguments):
+        if arguments["start"] == 2:
+            raise RuntimeError("boom")
+        await asyncio.sleep(0.01)
+        return {"entries": [{} for _ in arguments["items"]]}
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await run_chunks(
+            _task(), list(range(8)), 0, chunk_handler, lambda entries, next_index: None,
+            policy=ChunkPolicy("chunk", chunk_size=2, concurrency=4), executor=_executor(),
+        )
+
+
+def test_chunk_policy_env_overrides(monkeypatch):
+    monkeypatch.setenv("MCP_TASK_CHUNK_SIZE_BULK_PRICE_CHECK", "3")
+    monkeypatch.setenv("MCP_TASK_CONCURRENCY_BULK_PRICE_CHECK", "bogus")
+    policy = get_chunk_policy(TaskType.BULK_PRICING)
+    assert policy.tool == "price_check.chunk"
+    assert policy.chunk_size == 3
+    assert policy.concurrency >= 1
+
+
+def test_chunk_size_spreads_items_over_concurrency():
+    policy = ChunkPolicy("chunk", chunk_size=8, concurrency=4)
+    assert chunk_size_for(50, policy) == 8
+    assert chunk_size_for(10, policy) == 3
+    assert chunk_size_for(2, policy) == 1
+    assert chunk_size_for(0, policy) == 1
+
+
+def test_min_chunk_size_keeps_small_batches_whole():
+    policy = ChunkPolicy("chunk", chunk_size=200, concurrency=4, min_chunk_size=50)
+    assert chunk_size_for(50, policy) == 50
+    assert chunk_size_for(30, policy) == 50
+    assert chunk_size_for(400, policy) == 100
+    assert chunk_size_for(2000, policy) == 200
+
+
+def test_default_policies_use_the_batch_lane():
+    for task_type in (TaskType.BATCH_BOM, TaskType.BULK_PRICING):
+        tool = get_chunk_policy(task_type).tool
+        assert ToolExecutor().policy(tool).handler_class is HandlerClass.BATCH
@@ -0,0 +1,277 @@
+"""Tests for the durable task store and task recovery."""
+
+import asyncio
+
+import pytest
+
+from mcp.tasks import workers
+from mcp.tasks.manager import TaskManager
+from mcp.tasks.models import Task, TaskStatus, TaskType
+from mcp.tasks.store import SQLiteTaskStore, TaskSnapshot, build_task_store
+from mcp.tasks.workers import bulk_pricing_worker
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteTaskStore(tmp_path / "tasks.sqlite3")
+    yield store
+    store.close()
+
+
+def _resumable_worker(processed: list[int], gate: asyncio.Event):
+    """Counts items 0..3, pausing on ``gate`` before item 2."""
+
+    async def worker(task: Task) -> dict:
+        task.progress.total_items = 4
+        done = list((task.checkpoint or {}).get("done", []))
+        for index in range(len(done), 4):
+            if index == 2:
+                await gate.wait()
+            processed.append(index)
+            done.append(index * 10)
+            task.progress.completed_items = index + 1
+            task.checkpoint = {"done": done}
+            await asyncio.sleep(0)
+        return {"done": done}
+
+    return worker
+
+
+def test_store_round_trip_and_ownership(store):
+    task = Task(task_id="TASK-1", task_type=TaskType.BULK_PRICING, arguments={"queries": [1]})
+    task.checkpoint = {"next_index": 1}
+    task.results_log.append({"index": 0})
+    assert store.save(TaskSnapshot.of(task), "a") is True
+    assert store.load("TASK-1").to_record() == task.to_record()
+    assert store.load("TASK-X") is None
+
+    # Another owner cannot overwrite it, nor heartbeat it
+    task.mark_running()
+    assert store.save(TaskSnapshot.of(task), "b") is False
+    assert store.load("TASK-1").status == TaskStatus.PENDING
+    assert store.heartbeat(["TASK-1"], "b") == set()
+    assert store.heartbeat(["TASK-1", "TASK-X"], "a") == {"TASK-1"}
+
+    assert store.request_cancel("TASK-1") is True
+    assert store.cancel_requested(["TASK-1", "TASK-X"]) == {"TASK-1"}
+
+    for index in range(3):
+        finished = Task(task_id=f"TASK-F{index}", task_type=TaskType.BATCH_BOM)
+        finished.results_log.append({"index": 0})
+        finished.mark_completed({})
+        store.save(TaskSnapshot.of(finished), "a")
+    assert store.prune(keep=1) == 2
+    remaining = [t.task_id for t in store.list()]
+    assert len(remaining) == 2 and "TASK-1" in remaining
+    assert store._conn().execute("SELECT COUNT(*) FROM task_results").fetchone()[0] == 2
+
+
+def test_list_filters_in_sql_and_returns_summaries(store):
+    for index, task_type in enumerate([TaskType.BATCH_BOM, TaskType.BULK_PRICING, TaskType.BATCH_BOM]):
+        task = Task(task_id=f"TASK-{index}", task_type=task_type, arguments={"items": [index]},
+                    created_at=f"2026-01-0{index + 1}T00:00:00Z")
+        task.results_log = [{"index": 0}, {"index": 1}]
+        if index == 2:
+            task.mark_running()
+        store.save(TaskSnapshot.of(task), "a")
+
+    listed = store.list(task_type=TaskType.BATCH_BOM, limit=5)
+    assert [t.task_id for t in listed] == ["TASK-2", "TASK-0"]
+    assert listed[0].arguments == {} and listed[0].results_log == []
+    assert listed[0].to_summary()["results_available"] == 2
+    assert [t.task_id for t in store.list(status=TaskStatus.PENDING, limit=1)] == ["TASK-1"]
+    assert store.status_counts() == {"pending": 2, "running": 1}
+
+
+@pytest.mark.asyncio
+async def test_manager_status_counts_are_read_on_the_store_thread(store):
+    manager = TaskManager(store=store)
+    task = Task(task_id="TASK-COUNT", task_type=TaskType.BATCH_BOM)
+    store.save(TaskSnapshot.of(task), "other")
+
+    assert manager.status_counts() == {}
+    await asyncio.wrap_future(manager._counts_refresh)
+    assert manager.status_counts() == {"pending": 1}
+    await manager.shutdown()
+
+
+def test_save_appends_only_new_log_entries(store):
+    task = Task(task_id="TASK-LOG", task_type=TaskType.BULK_PRICING, arguments={"queries": [1, 2, 3]})
+    task.results_log.append({"index": 0})
+    store.save(TaskSnapshot.of(task), "a")
+
+    statements = []
+    store._conn().set_trace_callback(statements.append)
+    snapshot = TaskSnapshot.of(task)
+    # Entries logged after the snapshot belong to the next save
+    task.results_log.extend([{"index": 1}, {"index": 2}])
+    task.checkpoint = {"next_index": 3}
+    store.save(snapshot, "a")
+    store.save(TaskSnapshot.of(task), "a")
+    store._conn().set_trace_callback(None)
+
+    inserts = [sql for sql in statements if "task_results" in sql]
+    assert len(inserts) == 2 and all("arguments" not in sql for sql in statements if "UPDATE" in sql)
+    loaded = store.load("TASK-LOG")
+    assert [entry["index"] for entry in loaded.results_log] == [0, 1, 2]
+    assert loaded.checkpoint == {"next_index": 3}
+
+
+def test_build_task_store_selects_backend(tmp_path):
+    assert build_task_store("memory") is None
+    assert isinstance(build_task_store("sqlite", tmp_path / "t.db"), SQLiteTaskStore)
+
+
+@pytest.mark.asyncio
+async def test_tasks_are_visible_and_cancellable_across_managers(store):
+    owner = TaskManager(store=store, sync_interval=0.01)
+    other = TaskManager(store=store)
+    release = asyncio.Event()
+
+    async def worker(task):
+        task.progress.total_items = 2
+        task.progress.completed_items = 1
+        await release.wait()
+        return {"ok": True}
+
+    owner.register_worker(TaskType.BULK_PRICING, worker)
+    task = await owner.submit(TaskType.BULK_PRICING, {"queries": []})
+    await asyncio.sleep(0.05)
+
+    remote = await other.get_task(task.task_id)
+    assert remote.status == TaskStatus.RUNNING
+    assert remote.progress.completed_items == 1
+    assert [t.task_id for t in await other.list_tasks()] == [task.task_id]
+
+    assert await other.cancel_task(task.task_id) is True
+    await asyncio.sleep(0.05)
+    assert task.status == TaskStatus.CANCELLED
+    assert (await other.get_task(task.task_id)).status == TaskStatus.CANCELLED
+    assert await other.cancel_task(task.task_id) is False
+
+
+@pytest.mark.asyncio
+async def test_sync_saves_changed_tasks_and_heartbeats_idle_ones(store, monkeypatch):
+    saves, heartbeats = [], []
+    save, heartbeat = store.save, store.heartbeat
+    monkeypatch.setattr(store, "save", lambda snapshot, owner: saves.append(snapshot.status) or save(snapshot, owner))
+    monkeypatch.setattr(store, "heartbeat", lambda ids, owner: heartbeats.append(ids) or heartbeat(ids, owner))
+    manager = TaskManager(store=store, sync_interval=0.01)
+    release = asyncio.Event()
+
+    async def worker(task):
+        task.progress.completed_items = 1
+        await release.wait()
+        return {}
+
+    manager.register_worker(TaskType.BULK_PRICING, worker)
+    task = await manager.submit(TaskType.BULK_PRICING, {})
+    await asyncio.sleep(0.1)
+    # submit, mark_running, then one sync save for the progress change
+    assert saves == ["pending", "running", "running"]
+    assert len(heartbeats) >= 3 and all(ids == [task.task_id] for ids in heartbeats if ids)
+    release.set()
+    await asyncio.sleep(0.02)
+    assert saves[-1] == "completed"
+    await manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_waiting_on_a_remote_task_polls_summaries_and_reads_one_page(store, monkeypatch):
+    owner = TaskManager(store=store, sync_interval=0.01)
+    watcher = TaskManager(store=store)
+    release = asyncio.Event()
+
+    async def worker(task):
+        await release.wait()
+        task.results_log.extend({"index": index} for index in range(5))
+        task.progress.completed_items = 5
+        await asyncio.sleep(1)
+        return {}
+
+    owner.register_worker(TaskType.BULK_PRICING, worker)
+    task = await owner.submit(TaskType.BULK_PRICING, {})
+    monkeypatch.setattr(store, "load", lambda task_id: pytest.fail("full task loaded"))
+    waiting = asyncio.create_task(watcher.wait_for_results(task.task_id, 1, 2, timeout=2, poll_interval=0.01))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    found, items = await waiting
+    assert found.status == TaskStatus.RUNNING and found.results_count == 5
+    assert items == [{"index": 1}, {"index": 2}]
+    await owner.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_orphaned_task_resumes_from_checkpoint(store):
+    processed: list[int] = []
+    stuck, free = asyncio.Event(), asyncio.Event()
+    free.set()
+
+    crashed = TaskManager(store=store, sync_interval=0.01)
+    crashed.register_worker(TaskType.BULK_PRICING, _resumable_worker(processed, stuck))
+    task = await crashed.submit(TaskType.BULK_PRICING, {})
+    await asyncio.sleep(0.05)
+    assert store.load(task.task_id).checkpoint == {"done": [0, 10]}
+
+    # The owner stops heartbeating (a crash) with its worker blocked on item 2
+    crashed._syncer.cancel()
+    survivor = TaskManager(store=store, stale_after=0.05)
+    survivor.register_worker(TaskType.BULK_PRICING, _resumable_worker(processed, free))
+    assert await survivor.resume_interrupted() == []
+    await asyncio.sleep(0.1)
+
+    resumed = await survivor.resume_interrupted()
+    assert [t.task_id for t in resumed] == [task.task_id]
+    await asyncio.sleep(0.05)
+    finished = await survivor.get_task(task.task_id)
+    assert finished.status == TaskStatus.COMPLETED
+    assert finished.result == {"done": [0, 10, 20, 30]}
+    assert finished.attempts == 2
+    assert processed == [0, 1, 2, 3]
+
+    # The stale owner's late writes are ignored
+    await crashed.shutdown()
+    assert store.load(task.task_id).status == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_shutdown_hands_unfinished_tasks_to_the_next_start(store):
+    processed: list[int] = []
+    first = TaskManager(store=store)
+    first.register_worker(TaskType.BULK_PRICING, _resumable_worker(processed, asyncio.Event()))
+    task = await first.submit(TaskType.BULK_PRICING, {})
+    await asyncio.sleep(0.01)
+    await first.shutdown()
+    assert store.load(task.task_id).status == TaskStatus.RUNNING
+
+    gate = asyncio.Event()
+    gate.set()
+    restarted = TaskManager(store=store)
+    restarted.register_worker(TaskType.BULK_PRICING, _resumable_worker(processed, gate))
+    assert len(await restarted.resume_interrupted()) == 1
+    await asyncio.sleep(0.05)
+    assert (await restarted.get_task(task.task_id)).result == {"done": [0, 10, 20, 30]}
+    assert processed == [0, 1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_bulk_pricing_worker_skips_completed_items(monkeypatch):
+    queried = []
+
+    async def price_check(arguments):
+        queried.append(arguments["query"])
+        return {"query": arguments["query"]}
+
+    monkeypatch.setattr(workers, "handle_price_check", price_check)
+    task = Task(task_id="TASK-RESUME", task_type=TaskType.BULK_PRICING, arguments={
+        "queries": [{"query": "A"}, {"query": "B"}, {"query": "C"}],
+    })
+    task.checkpoint = {"next_index": 2}
+    task.results_log = [{"index": 0}, {"index": 1, "error": "x"}]
+
+    result = await bulk_pricing_worker(task)
+    assert queried == ["C"]
+    assert [r["index"] for r in result["results"]] == [0, 2]
+    assert result["failed"] == 1
+    assert task.progress.completed_items == 3
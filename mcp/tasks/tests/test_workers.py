@@ -6,6 +6,7 @@ the real KB data files in the repository.
 
 import pytest
 
+from mcp.tasks import workers
 from mcp.tasks.models import Task, TaskType
 from mcp.tasks.workers import batch_bom_worker, bulk_pricing_worker, full_quotation_worker
 
@@ -68,6 +69,86 @@ async def test_batch_bom_worker_multiple_items():
     assert result["successful"] + result["failed"] == 2
 
 
+@pytest.mark.asyncio
+async def test_batch_bom_worker_keeps_a_handler_batch_in_one_group_call(monkeypatch):
+    """A handler-sized batch (50 items) is one calculate_bom_batch call, logged in one commit."""
+    item = {
+        "product_family": "ISODEC",
+        "thickness_mm": 100,
+        "core_type": "EPS",
+        "usage": "techo",
+        "length_m": 6,
+        "width_m": 5,
+    }
+    task = _make_task(TaskType.BATCH_BOM, {"items": [dict(item) for _ in range(50)]})
+    calls = []
+    batch = workers.calculate_bom_batch
+
+    def spy(items):
+        calls.append(len(items))
+        return batch(items)
+
+    monkeypatch.setattr(workers, "calculate_bom_batch", spy)
+    await batch_bom_worker(task)
+
+    assert calls == [50]
+    assert len(task.results_log) == 50
+    assert task.checkpoint == {"next_index": 50}
+
+
+@pytest.mark.asyncio
+async def test_batch_bom_worker_commits_a_large_batch_in_several_chunks(monkeypatch):
+    """Batches beyond the handler size are split and logged incrementally, in order."""
+    item = {
+        "product_family": "ISODEC",
+        "thickness_mm": 100,
+        "core_type": "EPS",
+        "usage": "techo",
+        "length_m": 6,
+        "width_m": 5,
+    }
+    task = _make_task(TaskType.BATCH_BOM, {"items": [dict(item) for _ in range(500)]})
+    commits = []
+    publish = workers._publish
+
+    def spy(task, entries, next_index):
+        publish(task, entries, next_index)
+        commits.append((next_index, len(task.results_log)))
+
+    monkeypatch.setattr(workers, "_publish", spy)
+    await batch_bom_worker(task)
+
+    assert len(commits) > 1
+    assert all(next_index == logged for next_index, logged in commits)
+    assert [next_index for next_index, _ in commits] == sorted({next_index for next_index, _ in commits})
+    assert commits[-1][0] == 500
+    assert task.checkpoint == {"next_index": 500}
+
+
+@pytest.mark.asyncio
+async def test_batch_bom_worker_large_batch_reports_per_item_errors():
+    """Thousands of items finish in one pass; invalid ones become indexed errors."""
+    valid = {
+        "product_family": "ISODEC",
+        "thickness_mm": 100,
+        "core_type": "EPS",
+        "usage": "techo",
+        "length_m": 6,
+        "width_m": 5,
+    }
+    items = [dict(valid, length_m=1 + i % 20) for i in range(2000)]
+    items[7] = dict(valid, width_m=-1)
+    items[1500] = "not an item"
+    task = _make_task(TaskType.BATCH_BOM, {"items": items})
+
+    result = await batch_bom_worker(task)
+    assert result["total_requested"] == 2000
+    assert result["successful"] == 1998
+    assert [e["index"] for e in result["errors"]] == [7, 1500]
+    assert result["results"][0]["bom"]["summary"]["panel_count"] == 5
+    assert task.progress.completed_items == 2000
+
+
 @pytest.mark.asyncio
 async def test_batch_bom_worker_empty_items():
     """Test batch BOM worker with no items raises ValueError."""
@@ -142,6 +223,30 @@ async def test_full_quotation_worker():
     assert task.progress.completed_items == 3
 
 
+@pytest.mark.asyncio
+async def test_full_quotation_worker_resumes_after_the_last_step(monkeypatch):
+    """A task interrupted after all three steps were logged reruns none of them."""
+    task = _make_task(TaskType.FULL_QUOTATION, {
+        "product_family": "ISODEC",
+        "thickness_mm": 100,
+        "core_type": "EPS",
+        "usage": "techo",
+        "length_m": 12,
+        "width_m": 5,
+    })
+    await full_quotation_worker(task)
+    logged = list(task.results_log)
+
+    async def fail(arguments):
+        raise AssertionError("step ran again")
+
+    for name in ("handle_bom_calculate", "handle_price_check", "handle_catalog_search"):
+        monkeypatch.setattr(workers, name, fail)
+    result = await full_quotation_worker(task)
+    assert task.results_log == logged
+    assert result["catalog_matches"] == logged[2]["catalog"]
+
+
 @pytest.mark.asyncio
 async def test_full_quotation_worker_minimal():
     """Test full quotation with minimal arguments."""
@@ -2,11 +2,24 @@
 
 Each worker receives a ``Task`` object and must return a dict result.
 Workers update ``task.progress`` incrementally so callers can poll
-progress via the ``task_status`` MCP tool.
+progress via the ``task_status`` MCP tool. Each finished item (or step)
+is appended to ``task.results_log`` at once, so clients can read partial
+results by offset (``task_result`` with ``offset``, ``task_watch``)
+before the task completes.
+
+``task.checkpoint`` records where to continue after the last completed
+item. Log and checkpoint are updated together with no ``await`` in
+between, so whatever the task store saves is consistent; a task resumed
+after a restart starts from it, keeping the results already logged.
 
 Workers:
-- ``batch_bom_worker``: Calculate BOM for multiple panel specifications.
+- ``batch_bom_worker``: Calculate BOM for multiple panel specifications
+  through ``calculate_bom_batch`` (validated up front, grouped by system).
 - ``bulk_pricing_worker``: Look up pricing for multiple products.
+
+Both batch workers run their items in chunks, several chunks at once in
+the executor's batch lane (mcp.tasks.parallel), and log results in item
+order.
 - ``full_quotation_worker``: Combined BOM + pricing + accessories in one pass.
 """
 
@@ -16,12 +29,60 @@ import asyncio
 from typing import Any
 
 from .models import Task
+from .parallel import run_chunks
 
 # Import the existing synchronous handlers
-from ..handlers.bom import handle_bom_calculate
+from ..handlers.bom import calculate_bom_batch, handle_bom_calculate
 from ..handlers.pricing import handle_price_check
 from ..handlers.catalog import handle_catalog_search
 
+def _resume_point(task: Task) -> int:
+    """Index of the first item an interrupted task has not finished."""
+    return (task.checkpoint or {}).get("next_index", 0)
+
+
+def _publish(task: Task, entries: list[dict[str, Any]], next_index: int) -> None:
+    """Log finished items and checkpoint after them."""
+    task.results_log.extend(entries)
+    task.progress.completed_items = next_index
+    task.checkpoint = {"next_index": next_index}
+
+
+def _split_log(task: Task) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """The results log as (successful entries, failed entries)."""
+    results = [entry for entry in task.results_log if "error" not in entry]
+    errors = [entry for entry in task.results_log if "error" in entry]
+    return results, errors
+
+
+async def _bom_chunk(arguments: dict[str, Any]) -> dict[str, Any]:
+    """BOMs for one chunk of a batch (runs in the batch lane via run_chunks)."""
+    start, chunk = arguments["start"], arguments["items"]
+    entries = []
+    for offset, result in enumerate(calculate_bom_batch(chunk)):
+        if "error" in result:
+            entries.append({"index": start + offset, "input": chunk[offset], "error": result["error"]})
+        else:
+            entries.append({"index": start + offset, "input": chunk[offset], "bom": result})
+    return {"entries": entries}
+
+
+async def _price_chunk(arguments: dict[str, Any]) -> dict[str, Any]:
+    """Price lookups for one chunk of a bulk check (runs in the batch lane via run_chunks)."""
+    start, chunk = arguments["start"], arguments["items"]
+    entries = []
+    for offset, query_args in enumerate(chunk):
+        idx = start + offset
+        try:
+            result = await handle_price_check(query_args)
+            if "error" in result:
+                entries.append({"index": idx, "query": query_args, "error": result["error"]})
+            else:
+                entries.append({"index": idx, "query": query_args, "pricing": result})
+        except Exception as exc:
+            entries.append({"index": idx, "query": query_args, "error": str(exc)})
+    return {"entries": entries}
+
 
 async def batch_bom_worker(task: Task) -> dict[str, Any]:
     """Process multiple BOM calculations in a single background task.
@@ -47,31 +108,24 @@ async def batch_bom_worker(task: Task) -> dict[str, Any]:
         raise ValueError("No items provided for batch BOM calculation")
 
     task.progress.total_items = len(items)
-    results: list[dict[str, Any]] = []
-    errors: list[dict[str, Any]] = []
+    resume_at = _resume_point(task)
+    task.progress.completed_items = resume_at
 
-    for idx, item in enumerate(items):
+    def commit(entries: list[dict[str, Any]], next_index: int) -> None:
+        last = entries[-1]["input"] if isinstance(entries[-1]["input"], dict) else {}
         task.progress.current_item = (
-            f"{item.get('product_family', '?')} "
-            f"{item.get('core_type', '?')} "
-            f"{item.get('thickness_mm', '?')}mm "
-            f"({item.get('usage', '?')})"
+            f"{last.get('product_family', '?')} "
+            f"{last.get('core_type', '?')} "
+            f"{last.get('thickness_mm', '?')}mm "
+            f"({last.get('usage', '?')})"
         )
+        _publish(task, entries, next_index)
 
-        try:
-            result = await handle_bom_calculate(item)
-            if "error" in result:
-                errors.append({"index": idx, "input": item, "error": result["error"]})
-            else:
-                results.append({"index": idx, "input": item, "bom": result})
-        except Exception as exc:
-            errors.append({"index": idx, "input": item, "error": str(exc)})
-
-        task.progress.completed_items = idx + 1
-
-        # Small yield to keep the event loop responsive
-        await asyncio.sleep(0)
+    # A handler-sized batch is one chunk, validated and grouped by system in
+    # a single calculate_bom_batch call; larger ones run several at once
+    await run_chunks(task, items, resume_at, _bom_chunk, commit)
 
+    results, errors = _split_log(task)
     return {
         "task_type": "batch_bom_calculate",
         "total_requested": len(items),
@@ -101,24 +155,16 @@ async def bulk_pricing_worker(task: Task) -> dict[str, Any]:
         raise ValueError("No queries provided for bulk pricing lookup")
 
     task.progress.total_items = len(queries)
-    results: list[dict[str, Any]] = []
-    errors: list[dict[str, Any]] = []
+    resume_at = _resume_point(task)
+    task.progress.completed_items = resume_at
 
-    for idx, query_args in enumerate(queries):
-        task.progress.current_item = query_args.get("query", f"query #{idx}")
+    def commit(entries: list[dict[str, Any]], next_index: int) -> None:
+        task.progress.current_item = str(entries[-1]["query"].get("query", f"query #{next_index - 1}"))
+        _publish(task, entries, next_index)
 
-        try:
-            result = await handle_price_check(query_args)
-            if "error" in result:
-                errors.append({"index": idx, "query": query_args, "error": result["error"]})
-            else:
-                results.append({"index": idx, "query": query_args, "pricing": result})
-        except Exception as exc:
-            errors.append({"index": idx, "query": query_args, "error": str(exc)})
-
-        task.progress.completed_items = idx + 1
-        await asyncio.sleep(0)
+    await run_chunks(task, queries, resume_at, _price_chunk, commit)
 
+    results, errors = _split_log(task)
     return {
         "task_type": "bulk_price_check",
         "total_requested": len(queries),
@@ -155,47 +201,57 @@ async def full_quotation_worker(task: Task) -> dict[str, Any]:
         }
     """
     args = task.arguments
+    # Steps are logged as {"index", "step", <step>: result}; an interrupted
+    # run resumes after the ones already logged
+    done: dict[str, Any] = {entry["step"]: entry[entry["step"]] for entry in task.results_log}
 
     # We have 3 main steps
     task.progress.total_items = 3
-    task.progress.current_item = "Calculating BOM"
+    task.progress.completed_items = len(done)
 
     # Step 1: BOM calculation
-    bom_args = {
-        "product_family": args.get("product_family", ""),
-        "thickness_mm": args.get("thickness_mm", 0),
-        "core_type": args.get("core_type", "EPS"),
-        "usage": args.get("usage", ""),
-        "length_m": args.get("length_m", 0),
-        "width_m": args.get("width_m", 0),
-    }
-    qty = args.get("quantity_panels")
-    if qty is not None:
-        bom_args["quantity_panels"] = qty
+    if "bom" not in done:
+        task.progress.current_item = "Calculating BOM"
+        bom_args = {
+            "product_family": args.get("product_family", ""),
+            "thickness_mm": args.get("thickness_mm", 0),
+            "core_type": args.get("core_type", "EPS"),
+            "usage": args.get("usage", ""),
+            "length_m": args.get("length_m", 0),
+            "width_m": args.get("width_m", 0),
+        }
+        qty = args.get("quantity_panels")
+        if qty is not None:
+            bom_args["quantity_panels"] = qty
 
-    bom_result = await handle_bom_calculate(bom_args)
-    task.progress.completed_items = 1
-    await asyncio.sleep(0)
+        done["bom"] = await handle_bom_calculate(bom_args)
+        _publish(task, [{"index": 0, "step": "bom", "bom": done["bom"]}], 1)
+        await asyncio.sleep(0)
+    bom_result = done["bom"]
 
     # Step 2: Pricing lookup
-    task.progress.current_item = "Looking up pricing"
-    pricing_result = await handle_price_check({
-        "query": args.get("product_family", ""),
-        "filter_type": "family",
-        "thickness_mm": args.get("thickness_mm"),
-    })
-    task.progress.completed_items = 2
-    await asyncio.sleep(0)
+    if "pricing" not in done:
+        task.progress.current_item = "Looking up pricing"
+        done["pricing"] = await handle_price_check({
+            "query": args.get("product_family", ""),
+            "filter_type": "family",
+            "thickness_mm": args.get("thickness_mm"),
+        })
+        _publish(task, [{"index": 1, "step": "pricing", "pricing": done["pricing"]}], 2)
+        await asyncio.sleep(0)
+    pricing_result = done["pricing"]
 
     # Step 3: Catalog search for accessories
-    task.progress.current_item = "Searching accessories catalog"
     usage = args.get("usage", "")
-    catalog_result = await handle_catalog_search({
-        "query": args.get("product_family", ""),
-        "category": usage if usage in ("techo", "pared", "camara") else "all",
-        "limit": 10,
-    })
-    task.progress.completed_items = 3
+    if "catalog" not in done:
+        task.progress.current_item = "Searching accessories catalog"
+        done["catalog"] = await handle_catalog_search({
+            "query": args.get("product_family", ""),
+            "category": usage if usage in ("techo", "pared", "camara") else "all",
+            "limit": 10,
+        })
+        _publish(task, [{"index": 2, "step": "catalog", "catalog": done["catalog"]}], 3)
+    catalog_result = done["catalog"]
 
     # Compile the unified quotation
     discount = args.get("discount_percent", 0) or 0
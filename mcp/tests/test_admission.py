@@ -0,0 +1,139 @@
+"""Tests for per-session admission control (mcp.admission)."""
+
+import asyncio
+
+import pytest
+
+from mcp import metrics
+from mcp.admission import AdmissionController, AdmissionPolicy, AdmissionRejected
+
+
+def _controller(**limits):
+    return AdmissionController(AdmissionPolicy(**limits))
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_each_session():
+    controller = _controller(rate_per_s=0.001, burst=6, batch_cost=5)
+    (await controller.acquire("s1", "bulk_price_check")).release()
+    (await controller.acquire("s1", "price_check")).release()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("s1", "price_check")
+    envelope = rejected.value.to_envelope()
+    assert envelope["ok"] is False
+    assert envelope["error"]["code"] == "RATE_LIMITED"
+    assert envelope["error"]["details"]["retry_after_s"] > 0
+
+    # Other sessions and anonymous calls have their own (or no) bucket
+    (await controller.acquire("s2", "price_check")).release()
+    for _ in range(10):
+        (await controller.acquire("unknown", "price_check")).release()
+
+
+@pytest.mark.asyncio
+async def test_in_flight_cap_per_session():
+    controller = _controller(max_in_flight=1)
+    ticket = await controller.acquire("s1", "catalog_search")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("s1", "catalog_search")
+    assert rejected.value.code == "SESSION_BUSY"
+    ticket.release()
+    ticket.release()  # idempotent
+    (await controller.acquire("s1", "catalog_search")).release()
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_queue_favours_interactive_calls():
+    controller = _controller(max_concurrent=1, max_in_flight=10, interactive_weight=4, batch_weight=1)
+    holder = await controller.acquire("s0", "price_check")
+    order = []
+
+    async def call(session, tool):
+        ticket = await controller.acquire(session, tool)
+        order.append((session, tool))
+        await asyncio.sleep(0)
+        ticket.release()
+
+    batch = [asyncio.create_task(call("bulk", "bulk_price_check")) for _ in range(4)]
+    await asyncio.sleep(0)
+    interactive = [asyncio.create_task(call("quote", "price_check")) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert controller.stats()["queued_now"] == 6
+
+    holder.release()
+    await asyncio.gather(*batch, *interactive)
+    # Both interactive calls run before the batch session's second call
+    assert [session for session, _ in order[:3]].count("quote") == 2
+    assert controller.stats() | {"admitted": 0} == {
+        "admitted": 0, "queued": 6, "rejected": 0, "active": 0, "queued_now": 0, "sessions": 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_and_queue_full_are_rejected():
+    controller = _controller(max_concurrent=1, max_queue=1, queue_timeout_s=0.05)
+    timeouts = metrics.ADMISSION_REJECTIONS.labels("interactive", "QUEUE_TIMEOUT").value
+    holder = await controller.acquire("s1", "price_check")
+
+    waiting = asyncio.create_task(controller.acquire("s2", "price_check"))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as full:
+        await controller.acquire("s3", "price_check")
+    assert full.value.code == "QUEUE_FULL"
+
+    with pytest.raises(AdmissionRejected) as timed_out:
+        await waiting
+    assert timed_out.value.code == "QUEUE_TIMEOUT"
+    assert metrics.ADMISSION_REJECTIONS.labels("interactive", "QUEUE_TIMEOUT").value == timeouts + 1
+
+    holder.release()
+    assert controller.stats()["active"] == 0
+    (await controller.acquire("s2", "price_check")).release()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    controller = _controller(max_concurrent=1)
+    holder = await controller.acquire("s1", "price_check")
+    waiting = asyncio.create_task(controller.acquire("s2", "price_check"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    holder.release()
+    assert controller.stats() | {"admitted": 0, "queued": 0} == {
+        "admitted": 0, "queued": 0, "rejected": 0, "active": 0, "queued_now": 0, "sessions": 2,
+    }
+
+
+def test_disabled_policy_admits_everything():
+    controller = _controller(enabled=False, burst=0)
+    ticket = asyncio.run(controller.acquire("s1", "bulk_price_check"))
+    ticket.release()
+    assert controller.stats()["admitted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_long_poll_tools_skip_slots_but_pay_tokens():
+    controller = _controller(max_concurrent=1, max_in_flight=1, rate_per_s=0.001, burst=2)
+    holder = await controller.acquire("s1", "price_check")
+    (await controller.acquire("s1", "task_watch")).release()
+    assert controller.stats()["active"] == 1
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire("s1", "task_watch")
+    holder.release()
+
+
+@pytest.mark.asyncio
+async def test_session_busy_rejection_does_not_spend_a_token():
+    controller = _controller(max_in_flight=1, rate_per_s=0.001, burst=2)
+    ticket = await controller.acquire("s1", "price_check")
+    for _ in range(5):
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("s1", "price_check")
+        assert rejected.value.code == "SESSION_BUSY"
+    ticket.release()
+    # The second token is still there after the busy retries
+    (await controller.acquire("s1", "price_check")).release()
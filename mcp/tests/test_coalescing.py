@@ -0,0 +1,76 @@
+"""Tests for singleflight coalescing of identical tool calls (mcp.coalescing)."""
+
+import asyncio
+
+import pytest
+
+from mcp.coalescing import CACHE_COALESCED, CACHE_HIT, CACHE_MISS, Singleflight
+from mcp.kb import registry as kb_registry
+
+
+def test_key_ignores_bookkeeping_and_argument_order():
+    flight = Singleflight()
+    a = flight.key("price_check", {"query": "isodec", "filter_type": "sku", "request_id": "r1"})
+    b = flight.key("price_check", {"filter_type": "sku", "query": "isodec", "session_id": "s9"})
+    assert a == b
+    assert flight.key("price_check", {"query": "isoroof"}) != a
+    assert flight.key("write_file", {"path": "x"}) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution_then_hit_memo():
+    flight = Singleflight(ttl_seconds=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    key = flight.key("price_check", {"query": "isodec"})
+    outcomes = await asyncio.gather(*(flight.do(key, fetch) for _ in range(5)))
+    assert calls == 1
+    assert [status for _, status in outcomes].count(CACHE_MISS) == 1
+    assert [status for _, status in outcomes].count(CACHE_COALESCED) == 4
+    assert all(value is outcomes[0][0] for value, _ in outcomes)
+
+    assert (await flight.do(key, fetch))[1] == CACHE_HIT
+    assert calls == 1
+    assert flight.stats()[CACHE_HIT] == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_but_not_memoized():
+    flight = Singleflight(ttl_seconds=60)
+    calls = 0
+
+    async def broken():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    key = flight.key("catalog_search", {"query": "gotero"})
+    outcomes = await asyncio.gather(flight.do(key, broken), flight.do(key, broken), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert calls == 1
+
+    with pytest.raises(RuntimeError):
+        await flight.do(key, broken)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_kb_reload_changes_the_key():
+    flight = Singleflight(ttl_seconds=60)
+    key = flight.key("bom_calculate", {"thickness_mm": 100})
+
+    async def compute():
+        return {"ok": True}
+
+    await flight.do(key, compute)
+    kb_registry.reload([kb_registry.BOM_RULES])
+    fresh = flight.key("bom_calculate", {"thickness_mm": 100})
+    assert fresh != key
+    assert (await flight.do(fresh, compute))[1] == CACHE_MISS
@@ -0,0 +1,45 @@
+"""Tests for single-pass response encoding (mcp.encoding)."""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from mcp import encoding
+from mcp.encoding import encode_json, encode_with_estimate, estimate_tokens
+
+
+@dataclass
+class _Point:
+    x: int
+
+
+PAYLOAD = {
+    "ok": True,
+    "name": "Panel aislante ISODEC — cotización",
+    "items": [{"sku": "ISD100EPS", "price": 46.07}],
+    1: "non-string key",
+    "when": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    "point": _Point(3),
+}
+
+
+def test_encoders_agree_and_keep_non_ascii(monkeypatch):
+    fast = encode_json(PAYLOAD)
+    monkeypatch.setattr(encoding, "HAS_ORJSON", False)
+    assert encode_json(PAYLOAD) == fast
+
+    decoded = json.loads(fast)
+    assert "cotización" in fast
+    assert decoded["1"] == "non-string key"
+    assert decoded["when"] == str(PAYLOAD["when"])
+    assert decoded["point"] == "_Point(x=3)"
+
+
+def test_oversized_integers_fall_back_to_stdlib():
+    assert json.loads(encode_json({"n": 2**70})) == {"n": 2**70}
+
+
+def test_estimate_uses_the_encoded_text():
+    text, tokens = encode_with_estimate({"items": ["x" * 400]})
+    assert tokens == estimate_tokens(text) == round(len(text) / 4)
+    assert estimate_tokens("") == 1
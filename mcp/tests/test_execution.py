@@ -0,0 +1,129 @@
+"""Tests for the handler execution layer (mcp.execution)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mcp.execution import ExecutionPolicy, HandlerClass, ToolExecutor
+from mcp.handlers.pricing import handle_price_check
+
+POLICIES = {
+    "slow_io": ExecutionPolicy(HandlerClass.BLOCKING_IO),
+    "log_write": ExecutionPolicy(HandlerClass.BLOCKING_IO, exclusive="log"),
+    "search": ExecutionPolicy(HandlerClass.CPU),
+    "chunk": ExecutionPolicy(HandlerClass.BATCH),
+}
+
+
+async def _blocking_sleep(arguments):
+    time.sleep(arguments["seconds"])
+    return {"ok": True, "thread": threading.current_thread().name}
+
+
+@pytest.mark.asyncio
+async def test_blocking_handlers_leave_the_loop_responsive():
+    executor = ToolExecutor(POLICIES, io_workers=4)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    results = await asyncio.gather(*(
+        executor.run("slow_io", _blocking_sleep, {"seconds": 0.2}) for _ in range(4)
+    ))
+    tick_task.cancel()
+    executor.shutdown()
+
+    assert all(r["thread"].startswith("mcp-io") for r in results)
+    assert ticks >= 10  # loop kept ticking while four handlers slept in parallel
+    assert executor.stats()["blocking_io"]["completed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_class_limit_queues_and_records_wait():
+    executor = ToolExecutor(POLICIES, io_workers=4, io_limit=1)
+    started = time.monotonic()
+    await asyncio.gather(*(
+        executor.run("slow_io", _blocking_sleep, {"seconds": 0.05}) for _ in range(3)
+    ))
+    executor.shutdown()
+
+    assert time.monotonic() - started >= 0.15
+    stats = executor.stats()["blocking_io"]
+    assert stats["limit"] == 1
+    assert stats["waiting"] == 0 and stats["running"] == 0
+    assert stats["queue_wait_ms_max"] >= 90
+
+
+@pytest.mark.asyncio
+async def test_exclusive_group_serializes_handlers():
+    executor = ToolExecutor(POLICIES, io_workers=4)
+    active = 0
+    overlap = False
+    lock = threading.Lock()
+
+    async def write(arguments):
+        nonlocal active, overlap
+        with lock:
+            active += 1
+            overlap = overlap or active > 1
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return {"ok": True}
+
+    await asyncio.gather(*(executor.run("log_write", write, {}) for _ in range(5)))
+    executor.shutdown()
+    assert overlap is False
+
+
+@pytest.mark.asyncio
+async def test_batch_chunks_do_not_take_cpu_slots():
+    executor = ToolExecutor(POLICIES, cpu_workers=1, cpu_limit=1, batch_workers=1, batch_limit=1)
+    chunks = [asyncio.ensure_future(executor.run("chunk", _blocking_sleep, {"seconds": 0.1})) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    started = time.monotonic()
+    result = await executor.run("search", _blocking_sleep, {"seconds": 0})
+    elapsed = time.monotonic() - started
+    await asyncio.gather(*chunks)
+    executor.shutdown()
+
+    assert elapsed < 0.05
+    assert result["thread"].startswith("mcp-cpu")
+    stats = executor.stats()
+    assert stats["batch"]["limit"] == 1
+    assert stats["batch"]["completed"] == 3
+    assert stats["batch"]["queue_wait_ms_max"] >= 90
+
+
+@pytest.mark.asyncio
+async def test_failures_are_counted_and_reraised():
+    executor = ToolExecutor(POLICIES)
+
+    async def broken(arguments):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await executor.run("search", broken, {})
+    assert (await executor.run("unclassified", _blocking_sleep, {"seconds": 0}))["ok"] is True
+    executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["cpu"]["failed"] == 1
+    assert stats["async"]["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_real_handler_runs_on_cpu_pool():
+    executor = ToolExecutor()
+    result = await executor.run("price_check", handle_price_check, {"query": "ISD100EPS", "filter_type": "sku"})
+    executor.shutdown()
+    assert result["ok"] is True
+    assert executor.stats()["cpu"]["completed"] == 1
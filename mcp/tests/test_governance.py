@@ -14,9 +14,9 @@ import pytest
 from mcp.handlers.governance import (
     handle_validate_correction,
     handle_commit_correction,
-    _pending_changes,
-    _pending_changes_lock,
+    PENDING_CHANGES_NAMESPACE,
 )
+from mcp.storage.shared_state import get_state_store
 from mcp_tools.contracts import (
     VALIDATE_CORRECTION_ERROR_CODES,
     COMMIT_CORRECTION_ERROR_CODES,
@@ -109,10 +109,8 @@ class TestValidateCorrection:
         })
         assert result["ok"] is True
         change_id = result["change_id"]
-        with _pending_changes_lock:
-            assert change_id in _pending_changes
-            # Cleanup
-            _pending_changes.pop(change_id, None)
+        # Cleanup doubles as the check
+        assert get_state_store().pop(PENDING_CHANGES_NAMESPACE, change_id) is not None
 
 
 class TestCommitCorrection:
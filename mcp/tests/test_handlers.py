@@ -12,9 +12,9 @@ import pytest
 
 # Import handlers - this is the critical import that was failing
 # when pytest was run from mcp/tests directory instead of repo root
-from mcp.handlers.pricing import handle_price_check
+from mcp.handlers.pricing import handle_price_check, resolve_panel
 from mcp.handlers.catalog import handle_catalog_search
-from mcp.handlers.bom import handle_bom_calculate
+from mcp.handlers.bom import calculate_bom_batch, handle_bom_calculate
 
 # Import error code registries for validation
 from mcp_tools.contracts import (
@@ -60,6 +60,26 @@ class TestPriceCheckHandler:
         # Validate error code is in the contract-defined set
         assert result["error"]["code"] in PRICE_CHECK_ERROR_CODES
 
+    @pytest.mark.asyncio
+    async def test_search_matches_accent_and_plural_variants(self):
+        """Free-text search resolves accent and plural variants to the same products."""
+        plain = await handle_price_check({"query": "canalon"})
+        variant = await handle_price_check({"query": "Canalones"})
+        assert plain["ok"] is True
+        assert [m["sku"] for m in plain["matches"]] == [m["sku"] for m in variant["matches"]]
+
+    @pytest.mark.asyncio
+    async def test_misspelled_sku_returns_suggestions(self):
+        """A near-miss SKU resolves through the fuzzy index with suggestions."""
+        result = await handle_price_check({"query": "IROF50", "filter_type": "sku"})
+        assert result["ok"] is True
+        assert result["matches"][0]["sku"] == "IROOF50"
+        assert result["suggestions"][0] == "IROOF50"
+
+        search = await handle_price_check({"query": "isodek 100"})
+        assert search["ok"] is True
+        assert search["suggestions"] == ["isodec 100"]
+
 
 class TestCatalogSearchHandler:
     """Test catalog_search handler returns v1 contract envelope."""
@@ -90,6 +110,153 @@ class TestCatalogSearchHandler:
         # Validate error code is in the contract-defined set
         assert result["error"]["code"] in CATALOG_SEARCH_ERROR_CODES
 
+    @pytest.mark.asyncio
+    async def test_searches_products_by_handle(self):
+        """Catalog keyed by products_by_handle is actually searched."""
+        result = await handle_catalog_search({"query": "gotero", "limit": 3})
+        assert result["ok"] is True
+        assert len(result["results"]) == 3
+        for item in result["results"]:
+            assert item["product_id"]
+            assert item["url"].endswith(item["product_id"])
+
+    @pytest.mark.asyncio
+    async def test_sku_lookup_uses_shipped_index(self):
+        """A query equal to a SKU resolves through sku_to_handle."""
+        result = await handle_catalog_search({"query": "CONBPVC"})
+        assert result["ok"] is True
+        assert result["results"][0]["product_id"] == "embudo-conector-de-bajada-pvc-para-canaleta-100mm"
+        assert result["results"][0]["score"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_tag_and_type_filters(self):
+        """product_type and tag filters narrow results via the shipped indexes."""
+        by_tag = await handle_catalog_search({"query": "gotero", "tag": "isodec", "limit": 30})
+        assert by_tag["ok"] is True
+        assert {r["product_id"] for r in by_tag["results"]} == {
+            "gotero-lateral-para-isodec-copia",
+            "gotero-frontal-isodec",
+        }
+
+        by_type = await handle_catalog_search({"query": "isoroof", "product_type": "Panel Aislante"})
+        assert by_type["ok"] is True
+        assert by_type["results"]
+        assert all(r["category"] == "Panel Aislante" for r in by_type["results"])
+
+    @pytest.mark.asyncio
+    async def test_results_are_bm25_ranked_best_first(self):
+        """Products matching every query term outrank partial matches."""
+        result = await handle_catalog_search({"query": "gotero frontal", "limit": 5})
+        assert result["ok"] is True
+        scores = [r["score"] for r in result["results"]]
+        assert scores == sorted(scores, reverse=True)
+        assert scores[0] == 1.0
+        assert all(0.0 <= s <= 1.0 for s in scores)
+        top_three = {r["product_id"] for r in result["results"][:3]}
+        assert all("gotero-frontal" in pid for pid in top_three)
+
+    @pytest.mark.asyncio
+    async def test_query_variants_share_results(self):
+        """Accented, plural and synonym queries hit the same analyzed terms."""
+        accented = await handle_catalog_search({"query": "cámara"})
+        folded = await handle_catalog_search({"query": "camara"})
+        assert accented["results"] and accented["results"] == folded["results"]
+
+        plural = await handle_catalog_search({"query": "techos"})
+        synonym = await handle_catalog_search({"query": "cubierta"})
+        assert plural["results"] and plural["results"] == synonym["results"]
+
+    @pytest.mark.asyncio
+    async def test_misspelled_terms_are_corrected(self):
+        """Unknown terms are corrected through the fuzzy index and echoed as suggestions."""
+        result = await handle_catalog_search({"query": "gotro frontal", "limit": 3})
+        assert result["ok"] is True
+        assert result["suggestions"] == ["gotero frontal"]
+        assert all("gotero-frontal" in r["product_id"] for r in result["results"])
+
+        exact = await handle_catalog_search({"query": "gotero frontal"})
+        assert "suggestions" not in exact
+
+    @pytest.mark.asyncio
+    async def test_category_filter_uses_precomputed_positions(self):
+        """Category filtering intersects with the per-category position sets."""
+        from mcp.handlers.catalog import CATEGORY_MAP, _get_catalog_index, _infer_category
+
+        index = _get_catalog_index()
+        for pos, fields in index["normalized_fields"].items():
+            for category, keywords in CATEGORY_MAP.items():
+                expected = any(kw in fields["searchable"] for kw in keywords)
+                assert (pos in index["category_positions"][category]) == expected
+
+        result = await handle_catalog_search({"query": "gotero", "category": "camara", "limit": 30})
+        assert result["ok"] is True
+        assert result["results"]
+        camara = {index["products"][pos]["handle"] for pos in index["category_positions"]["camara"]}
+        assert all(r["product_id"] in camara for r in result["results"])
+
+        assert _infer_category("Isowall 100 mm") == "pared"
+        assert _infer_category("Cámara frigorífica") == "camara"
+
+    @pytest.mark.asyncio
+    async def test_lean_mode_keeps_search_fields_and_reads_records_on_demand(self, tmp_path, monkeypatch):
+        """Lean loading keeps only search fields resident and reuses its side files."""
+        from mcp.handlers import catalog
+
+        full = await handle_catalog_search({"query": "gotero frontal"})
+
+        monkeypatch.setattr(catalog, "CATALOG_LOAD_MODE", "lean")
+        monkeypatch.setattr(catalog, "CATALOG_CACHE_DIR", tmp_path)
+        monkeypatch.setattr(catalog, "_catalog_data", None)
+        monkeypatch.setattr(catalog, "_catalog_index", None)
+        monkeypatch.setattr(catalog, "_catalog_records", None)
+
+        lean = await handle_catalog_search({"query": "gotero frontal"})
+        assert lean == full
+        for product in catalog._get_catalog_index()["products"]:
+            assert set(product) <= set(catalog.LEAN_PRODUCT_FIELDS)
+
+        record = catalog.get_product_record("gotero-frontal-isodec")
+        assert record["handle"] == "gotero-frontal-isodec"
+        assert record["variants"]
+        assert catalog.get_product_record("no-such-handle") is None
+
+        # A second process start reuses the manifest without parsing the catalog
+        def _fail():
+            raise AssertionError("catalog file should not be parsed again")
+
+        monkeypatch.setattr(catalog, "_read_catalog_file", _fail)
+        monkeypatch.setattr(catalog, "_catalog_data", None)
+        monkeypatch.setattr(catalog, "_catalog_index", None)
+        assert await handle_catalog_search({"query": "gotero frontal"}) == full
+
+    @pytest.mark.asyncio
+    async def test_lean_mode_detects_records_rewritten_by_another_worker(self, tmp_path, monkeypatch):
+        """Stale offsets are never used against a records file built for another catalog stamp."""
+        from mcp.handlers import catalog
+        from mcp.search.record_store import OffsetRecordStore
+
+        monkeypatch.setattr(catalog, "CATALOG_LOAD_MODE", "lean")
+        monkeypatch.setattr(catalog, "CATALOG_CACHE_DIR", tmp_path)
+        monkeypatch.setattr(catalog, "_catalog_data", None)
+        monkeypatch.setattr(catalog, "_catalog_index", None)
+        monkeypatch.setattr(catalog, "_catalog_records", None)
+        assert catalog.get_product_record("gotero-frontal-isodec")["handle"] == "gotero-frontal-isodec"
+
+        # Another worker rewrites the records file for a different catalog
+        records_path = catalog._catalog_records.path
+        OffsetRecordStore.write(records_path, [("other", {"handle": "other"})], header={"mtime_ns": 0, "size": 0})
+
+        assert catalog.get_product_record("gotero-frontal-isodec")["handle"] == "gotero-frontal-isodec"
+        assert OffsetRecordStore.read_header(records_path) == catalog._catalog_records.header
+
+    @pytest.mark.asyncio
+    async def test_partial_word_expands_to_prefix(self):
+        """A term missing from the vocabulary falls back to indexed prefixes."""
+        result = await handle_catalog_search({"query": "isod", "limit": 3})
+        assert result["ok"] is True
+        assert len(result["results"]) == 3
+        assert all("isodec" in r["product_id"] for r in result["results"])
+
 
 class TestBOMCalculateHandler:
     """Test bom_calculate handler returns v1 contract envelope."""
@@ -131,6 +298,155 @@ class TestBOMCalculateHandler:
         # Validate error code is in the contract-defined set
         assert result["error"]["code"] in BOM_CALCULATE_ERROR_CODES
 
+    @pytest.mark.asyncio
+    async def test_full_bom_matches_kb_worked_example(self):
+        """ISODEC EPS 100mm, 5m x 11m on metal reproduces bom_rules.json ejemplo_calculo."""
+        result = await handle_bom_calculate({
+            "product_family": "ISODEC",
+            "thickness_mm": 100,
+            "core_type": "EPS",
+            "usage": "techo",
+            "length_m": 5,
+            "width_m": 11,
+        })
+        assert result["ok"] is True
+        assert result["summary"]["panel_count"] == 10
+        quantities = [(item["item_type"], item["quantity"]) for item in result["items"]]
+        fixations = sorted(q for t, q in quantities if t == "fixation")
+        # 44 fixation points: 11 varillas, 88 tuercas, 44 arandelas, 44 tortugas
+        assert fixations == [11, 44, 44, 88]
+        skus = {item["sku"]: item["quantity"] for item in result["items"]}
+        assert skus["6838"] == 4  # gotero frontal 100mm
+        assert skus["6842"] == 4  # gotero lateral 100mm
+        assert skus["Bromplast"] == 4  # silicona
+        assert skus["C.But."] == 2  # cinta butilo
+        for item in result["items"]:
+            assert item["subtotal_usd_iva_inc"] == round(item["unit_price_usd_iva_inc"] * item["quantity"], 2)
+        assert result["summary"]["total_usd_iva_inc"] == round(
+            sum(item["subtotal_usd_iva_inc"] for item in result["items"]), 2
+        )
+
+    @pytest.mark.asyncio
+    async def test_structure_type_selects_fixation_kit(self):
+        """Concrete structures use one nut per point plus an expansion anchor."""
+        args = {
+            "product_family": "ISODEC",
+            "thickness_mm": 100,
+            "core_type": "EPS",
+            "usage": "techo",
+            "length_m": 5,
+            "width_m": 11,
+            "tipo_estructura": "hormigon",
+        }
+        result = await handle_bom_calculate(args)
+        assert result["ok"] is True
+        fixations = sorted(i["quantity"] for i in result["items"] if i["item_type"] == "fixation")
+        assert fixations == [11, 44, 44, 44, 44]
+
+        invalid = await handle_bom_calculate({**args, "tipo_estructura": "adobe"})
+        assert invalid["ok"] is False
+        assert invalid["error"]["code"] == BOM_CALCULATE_ERROR_CODES["INVALID_DIMENSIONS"]
+
+    @pytest.mark.asyncio
+    async def test_fixing_kit_lines_are_distinct(self):
+        """Kit parts sharing catalog SKU 6805 stay apart by component and name."""
+        result = await handle_bom_calculate({
+            "product_family": "ISODEC",
+            "thickness_mm": 100,
+            "core_type": "EPS",
+            "usage": "techo",
+            "length_m": 5,
+            "width_m": 11,
+            "tipo_estructura": "hormigon",
+        })
+        kit = [item for item in result["items"] if item["item_type"] == "fixation"]
+        assert {item["component"] for item in kit} == {"varilla", "tuerca", "arandela_carrocero", "tortuga_pvc", "taco"}
+        assert len({item["name"] for item in kit}) == len(kit)
+        assert all(item["name"] for item in kit)
+
+    @pytest.mark.asyncio
+    async def test_isoroof_uses_caballetes_instead_of_varillas(self):
+        """ISOROOF 3G is fixed with caballetes: one per panel per support."""
+        result = await handle_bom_calculate({
+            "product_family": "ISOROOF",
+            "thickness_mm": 50,
+            "core_type": "PIR",
+            "usage": "techo",
+            "length_m": 6,
+            "width_m": 8,
+        })
+        assert result["ok"] is True
+        fixations = [i for i in result["items"] if i["item_type"] == "fixation"]
+        # 8 panels x ceil(6 / 3.3 + 1) = 3 supports
+        assert [(i["sku"], i["quantity"]) for i in fixations] == [("Cab. Roj", 24)]
+
+    @pytest.mark.asyncio
+    async def test_panel_line_priced_from_pricing_master(self):
+        """The panel line resolves family/core/thickness to the master SKU and m2 price."""
+        result = await handle_bom_calculate({
+            "product_family": "ISODEC",
+            "thickness_mm": 100,
+            "core_type": "EPS",
+            "usage": "techo",
+            "length_m": 5,
+            "width_m": 11,
+        })
+        panel = result["items"][0]
+        assert panel["item_type"] == "panel"
+        assert panel["sku"] == "ISD100EPS_1"
+        assert panel["unit_price_usd_iva_inc"] == 46.07
+        assert panel["subtotal_usd_iva_inc"] == round(46.07 * panel["quantity"], 2)
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_calculations(self):
+        """calculate_bom_batch returns the same envelope per item as the handler, errors included."""
+        items = [
+            {"product_family": "ISODEC", "thickness_mm": 100, "core_type": "EPS",
+             "usage": "techo", "length_m": 5, "width_m": 11},
+            {"product_family": "ISOROOF", "thickness_mm": 50, "core_type": "PIR",
+             "usage": "techo", "length_m": 6, "width_m": 8, "tipo_estructura": "madera"},
+            {"product_family": "ISODEC", "thickness_mm": 10, "core_type": "EPS",
+             "usage": "techo", "length_m": 5, "width_m": 3},
+            {"product_family": "NONEXISTENT", "thickness_mm": 100, "core_type": "EPS",
+             "usage": "techo", "length_m": 5, "width_m": 3},
+            {"product_family": "ISODEC", "thickness_mm": 100, "core_type": "EPS",
+             "usage": "techo", "length_m": 7.5, "width_m": 4, "quantity_panels": 5},
+        ]
+        batch = calculate_bom_batch(items)
+        assert batch == [await handle_bom_calculate(item) for item in items]
+        assert [r["ok"] for r in batch] == [True, True, False, False, True]
+        assert batch[2]["error"]["code"] == BOM_CALCULATE_ERROR_CODES["INVALID_THICKNESS"]
+        assert batch[3]["error"]["code"] == BOM_CALCULATE_ERROR_CODES["RULE_NOT_FOUND"]
+
+    @pytest.mark.asyncio
+    async def test_batch_groups_equal_single_calculations(self):
+        """Quantities computed per group as columns equal N single calculations."""
+        specs = [
+            {"product_family": "ISODEC", "thickness_mm": 100, "core_type": "EPS", "usage": "techo"},
+            {"product_family": "ISOROOF", "thickness_mm": 50, "core_type": "PIR", "usage": "techo"},
+            {"product_family": "ISOPANEL", "thickness_mm": 100, "core_type": "EPS", "usage": "pared"},
+        ]
+        items = []
+        for i in range(30):
+            item = dict(specs[i % 3], length_m=1 + i * 0.7, width_m=2 + i % 7)
+            if i % 4 == 0:
+                item["tipo_estructura"] = "hormigon"
+            if i % 5 == 0:
+                item["quantity_panels"] = 1 + i % 6
+            items.append(item)
+
+        batch = calculate_bom_batch(items)
+        assert batch == [await handle_bom_calculate(item) for item in items]
+        assert all(r["ok"] for r in batch)
+
+    def test_resolve_panel(self):
+        """Panels resolve by spec, fall back to any core and trust a stated name thickness."""
+        assert resolve_panel("ISOPANEL", "EPS", 100)["sku"] == "ISD100EPS"
+        assert resolve_panel("isoroof", "EPS", 50)["sku"] == "IROOF50"  # only PIR listed
+        assert resolve_panel("ISODEC", "PIR", 120)["sku"] == "ISD80PIR_1"  # spec says 80
+        assert resolve_panel("ISOWALL", "PIR", 80)["sku"] == "IW80"
+        assert resolve_panel("ISODEC", "EPS", 999) is None
+
 
 if __name__ == "__main__":
     # Allow running tests directly
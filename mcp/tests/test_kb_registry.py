@@ -0,0 +1,75 @@
+"""Tests for the shared KB registry (mcp.kb.registry)."""
+
+import json
+import os
+
+from mcp.kb import registry as kb_registry
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_file_parsed_once_and_versioned(tmp_path):
+    path = tmp_path / "rules.json"
+    _write(path, {"a": 1})
+
+    first = kb_registry.load(path)
+    assert kb_registry.load(path) is first
+    assert len(kb_registry.version(path)) == 12
+    assert kb_registry.versions()["rules.json"] == kb_registry.version(path)
+
+
+def test_reload_drops_derived_values_and_notifies_subscribers(tmp_path):
+    rules = tmp_path / "rules.json"
+    other = tmp_path / "other.json"
+    _write(rules, {"n": 1})
+    _write(other, {"n": 10})
+    builds = []
+    notified = []
+
+    def build():
+        builds.append(1)
+        return kb_registry.load(rules)["n"] + kb_registry.load(other)["n"]
+
+    kb_registry.subscribe((rules,), lambda: notified.append("rules"))
+    assert kb_registry.derived("test.sum", (rules, other), build) == 11
+    assert kb_registry.derived("test.sum", (rules, other), build) == 11
+    assert len(builds) == 1
+
+    generation = kb_registry.generation()
+    _write(other, {"n": 20})
+    assert kb_registry.reload([other]) == ["other.json"]
+    assert kb_registry.generation() == generation + 1
+    assert notified == []  # only subscribed to rules
+    assert kb_registry.derived("test.sum", (rules, other), build) == 21
+    assert len(builds) == 2
+
+    kb_registry.reload([rules])
+    assert notified == ["rules"]
+
+
+def test_refresh_reloads_only_changed_files(tmp_path):
+    changed = tmp_path / "changed.json"
+    unchanged = tmp_path / "unchanged.json"
+    _write(changed, {"v": 1})
+    _write(unchanged, {"v": 1})
+    kept = kb_registry.load(unchanged)
+    old_version = kb_registry.version(changed)
+
+    _write(changed, {"v": 2, "extra": True})
+    stat = changed.stat()
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert "changed.json" in kb_registry.refresh()
+    assert kb_registry.load(changed)["v"] == 2
+    assert kb_registry.version(changed) != old_version
+    assert kb_registry.load(unchanged) is kept
+
+
+def test_handlers_share_parsed_kb_files():
+    from mcp.handlers import bom, pricing
+    import quotation_calculator_v3
+
+    assert bom._load_bom_rules() is quotation_calculator_v3._load_bom_rules()
+    assert pricing._load_pricing() is kb_registry.pricing_master()
@@ -0,0 +1,85 @@
+"""Tests for the batched invocation log writer (mcp.log_writer)."""
+
+import json
+import os
+import time
+
+from mcp.log_writer import BatchedLogWriter
+
+
+def _record(i, event="tool_invocation_success"):
+    return ("INFO", event, "tool invocation completed", "price_check", f"req-{i}", "s1", 1.5, None, 10, 20, None)
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_records_are_batched_and_keep_the_ndjson_shape(tmp_path):
+    path = tmp_path / "logs" / "tool_invocations.ndjson"
+    writer = BatchedLogWriter(path, flush_interval=60)
+    for i in range(5):
+        assert writer.emit(*_record(i)) is True
+    assert not path.exists()  # nothing written until a flush trigger
+
+    assert writer.flush()
+    lines = _lines(path)
+    writer.close()
+
+    assert [line["request_id"] for line in lines] == [f"req-{i}" for i in range(5)]
+    assert set(lines[0]) == {
+        "ts", "level", "event", "message", "tool_name", "request_id", "session_id",
+        "latency_ms", "cache_status", "token_input", "token_output", "error_code",
+    }
+    assert writer.written == 5
+
+
+def test_flushes_on_batch_size_and_interval(tmp_path):
+    path = tmp_path / "log.ndjson"
+    writer = BatchedLogWriter(path, batch_size=3, flush_interval=0.05)
+    for i in range(3):
+        writer.emit(*_record(i))
+    writer.emit(*_record(3))
+    deadline = time.monotonic() + 2
+    while writer.written < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    writer.close()
+    assert len(_lines(path)) == 4
+
+
+def test_full_queue_drops_and_reports(tmp_path):
+    path = tmp_path / "log.ndjson"
+    writer = BatchedLogWriter(path, max_queue=0)
+    assert writer.emit(*_record(0)) is False
+    assert writer.dropped == 1
+
+    writer.max_queue = 100
+    writer.emit(*_record(1))
+    writer.flush()
+    writer.close()
+    events = [line["event"] for line in _lines(path)]
+    assert events == ["tool_invocation_success", "log_records_dropped"]
+
+
+def test_rotates_by_size_and_day_with_retention(tmp_path):
+    path = tmp_path / "log.ndjson"
+    writer = BatchedLogWriter(path, max_bytes=600, retention=2)
+    for i in range(12):
+        writer.emit(*_record(i))
+        writer.flush()
+    writer.close()
+    rotated = writer.rotated_files()
+    assert len(rotated) == 2
+    assert all(path.stat().st_size <= 600 for path in [path, *rotated])
+
+    # An active file left over from a previous day is rotated on the next record
+    stale = tmp_path / "old.ndjson"
+    stale.write_text(json.dumps({"ts": "2020-01-01T00:00:00+00:00"}) + "\n", encoding="utf-8")
+    day_2020 = time.mktime((2020, 1, 1, 12, 0, 0, 0, 0, 0))
+    os.utime(stale, (day_2020, day_2020))
+    writer = BatchedLogWriter(stale)
+    writer.emit(*_record(0))
+    writer.flush()
+    writer.close()
+    assert (tmp_path / "old.2020-01-01.0.ndjson").exists()
+    assert len(_lines(stale)) == 1
@@ -0,0 +1,35 @@
+"""Tests for the quotation memory store backends."""
+
+import asyncio
+import time
+
+import pytest
+
+from mcp.storage.memory_store import FileStore
+
+
+@pytest.mark.asyncio
+async def test_file_store_leaves_the_loop_responsive(tmp_path, monkeypatch):
+    store = FileStore(tmp_path / "memory.json")
+    save_items = store._save_items
+
+    def slow_save(items):
+        time.sleep(0.1)
+        save_items(items)
+
+    monkeypatch.setattr(store, "_save_items", slow_save)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    saved = await asyncio.gather(*(store.save_quotation({"n": n}, [1.0, float(n)]) for n in range(3)))
+    tick_task.cancel()
+
+    assert ticks >= 15  # loop kept ticking through three 0.1s file writes
+    similar = await store.retrieve_similar([1.0, 0.0], limit=10)
+    assert sorted(item["quotation_id"] for item in similar) == sorted(item["quotation_id"] for item in saved)
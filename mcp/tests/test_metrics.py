@@ -0,0 +1,97 @@
+"""Tests for the in-process metrics registry (mcp.metrics)."""
+
+import asyncio
+
+import pytest
+
+from mcp import metrics, observability
+from mcp.handlers.metrics import handle_server_metrics
+from mcp.log_writer import BatchedLogWriter
+from mcp.metrics import MetricsRegistry
+from mcp.observability import (
+    get_invocation_context,
+    log_tool_invocation_error,
+    log_tool_invocation_start,
+    log_tool_invocation_success,
+)
+from mcp.tasks.manager import TaskManager
+from mcp.tasks.models import TaskType
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ("tool",))
+    latency = registry.histogram("latency_ms", "Latency", ("tool",), buckets=(1, 10))
+    calls.labels('price"check').inc()
+    for value in (0.5, 5, 50):
+        latency.labels("bom").observe(value)
+    registry.register_collector(lambda: [("up", "gauge", "Up", {}, 1)])
+
+    text = registry.render()
+    assert '# TYPE calls_total counter' in text
+    assert 'calls_total{tool="price\\"check"} 1' in text
+    assert 'latency_ms_bucket{tool="bom",le="1"} 1' in text
+    assert 'latency_ms_bucket{tool="bom",le="10"} 2' in text
+    assert 'latency_ms_bucket{tool="bom",le="+Inf"} 3' in text
+    assert 'latency_ms_count{tool="bom"} 3' in text
+    assert text.endswith("up 1\n")
+
+
+def test_histogram_quantiles_and_label_cap(monkeypatch):
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_ms", "Latency", buckets=(10, 20, 30, 40))
+    for value in range(1, 41):
+        latency.labels().observe(value)
+    child = latency.labels()
+    assert child.quantile(0.5) == 20
+    assert 37 <= child.quantile(0.95) <= 40
+
+    monkeypatch.setattr(metrics, "MAX_CHILDREN", 2)
+    calls = registry.counter("calls_total", "Calls", ("tool",))
+    for tool in ("a", "b", "c", "d"):
+        calls.labels(tool).inc()
+    assert {labels["tool"]: child.value for labels, child in calls.children()} == {"a": 1, "b": 1, "other": 2}
+
+
+def test_invocation_hooks_feed_tool_metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr(observability, "WRITER", BatchedLogWriter(tmp_path / "log.ndjson"))
+    context = get_invocation_context("metrics_probe", {"cache_status": "hit"})
+    started = log_tool_invocation_start(context, 10)
+    assert metrics.TOOL_IN_FLIGHT.labels("metrics_probe").value == 1
+    log_tool_invocation_success(context, started, 10, 30)
+    log_tool_invocation_error(context, log_tool_invocation_start(context, 10), "BOOM", 10)
+
+    assert metrics.TOOL_IN_FLIGHT.labels("metrics_probe").value == 0
+    assert metrics.TOOL_CALLS.labels("metrics_probe", "ok").value == 1
+    assert metrics.TOOL_ERRORS.labels("metrics_probe", "BOOM").value == 1
+    assert metrics.TOOL_LATENCY.labels("metrics_probe").count == 2
+    assert metrics.TOOL_TOKENS.labels("metrics_probe", "output").value == 30
+    assert metrics.TOOL_CACHE.labels("metrics_probe", "hit").value == 1
+
+
+@pytest.mark.asyncio
+async def test_task_manager_feeds_task_metrics():
+    manager = TaskManager()
+
+    async def worker(task):
+        return {"ok": True}
+
+    manager.register_worker(TaskType.BULK_PRICING, worker)
+    finished = metrics.TASKS_FINISHED.labels("bulk_price_check", "completed").value
+    await manager.submit(TaskType.BULK_PRICING, {"queries": []})
+    await asyncio.sleep(0.01)
+
+    assert metrics.TASKS_FINISHED.labels("bulk_price_check", "completed").value == finished + 1
+    assert metrics.TASKS_RUNNING.labels("bulk_price_check").value == 0
+
+
+@pytest.mark.asyncio
+async def test_server_metrics_tool():
+    metrics.TOOL_CALLS.labels("price_check", "ok").inc()
+    result = await handle_server_metrics({"prefix": "mcp_tool_calls"})
+    assert result["ok"] is True
+    assert list(result["metrics"]) == ["mcp_tool_calls_total"]
+
+    text = (await handle_server_metrics({"format": "prometheus", "prefix": "mcp_tool_calls"}))["text"]
+    assert text.startswith("# HELP mcp_tool_calls_total")
+    assert all("mcp_tool_calls_total" in line for line in text.splitlines())
@@ -0,0 +1,93 @@
+"""Tests for the multi_call meta tool (mcp.handlers.multi_call)."""
+
+import asyncio
+
+import pytest
+
+from mcp.handlers import multi_call
+from mcp.handlers.bom import handle_bom_calculate
+from mcp.handlers.multi_call import configure_multi_call, handle_multi_call
+from mcp.handlers.pricing import handle_price_check
+
+HANDLERS = {"price_check": handle_price_check, "bom_calculate": handle_bom_calculate}
+
+
+@pytest.fixture(autouse=True)
+def _configured(monkeypatch):
+    monkeypatch.setattr(multi_call, "_dispatch", None)
+    monkeypatch.setattr(multi_call, "_tool_names", frozenset())
+
+    async def dispatch(name, arguments):
+        return await HANDLERS[name](arguments)
+
+    configure_multi_call(dispatch, HANDLERS)
+
+
+@pytest.mark.asyncio
+async def test_steps_pass_results_by_reference():
+    result = await handle_multi_call({"steps": [
+        {"id": "price", "tool": "price_check", "arguments": {"query": "ISD100EPS", "filter_type": "sku"}},
+        {"id": "bom", "tool": "bom_calculate", "arguments": {
+            "product_family": "ISODEC",
+            "thickness_mm": {"$ref": "price.matches.0.thickness_mm"},
+            "core_type": "EPS",
+            "usage": "techo",
+            "length_m": 5,
+            "width_m": 11,
+        }},
+    ]})
+
+    assert result["ok"] is True
+    assert result["summary"] == {"total": 2, "succeeded": 2, "failed": 0, "skipped": 0}
+    bom = result["steps"][1]
+    assert bom["id"] == "bom" and bom["ok"] is True
+    assert bom["result"]["summary"]["panel_count"] == 10
+
+
+@pytest.mark.asyncio
+async def test_failed_step_skips_dependents_only():
+    result = await handle_multi_call({"steps": [
+        {"tool": "price_check", "arguments": {"query": "ISD100EPS", "thickness_mm": -5}},
+        {"tool": "price_check", "arguments": {"query": {"$ref": "0.matches.0.sku"}}},
+        {"tool": "price_check", "arguments": {"query": "ISD100EPS", "filter_type": "sku"}},
+    ]})
+
+    statuses = [(s["id"], s["ok"], s.get("skipped", False)) for s in result["steps"]]
+    assert statuses == [("0", False, False), ("1", False, True), ("2", True, False)]
+    assert result["steps"][1]["error"]["code"] == "DEPENDENCY_FAILED"
+    assert result["summary"] == {"total": 3, "succeeded": 1, "failed": 1, "skipped": 1}
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_concurrently(monkeypatch):
+    async def slow(arguments):
+        await asyncio.sleep(0.1)
+        return {"ok": True}
+
+    monkeypatch.setitem(HANDLERS, "price_check", slow)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    result = await handle_multi_call({"steps": [{"tool": "price_check"} for _ in range(5)]})
+    assert result["summary"]["succeeded"] == 5
+    assert loop.time() - started < 0.3
+
+
+@pytest.mark.asyncio
+async def test_invalid_plans_are_rejected_before_running():
+    forward = await handle_multi_call({"steps": [
+        {"tool": "price_check", "arguments": {"query": {"$ref": "later.sku"}}},
+        {"id": "later", "tool": "price_check", "arguments": {"query": "x"}},
+    ]})
+    assert forward["error"]["code"] == "INVALID_REFERENCE"
+
+    nested = await handle_multi_call({"steps": [{"tool": "multi_call", "arguments": {"steps": []}}]})
+    assert nested["error"]["code"] == "UNKNOWN_TOOL"
+
+    empty = await handle_multi_call({"steps": []})
+    assert empty["error"]["code"] == "INVALID_STEPS"
+
+    bad_path = await handle_multi_call({"steps": [
+        {"id": "p", "tool": "price_check", "arguments": {"query": "ISD100EPS", "filter_type": "sku"}},
+        {"tool": "price_check", "arguments": {"query": {"$ref": "p.nope.0"}}},
+    ]})
+    assert bad_path["steps"][1]["error"]["code"] == "INVALID_REFERENCE"
@@ -0,0 +1,52 @@
+"""Tests for the shared search analyzer and lookup indexes."""
+
+from mcp.search.analyzer import analyze, fold, stem
+from mcp.search.fuzzy import FuzzyIndex, edit_distance
+
+
+class TestAnalyzer:
+    """Index-time and query-time term analysis."""
+
+    def test_folds_accents(self):
+        assert fold("Canalón Cámara") == "canalon camara"
+        assert analyze("cámara") == analyze("camara")
+
+    def test_stems_spanish_plurals(self):
+        assert stem("techos") == "techo"
+        assert stem("paneles") == "panel"
+        assert stem("canalones") == "canalon"
+        assert stem("eps") == "eps"
+        assert stem("100") == "100"
+
+    def test_expands_abbreviations_and_synonyms(self):
+        assert analyze("Galv.") == ["galvanizado"]
+        assert analyze("Perf. Ch.") == ["perfil", "chapa"]
+        assert analyze("cubiertas") == analyze("roof") == ["techo"]
+
+    def test_expands_un_only_after_a_number(self):
+        assert analyze("un panel de 100mm") == ["un", "panel", "de", "100", "mm"]
+        assert analyze("10 un") == analyze("10un") == ["10", "unidad"]
+
+    def test_splits_letters_from_digits(self):
+        assert analyze("IROOF30 100mm") == ["iroof", "30", "100", "mm"]
+
+
+class TestFuzzyIndex:
+    """Deletes-dictionary typo lookup."""
+
+    def test_edit_distance_is_bounded(self):
+        assert edit_distance("isodek", "isodec", 2) == 1
+        assert edit_distance("iroof", "irof", 2) == 1
+        assert edit_distance("ab", "ba", 2) == 1
+        assert edit_distance("isodec", "gotero", 2) == 3
+
+    def test_lookup_orders_by_distance_then_frequency(self):
+        index = FuzzyIndex(["iroof50", "iroof30", "iroof30", "isodec"])
+        assert index.lookup("iroof50") == [("iroof50", 0)]
+        assert index.lookup("irof50")[0] == ("iroof50", 1)
+        assert index.correct("isodek") == "isodec"
+        assert index.correct("xyzxyz") is None
+
+    def test_short_terms_allow_one_edit(self):
+        index = FuzzyIndex(["pir", "pvc"])
+        assert index.lookup("pur") == [("pir", 1)]
@@ -0,0 +1,169 @@
+"""Tests for the shared state store and multi-worker plumbing."""
+
+import asyncio
+import multiprocessing
+import sqlite3
+import time
+
+import pytest
+
+from mcp.coalescing import CACHE_COALESCED, CACHE_HIT, CACHE_MISS, Singleflight
+from mcp.prefork import forward_request
+from mcp.storage.shared_state import MemoryStateStore, SQLiteStateStore, build_state_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = MemoryStateStore() if request.param == "memory" else SQLiteStateStore(tmp_path / "state.sqlite3")
+    yield store
+    store.close()
+
+
+def test_store_operations(store):
+    store.put("ns", "a", {"x": 1})
+    assert store.get("ns", "a") == {"x": 1}
+    assert store.get("other", "a") is None
+
+    assert store.put_if_absent("ns", "a", 2) is False
+    assert store.put_if_absent("ns", "b", 2) is True
+    assert sorted(store.items("ns")) == [("a", {"x": 1}), ("b", 2)]
+
+    assert store.pop("ns", "a") == {"x": 1}
+    assert store.pop("ns", "a") is None
+
+    store.put("ns", "short", 1, ttl=0.05)
+    time.sleep(0.1)
+    assert store.get("ns", "short") is None
+    assert store.put_if_absent("ns", "short", 2, ttl=10) is True
+
+    with store.lock("corrections_log"):
+        pass
+
+
+def _write_from_child(path):
+    SQLiteStateStore(path).put("ns", "child", [1, 2])
+
+
+def test_sqlite_store_is_shared_between_processes(tmp_path):
+    path = tmp_path / "state.sqlite3"
+    store = SQLiteStateStore(path)
+    store.put("ns", "parent", True)
+    process = multiprocessing.get_context("fork").Process(target=_write_from_child, args=(path,))
+    process.start()
+    process.join(10)
+    assert process.exitcode == 0
+    assert store.get("ns", "child") == [1, 2]
+    assert store.shared and not MemoryStateStore.shared
+
+
+def test_sqlite_store_purges_expired_rows_periodically(tmp_path, monkeypatch):
+    from mcp.storage import shared_state
+
+    monkeypatch.setattr(shared_state, "PURGE_EVERY_WRITES", 4)
+    store = SQLiteStateStore(tmp_path / "state.sqlite3")
+    for index in range(3):
+        store.put("memo", str(index), index, ttl=0.01)
+    time.sleep(0.05)
+    store.put("memo", "live", 1, ttl=60)
+    rows = store._conn().execute("SELECT key FROM state").fetchall()
+    assert rows == [("live",)]
+    store.close()
+
+
+def test_sqlite_store_rejects_old_sqlite(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 31, 1))
+    with pytest.raises(RuntimeError, match="needs 3.35.0"):
+        SQLiteStateStore(tmp_path / "state.sqlite3")
+
+
+def test_build_state_store_selects_backend(tmp_path):
+    assert isinstance(build_state_store("memory"), MemoryStateStore)
+    assert isinstance(build_state_store("sqlite", tmp_path / "s.db"), SQLiteStateStore)
+
+
+@pytest.mark.asyncio
+async def test_shared_memo_serves_other_workers(tmp_path):
+    store = SQLiteStateStore(tmp_path / "state.sqlite3")
+    first, second = Singleflight(store=store), Singleflight(store=store)
+    key = first.key("price_check", {"query": "ISODEC"})
+    calls = 0
+
+    async def execute():
+        nonlocal calls
+        calls += 1
+        return ("text", 3)
+
+    assert await first.do(key, execute) == (("text", 3), CACHE_MISS)
+    await first.flush()
+    assert await second.do(second.key("price_check", {"query": "ISODEC"}), execute) == (["text", 3], CACHE_HIT)
+    assert calls == 1
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_memo_lookup_is_coalesced(tmp_path):
+    store = SQLiteStateStore(tmp_path / "state.sqlite3")
+    flight = Singleflight(store=store)
+    key = flight.key("price_check", {"query": "ISODEC"})
+    gets = 0
+    original_get = store.get
+
+    def counting_get(namespace, item):
+        nonlocal gets
+        gets += 1
+        return original_get(namespace, item)
+
+    store.get = counting_get
+
+    async def execute():
+        return "text"
+
+    results = await asyncio.gather(*(flight.do(key, execute) for _ in range(5)))
+    assert sorted(status for _, status in results) == [CACHE_COALESCED] * 4 + [CACHE_MISS]
+    assert gets == 1
+    await flight.flush()
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_forward_request_relays_the_owner_response():
+    received = {}
+
+    async def owner(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(next(
+            line.split(b":")[1] for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")
+        ))
+        received["head"] = head
+        received["body"] = await reader.readexactly(length)
+        writer.write(b"HTTP/1.1 202 Accepted\r\ncontent-type: text/plain\r\ncontent-length: 8\r\n\r\nAccepted")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(owner, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    body = [{"type": "http.request", "body": b'{"jsonrpc":', "more_body": True},
+            {"type": "http.request", "body": b'"2.0"}', "more_body": False}]
+    sent = []
+
+    async def receive():
+        return body.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "method": "POST",
+        "path": "/messages/1",
+        "raw_path": b"/messages/1",
+        "query_string": b"session_id=abc",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"example.com")],
+    }
+    await forward_request(scope, receive, send, port)
+    server.close()
+
+    assert received["head"].startswith(b"POST /messages/1?session_id=abc HTTP/1.1")
+    assert b"example.com" not in received["head"]
+    assert received["body"] == b'{"jsonrpc":"2.0"}'
+    assert sent[0]["status"] == 202
+    assert sent[1]["body"] == b"Accepted"
@@ -0,0 +1,87 @@
+"""Tests for per-stage tracing spans and sampled profiling (mcp.tracing)."""
+
+import json
+
+import pytest
+
+from mcp import observability, tracing
+from mcp.execution import ExecutionPolicy, HandlerClass, ToolExecutor
+from mcp.handlers.pricing import handle_price_check
+from mcp.log_writer import BatchedLogWriter
+from mcp.observability import get_invocation_context, log_tool_trace
+from mcp.tracing import end_trace, span, start_trace
+
+
+def test_span_is_a_noop_without_a_trace():
+    assert start_trace("price_check", "r1", sample_rate=0, profile_rate=0) is None
+    with span("pricing.search") as value:
+        assert value is None
+    assert tracing.current_trace() is None
+
+
+def test_nested_spans_record_parents_and_errors():
+    token = start_trace("bom_calculate", "r1", sample_rate=1.0)
+    with span("outer", step=1):
+        with span("inner"):
+            pass
+        with pytest.raises(KeyError), span("failing"):
+            raise KeyError("x")
+    trace = end_trace(token)
+
+    spans = {record["name"]: record for record in trace.finished_spans()}
+    assert spans["outer"]["parent"] is None
+    assert spans["outer"]["attrs"] == {"step": 1}
+    assert spans["inner"]["parent"] == spans["outer"]["id"]
+    assert spans["failing"]["error"] == "KeyError"
+    assert spans["outer"]["duration_ms"] >= spans["inner"]["duration_ms"]
+    assert trace.duration_ms is not None
+    assert tracing.current_trace() is None
+
+
+@pytest.mark.asyncio
+async def test_spans_follow_handlers_into_worker_threads():
+    executor = ToolExecutor({"price_check": ExecutionPolicy(HandlerClass.CPU)}, cpu_workers=1)
+    token = start_trace("price_check", "r1", sample_rate=1.0)
+    with span("execute"):
+        result = await executor.run("price_check", handle_price_check, {"query": "ISODEC"})
+    trace = end_trace(token)
+    executor.shutdown()
+
+    assert result["ok"] is True
+    spans = {record["name"]: record for record in trace.finished_spans()}
+    assert spans["validate"]["parent"] == spans["execute"]["id"]
+    assert spans["pricing.search"]["parent"] == spans["execute"]["id"]
+    assert "pricing.map" in spans
+
+
+@pytest.mark.asyncio
+async def test_slow_profiled_calls_get_a_profile_summary(monkeypatch):
+    monkeypatch.setattr(tracing, "PROFILE_SLOW_MS", 0)
+    executor = ToolExecutor({"price_check": ExecutionPolicy(HandlerClass.CPU)}, cpu_workers=1)
+    token = start_trace("price_check", "r1", sample_rate=0, profile_rate=1.0)
+    await executor.run("price_check", handle_price_check, {"query": "ISODEC"})
+    trace = end_trace(token)
+    executor.shutdown()
+
+    assert not trace.sampled
+    assert tracing.should_emit(trace)
+    assert "handle_price_check" in trace.profile_summary
+
+
+def test_trace_record_is_written_to_the_invocation_log(monkeypatch, tmp_path):
+    path = tmp_path / "log.ndjson"
+    writer = BatchedLogWriter(path)
+    monkeypatch.setattr(observability, "WRITER", writer)
+    token = start_trace("catalog_search", "r1", sample_rate=1.0)
+    with span("catalog.rank"):
+        pass
+    trace = end_trace(token)
+
+    log_tool_trace(get_invocation_context("catalog_search", {}), trace)
+    writer.flush()
+    writer.close()
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["event"] == "tool_trace"
+    assert record["latency_ms"] == trace.duration_ms
+    assert [s["name"] for s in record["spans"]] == ["catalog.rank"]
+    assert "profile" not in record
@@ -0,0 +1,82 @@
+"""Tests for schema-compiled tool argument validation (mcp.validation)."""
+
+import pytest
+
+from mcp.handlers.bom import handle_bom_calculate
+from mcp.handlers.catalog import handle_catalog_search
+from mcp.validation import compile_validator, load_tool_schema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "minLength": 2},
+        "mode": {"type": "string", "enum": ["fast", "full"], "default": "fast"},
+        "size": {"type": "number", "exclusiveMinimum": 0, "maximum": 10},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 30, "default": 5},
+        "items": {
+            "type": "array",
+            "maxItems": 2,
+            "items": {"type": "object", "properties": {"n": {"type": "integer"}}, "required": ["n"]},
+        },
+    },
+    "required": ["query"],
+}
+
+
+def _validator(**kwargs):
+    return compile_validator(SCHEMA, "BAD_INPUT", codes={"size": "BAD_SIZE"}, **kwargs)
+
+
+def test_coerces_and_applies_defaults():
+    args, error = _validator(strip=("query",))({"query": "  panel ", "size": "2.5", "mode": "FULL"})
+    assert error is None
+    assert args == {"query": "panel", "size": 2.5, "mode": "full", "limit": 5}
+
+
+def test_violations_map_to_contract_codes():
+    validate = _validator(required_code="MISSING")
+    _, error = validate({"size": 1})
+    assert error == {"code": "MISSING", "message": "query is required"}
+
+    _, error = validate({"query": "ok", "size": 0})
+    assert error["code"] == "BAD_SIZE"
+    assert error["message"] == "size must be > 0 and <= 10"
+    assert error["details"] == {"field": "size", "received": 0}
+
+    _, error = validate({"query": "ok", "size": True})
+    assert error["code"] == "BAD_SIZE"
+
+    _, error = validate({"query": "ok", "items": [{"n": 1}, {"x": 2}]})
+    assert error["code"] == "BAD_INPUT"
+    assert error["message"] == "items [1] n is required"
+
+
+def test_clamped_fields_never_fail():
+    validate = _validator(clamp=("limit",))
+    assert validate({"query": "ok", "limit": 500})[0]["limit"] == 30
+    assert validate({"query": "ok", "limit": "many"})[0]["limit"] == 5
+
+
+def test_contract_constraints_overlay_tool_schema():
+    schema = load_tool_schema("bom_calculate")["inputSchema"]
+    thickness = schema["properties"]["thickness_mm"]
+    assert thickness["minimum"] == 30 and thickness["maximum"] == 250
+    assert "description" in thickness
+
+
+@pytest.mark.asyncio
+async def test_handlers_receive_coerced_arguments():
+    result = await handle_bom_calculate({
+        "product_family": "isodec",
+        "thickness_mm": "100",
+        "core_type": "eps",
+        "usage": "techo",
+        "length_m": 5,
+        "width_m": 11,
+    })
+    assert result["ok"] is True
+    assert result["summary"]["panel_count"] == 10
+
+    search = await handle_catalog_search({"query": "gotero", "limit": 500})
+    assert search["ok"] is True
+    assert len(search["results"]) <= 30
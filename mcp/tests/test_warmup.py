@@ -0,0 +1,56 @@
+"""Tests for startup warmup and readiness (mcp.warmup)."""
+
+import threading
+
+from mcp.handlers import pricing
+from mcp.handlers.catalog import handle_catalog_search
+from mcp.handlers.pricing import handle_price_check
+from mcp.warmup import Readiness, run_warmup, start_warmup
+
+
+def test_builds_indexes_and_replays_warm_queries():
+    readiness = Readiness()
+    assert readiness.ready is False
+    status = run_warmup(
+        handlers={"price_check": handle_price_check, "catalog_search": handle_catalog_search},
+        queries=[
+            {"tool": "price_check", "arguments": {"query": "ISD100EPS", "filter_type": "sku"}},
+            {"tool": "catalog_search", "arguments": {"query": "x"}},
+            {"tool": "write_file", "arguments": {"path": "x"}},
+        ],
+        builders={"pricing_index": pricing._get_pricing_index},
+        readiness=readiness,
+    )
+
+    assert status["ready"] is True and readiness.wait(0)
+    steps = status["steps"]
+    assert steps["pricing_index"]["ok"] is True
+    assert steps["query[0]:price_check"]["ok"] is True
+    assert steps["query[1]:catalog_search"]["error"] == "QUERY_TOO_SHORT"
+    assert status["failed_steps"] == ["query[1]:catalog_search", "query[2]:write_file"]
+
+
+def test_index_builders_run_in_parallel_and_failures_do_not_block():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def broken():
+        raise FileNotFoundError("kb missing")
+
+    status = run_warmup(
+        builders={"a": barrier.wait, "b": barrier.wait, "c": barrier.wait, "broken": broken},
+        readiness=Readiness(),
+    )
+    assert status["ready"] is True
+    assert status["failed_steps"] == ["broken"]
+    assert "kb missing" in status["steps"]["broken"]["error"]
+
+
+def test_default_builders_warm_the_real_indexes():
+    status = run_warmup(readiness=Readiness())
+    assert status["steps"]["pricing_index"]["ok"] is True
+    assert status["steps"]["catalog_index"]["ok"] is True
+    assert status["steps"]["bom_system_tables"]["ok"] is True
+
+
+def test_disabled_warmup_is_ready_immediately():
+    assert start_warmup({}, enabled=False) is None
@@ -0,0 +1,212 @@
+"""Per-stage tracing spans and sampled profiling for tool calls.
+
+call_tool starts a trace for a sampled fraction of calls
+(``MCP_TRACE_SAMPLE_RATE``); handlers and shared helpers mark their
+stages with ``span``::
+
+    with span("pricing.search", filter_type=filter_type):
+        ...
+
+The active trace lives in a context variable, so it follows the call into
+child tasks and (through the execution layer, which copies the context)
+into worker threads. Outside a sampled call ``span`` is one ContextVar
+lookup returning a shared no-op context manager. Timestamps come from
+``time.perf_counter_ns``; spans record their parent, offset from the
+start of the call and duration, and the finished trace is written as a
+``tool_trace`` record to the invocation log.
+
+Profiling: ``MCP_PROFILE_SAMPLE_RATE`` additionally runs a sampled
+fraction of calls under cProfile (in whichever thread executes the
+handler). When such a call takes at least ``MCP_PROFILE_SLOW_MS``, the
+top functions by cumulative time are attached to its trace record.
+Handlers on the CPU process pool run in another process and are not
+traced.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from typing import Any
+
+PROFILE_TOP_N = 25
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+TRACE_SAMPLE_RATE = _env_float("MCP_TRACE_SAMPLE_RATE", 0.0)
+PROFILE_SAMPLE_RATE = _env_float("MCP_PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_SLOW_MS = _env_float("MCP_PROFILE_SLOW_MS", 250.0)
+
+
+class Trace:
+    """Spans collected for one tool call."""
+
+    __slots__ = ("tool", "request_id", "start_ns", "duration_ms", "spans", "sampled", "profile", "profile_summary")
+
+    def __init__(self, tool: str, request_id: str, sampled: bool = True, profile: bool = False) -> None:
+        self.tool = tool
+        self.request_id = request_id
+        self.sampled = sampled
+        self.start_ns = time.perf_counter_ns()
+        self.duration_ms: float | None = None
+        self.spans: list[dict[str, Any] | None] = []
+        self.profile = profile
+        self.profile_summary: str | None = None
+
+    def finished_spans(self) -> list[dict[str, Any]]:
+        # Unfinished spans (still open in an abandoned worker) are left out
+        return [span for span in self.spans if span is not None]
+
+
+_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("mcp_trace", default=None)
+_parent: contextvars.ContextVar[int | None] = contextvars.ContextVar("mcp_span_parent", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_attrs", "_index", "_token", "_start")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict[str, Any]) -> None:
+        self._trace = trace
+        self._name = name
+        self._attrs = attrs
+
+    def __enter__(self) -> None:
+        spans = self._trace.spans
+        self._index = len(spans)
+        spans.append(None)
+        self._token = _parent.set(self._index)
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        end = time.perf_counter_ns()
+        parent = None
+        try:
+            _parent.reset(self._token)
+        except ValueError:  # exited in another context; keep the trace intact
+            pass
+        else:
+            parent = _parent.get()
+        record: dict[str, Any] = {
+            "name": self._name,
+            "id": self._index,
+            "parent": parent,
+            "start_ms": round((self._start - self._trace.start_ns) / 1e6, 3),
+            "duration_ms": round((end - self._start) / 1e6, 3),
+        }
+        if self._attrs:
+            record["attrs"] = self._attrs
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self._trace.spans[self._index] = record
+        return False
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Context manager timing one stage of the current traced call (no-op otherwise)."""
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, attrs)
+
+
+def current_trace() -> Trace | None:
+    """The trace of the call running in this context, if it is sampled."""
+    return _trace.get()
+
+
+def start_trace(
+    tool: str,
+    request_id: str,
+    sample_rate: float | None = None,
+    profile_rate: float | None = None,
+) -> contextvars.Token | None:
+    """Start a trace for this call if sampled; returns the token for ``end_trace``."""
+    sample_rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    profile_rate = PROFILE_SAMPLE_RATE if profile_rate is None else profile_rate
+    if sample_rate <= 0 and profile_rate <= 0:
+        return None
+    sampled = sample_rate > 0 and random.random() < sample_rate
+    profile = profile_rate > 0 and random.random() < profile_rate
+    if not sampled and not profile:
+        return None
+    return _trace.set(Trace(tool, request_id, sampled=sampled, profile=profile))
+
+
+def end_trace(token: contextvars.Token) -> Trace | None:
+    """Close the trace started with ``token`` and return it."""
+    trace = _trace.get()
+    _trace.reset(token)
+    if trace is not None:
+        trace.duration_ms = round((time.perf_counter_ns() - trace.start_ns) / 1e6, 3)
+    return trace
+
+
+def should_emit(trace: Trace) -> bool:
+    """Sampled traces are always written; profiled-only ones when the call was slow."""
+    return trace.sampled or (trace.duration_ms or 0) >= PROFILE_SLOW_MS
+
+
+_profiling = threading.local()
+
+
+class _Profiled:
+    """Run the enclosed block under cProfile when the current trace asks for it."""
+
+    __slots__ = ("_profiler", "_trace")
+
+    def __enter__(self) -> None:
+        self._profiler = None
+        trace = _trace.get()
+        # One profiler per thread: a second profiled call on the same thread runs unprofiled
+        if trace is None or not trace.profile or getattr(_profiling, "active", False):
+            return
+        self._trace = trace
+        self._profiler = cProfile.Profile()
+        _profiling.active = True
+        self._profiler.enable()
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        profiler = self._profiler
+        if profiler is None:
+            return False
+        profiler.disable()
+        _profiling.active = False
+        started = self._trace.start_ns
+        if (time.perf_counter_ns() - started) / 1e6 >= PROFILE_SLOW_MS:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+            self._trace.profile_summary = out.getvalue()
+        return False
+
+
+def profiled() -> Any:
+    """Context manager profiling the handler body for profile-sampled calls."""
+    trace = _trace.get()
+    if trace is None or not trace.profile:
+        return _NOOP
+    return _Profiled()
@@ -0,0 +1,344 @@
+"""Tool argument validation compiled from the JSON schemas.
+
+A tool's schema is the ``inputSchema`` of ``mcp/tools/<tool>.json`` with
+the ``input_schema`` of ``mcp_tools/contracts/<tool>.v1.json`` (when one
+exists) laid over it property by property, so contract constraints win.
+Each schema is compiled once into per-property check closures; a call
+then costs one pass over the arguments with no schema interpretation.
+
+Checks coerce as well as validate: numeric strings become numbers,
+integral floats become ints, numbers become strings for string fields and
+string enums match case-insensitively. The first violation becomes a v1
+error ``{"code", "message", "details": {"field", "received"}}`` whose code
+comes from the tool's contract error registry.
+
+Supported keywords: type, enum, default, minimum, maximum,
+exclusiveMinimum, exclusiveMaximum, minLength, maxLength, pattern,
+minItems, maxItems, items, properties, required. Other keywords are
+ignored; ``additionalProperties`` is not enforced so internal callers can
+pass extra context keys through.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import re
+from collections.abc import Awaitable, Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+from mcp_tools.contracts import CONTRACT_VERSION
+
+from .tracing import span
+
+TOOLS_DIR = Path(__file__).resolve().parent / "tools"
+CONTRACTS_DIR = Path(__file__).resolve().parent.parent / "mcp_tools" / "contracts"
+
+# (coerced value, error message or None)
+Check = Callable[[Any], tuple[Any, str | None]]
+Validator = Callable[[Any], tuple[dict[str, Any] | None, dict[str, Any] | None]]
+Handler = Callable[..., Awaitable[dict[str, Any]]]
+
+_validators: dict[str, Validator] = {}
+
+
+def load_tool_schema(name: str) -> dict[str, Any]:
+    """Tool definition from mcp/tools with the v1 contract's input constraints applied."""
+    with open(TOOLS_DIR / f"{name}.json", encoding="utf-8") as f:
+        tool = json.load(f)
+    contract_path = CONTRACTS_DIR / f"{name}.v1.json"
+    if not contract_path.is_file():
+        return tool
+
+    with open(contract_path, encoding="utf-8") as f:
+        contract_schema = json.load(f).get("input_schema", {})
+    schema = dict(tool["inputSchema"])
+    properties = {name: dict(prop) for name, prop in schema.get("properties", {}).items()}
+    for prop_name, constraints in contract_schema.get("properties", {}).items():
+        properties.setdefault(prop_name, {}).update(constraints)
+    schema["properties"] = properties
+    if "required" in contract_schema:
+        schema["required"] = contract_schema["required"]
+    return {**tool, "inputSchema": schema}
+
+
+def _types(schema: dict[str, Any]) -> tuple[str, ...]:
+    declared = schema.get("type", ())
+    return (declared,) if isinstance(declared, str) else tuple(declared)
+
+
+def _describe(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def _coerce_type(types: tuple[str, ...], value: Any) -> tuple[Any, str | None]:
+    """Coerce ``value`` to the first declared type it fits."""
+    if not types:
+        return value, None
+    for declared in types:
+        if declared == "string":
+            if isinstance(value, str):
+                return value, None
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value), None
+        elif declared == "number":
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return value, None
+            if isinstance(value, str):
+                try:
+                    return float(value), None
+                except ValueError:
+                    pass
+        elif declared == "integer":
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value, None
+            if isinstance(value, float) and value.is_integer():
+                return int(value), None
+            if isinstance(value, str):
+                try:
+                    number = float(value)
+                except ValueError:
+                    continue
+                if number.is_integer():
+                    return int(number), None
+        elif declared == "boolean":
+            if isinstance(value, bool):
+                return value, None
+        elif declared == "array":
+            if isinstance(value, list):
+                return value, None
+        elif declared == "object":
+            if isinstance(value, dict):
+                return value, None
+        elif declared == "null":
+            if value is None:
+                return value, None
+    if "number" in types or "integer" in types:
+        kind = "an integer" if "integer" in types and "number" not in types else "a valid number"
+        return value, f"must be {kind}"
+    return value, f"must be of type {' or '.join(types)} (got {_describe(value)})"
+
+
+def _compile_check(schema: dict[str, Any], strip: bool = False, clamp: bool = False) -> Check:
+    """Compile one property schema into a coerce-and-validate closure."""
+    types = _types(schema)
+    enum = schema.get("enum")
+    folded_enum = {str(v).casefold(): v for v in enum} if enum else None
+    minimum = schema.get("minimum")
+    maximum = schema.get("maximum")
+    exclusive_minimum = schema.get("exclusiveMinimum")
+    exclusive_maximum = schema.get("exclusiveMaximum")
+    min_length = schema.get("minLength")
+    max_length = schema.get("maxLength")
+    pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+    min_items = schema.get("minItems")
+    max_items = schema.get("maxItems")
+    item_check = _compile_check(schema["items"]) if isinstance(schema.get("items"), dict) else None
+    object_validator = (
+        _compile_object(schema) if "properties" in schema or "required" in schema else None
+    )
+    default = schema.get("default")
+    has_bounds = any(b is not None for b in (minimum, maximum, exclusive_minimum, exclusive_maximum))
+
+    if has_bounds:
+        low = ">" if exclusive_minimum is not None else ">="
+        low_value = exclusive_minimum if exclusive_minimum is not None else minimum
+        high = "<" if exclusive_maximum is not None else "<="
+        high_value = exclusive_maximum if exclusive_maximum is not None else maximum
+        if low_value is not None and high_value is not None:
+            range_message = (
+                f"must be between {low_value} and {high_value}"
+                if (low, high) == (">=", "<=")
+                else f"must be {low} {low_value} and {high} {high_value}"
+            )
+        elif low_value is not None:
+            range_message = f"must be {low} {low_value}"
+        else:
+            range_message = f"must be {high} {high_value}"
+
+    def check(value: Any) -> tuple[Any, str | None]:
+        value, message = _coerce_type(types, value)
+        if message is not None:
+            if clamp and default is not None:
+                return default, None
+            return value, message
+
+        if isinstance(value, str):
+            if strip:
+                value = value.strip()
+            if min_length is not None and len(value) < min_length:
+                return value, f"must be at least {min_length} characters long"
+            if max_length is not None and len(value) > max_length:
+                return value, f"must be at most {max_length} characters long"
+            if pattern is not None and not pattern.search(value):
+                return value, f"must match pattern {pattern.pattern}"
+
+        if folded_enum is not None and value not in enum:
+            canonical = folded_enum.get(str(value).casefold()) if isinstance(value, str) else None
+            if canonical is None:
+                return value, f"must be one of {enum}"
+            value = canonical
+
+        if has_bounds and isinstance(value, (int, float)) and not isinstance(value, bool):
+            if clamp:
+                if minimum is not None and value < minimum:
+                    value = minimum
+                if maximum is not None and value > maximum:
+                    value = maximum
+            elif (
+                (minimum is not None and value < minimum)
+                or (maximum is not None and value > maximum)
+                or (exclusive_minimum is not None and value <= exclusive_minimum)
+                or (exclusive_maximum is not None and value >= exclusive_maximum)
+            ):
+                return value, range_message
+
+        if isinstance(value, list):
+            if min_items is not None and len(value) < min_items:
+                return value, f"must contain at least {min_items} items"
+            if max_items is not None and len(value) > max_items:
+                return value, f"must contain at most {max_items} items"
+            if item_check is not None:
+                items = []
+                for i, item in enumerate(value):
+                    item, message = item_check(item)
+                    if message is not None:
+                        return value, f"[{i}] {message}"
+                    items.append(item)
+                value = items
+
+        if isinstance(value, dict) and object_validator is not None:
+            coerced, error = object_validator(value)
+            if error is not None:
+                return value, error["message"]
+            value = coerced
+
+        return value, None
+
+    return check
+
+
+def _compile_object(
+    schema: dict[str, Any],
+    strip: Iterable[str] = (),
+    clamp: Iterable[str] = (),
+) -> Callable[[Any], tuple[dict[str, Any] | None, dict[str, Any] | None]]:
+    """Compile an object schema; errors carry the offending field, not a code yet."""
+    strip, clamp = set(strip), set(clamp)
+    required = tuple(schema.get("required", ()))
+    checks = tuple(
+        (name, _compile_check(prop, strip=name in strip, clamp=name in clamp))
+        for name, prop in schema.get("properties", {}).items()
+    )
+    defaults = tuple(
+        (name, prop["default"])
+        for name, prop in schema.get("properties", {}).items()
+        if "default" in prop
+    )
+
+    def validate(arguments: Any) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        if not isinstance(arguments, dict):
+            return None, {"field": None, "message": "arguments must be an object", "received": arguments}
+        args = dict(arguments)
+        for name in required:
+            value = args.get(name)
+            if value is None or (name in strip and isinstance(value, str) and not value.strip()):
+                return None, {"field": name, "message": f"{name} is required", "missing": True}
+        for name, check in checks:
+            value = args.get(name)
+            if value is None:
+                continue
+            coerced, message = check(value)
+            if message is not None:
+                return None, {"field": name, "message": f"{name} {message}", "received": value}
+            args[name] = coerced
+        for name, default in defaults:
+            if args.get(name) is None:
+                args[name] = default
+        return args, None
+
+    return validate
+
+
+def compile_validator(
+    schema: dict[str, Any],
+    default_code: str,
+    codes: dict[str, str] | None = None,
+    required_code: str | None = None,
+    strip: Iterable[str] = (),
+    clamp: Iterable[str] = (),
+) -> Validator:
+    """Compile a tool input schema into ``arguments -> (args, v1_error)``.
+
+    ``codes`` maps a property to its contract error code (``default_code``
+    otherwise); ``required_code`` overrides it for missing properties.
+    Properties in ``strip`` are whitespace-stripped before validation and
+    numeric properties in ``clamp`` are clamped into range (falling back to
+    their default when unparseable) instead of rejected.
+    """
+    codes = codes or {}
+    validate_object = _compile_object(schema, strip=strip, clamp=clamp)
+
+    def validate(arguments: Any) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        args, violation = validate_object(arguments)
+        if violation is None:
+            return args, None
+        field = violation["field"]
+        if violation.get("missing") and required_code is not None:
+            code = required_code
+        else:
+            code = codes.get(field, default_code)
+        error: dict[str, Any] = {"code": code, "message": violation["message"]}
+        if "received" in violation:
+            error["details"] = {"field": field, "received": violation["received"]}
+        return None, error
+
+    return validate
+
+
+def get_validator(tool: str) -> Validator:
+    """Return the compiled validator registered for ``tool``."""
+    return _validators[tool]
+
+
+def validate_arguments(
+    tool: str,
+    default_code: str,
+    codes: dict[str, str] | None = None,
+    required_code: str | None = None,
+    strip: Iterable[str] = (),
+    clamp: Iterable[str] = (),
+    legacy_error: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> Callable[[Handler], Handler]:
+    """Decorate a handler so its arguments pass ``tool``'s compiled schema first.
+
+    The schema is compiled when the handler module is imported. Invalid
+    arguments return the v1 error envelope (or ``legacy_error(error)`` when
+    called with ``legacy_format=True``); valid ones reach the handler
+    coerced and with schema defaults filled in.
+    """
+    validator = compile_validator(
+        load_tool_schema(tool)["inputSchema"],
+        default_code,
+        codes=codes,
+        required_code=required_code,
+        strip=strip,
+        clamp=clamp,
+    )
+    _validators[tool] = validator
+
+    def decorator(handler: Handler) -> Handler:
+        @functools.wraps(handler)
+        async def wrapper(arguments: dict[str, Any], legacy_format: bool = False) -> dict[str, Any]:
+            with span("validate", tool=tool):
+                args, error = validator(arguments)
+            if error is not None:
+                if legacy_format:
+                    return legacy_error(error) if legacy_error else {"error": error["message"]}
+                return {"ok": False, "contract_version": CONTRACT_VERSION, "error": error}
+            return await handler(args, legacy_format)
+
+        return wrapper
+
+    return decorator
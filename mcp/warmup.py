@@ -0,0 +1,221 @@
+"""Startup warmup and readiness for the MCP server.
+
+Without warmup the first call to each handler parses its KB files and
+builds its index (pricing, catalog, BOM system tables, calculator product
+index), so the first users after a deploy see multi-hundred-millisecond
+spikes. ``start_warmup`` runs those builds in parallel on a background
+thread pool (KB registry locks are per file and per index, so independent
+builds do not wait on each other), then replays the configured warm
+queries through the real handlers to prime their internal caches.
+
+``get_readiness()`` reports progress; the SSE transport serves it at
+``/ready`` (503 until warmup finishes) so load balancers hold traffic back
+until the process is warm. Failed steps are reported but do not block
+readiness: the handlers surface the same failure on first use.
+
+Warm queries come from ``warmup.queries`` in mcp_server_config.json and
+are limited to read-only tools. ``MCP_WARMUP_ENABLED=0`` skips warmup and
+reports ready immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
+
+from .coalescing import COALESCED_TOOLS
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+
+# Only side-effect-free tools may be replayed at startup
+WARM_QUERY_TOOLS = COALESCED_TOOLS
+
+
+def _warm_pricing() -> None:
+    from .handlers import pricing
+
+    pricing._get_pricing_index()
+
+
+def _warm_catalog() -> None:
+    from .handlers import catalog
+
+    catalog._get_catalog_index()
+
+
+def _warm_bom() -> None:
+    from .handlers import bom
+
+    rules = bom._load_bom_rules()
+    for system_key in rules.get("sistemas", rules.get("systems", {})):
+        bom._get_system_table(system_key)
+
+
+def _warm_calculator() -> None:
+    import quotation_calculator_v3
+
+    quotation_calculator_v3._get_product_index()
+    quotation_calculator_v3._load_accessories_catalog()
+
+
+INDEX_BUILDERS: dict[str, Callable[[], None]] = {
+    "pricing_index": _warm_pricing,
+    "catalog_index": _warm_catalog,
+    "bom_system_tables": _warm_bom,
+    "calculator_product_index": _warm_calculator,
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Readiness:
+    """Warmup progress, shared between the warmup thread and the transports."""
+
+    def __init__(self) -> None:
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._state: dict[str, Any] = {"started_at": None, "finished_at": None, "steps": {}}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until warmup finishes; returns readiness."""
+        return self._ready.wait(timeout)
+
+    def start(self) -> None:
+        with self._lock:
+            self._state = {"started_at": _now(), "finished_at": None, "steps": {}}
+        self._ready.clear()
+
+    def record(self, step: str, started: float, error: str | None = None) -> None:
+        outcome: dict[str, Any] = {"ok": error is None, "ms": round((time.perf_counter() - started) * 1000, 2)}
+        if error is not None:
+            outcome["error"] = error
+        with self._lock:
+            self._state["steps"][step] = outcome
+
+    def finish(self) -> None:
+        with self._lock:
+            self._state["finished_at"] = _now()
+        self._ready.set()
+
+    def status(self) -> dict[str, Any]:
+        """JSON-ready snapshot: ready flag, timestamps and per-step outcomes."""
+        with self._lock:
+            steps = dict(self._state["steps"])
+            return {
+                "ready": self.ready,
+                "started_at": self._state["started_at"],
+                "finished_at": self._state["finished_at"],
+                "failed_steps": sorted(name for name, step in steps.items() if not step["ok"]),
+                "steps": steps,
+            }
+
+
+_readiness = Readiness()
+
+
+def get_readiness() -> Readiness:
+    """Return the process-wide readiness tracker."""
+    return _readiness
+
+
+def _run_step(readiness: Readiness, name: str, fn: Callable[[], Any]) -> None:
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:  # noqa: BLE001 - reported through readiness
+        logger.warning("Warmup step %s failed: %s", name, e)
+        readiness.record(name, started, f"{type(e).__name__}: {e}")
+    else:
+        readiness.record(name, started)
+
+
+def _run_warm_queries(
+    readiness: Readiness,
+    handlers: dict[str, Handler],
+    queries: Iterable[dict[str, Any]],
+) -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        for index, query in enumerate(queries):
+            tool = query.get("tool")
+            name = f"query[{index}]:{tool}"
+            if tool not in WARM_QUERY_TOOLS or tool not in handlers:
+                readiness.record(name, time.perf_counter(), f"{tool} is not a read-only tool")
+                continue
+            started = time.perf_counter()
+            try:
+                result = loop.run_until_complete(handlers[tool](dict(query.get("arguments") or {})))
+            except Exception as e:  # noqa: BLE001
+                logger.warning("Warm query %s failed: %s", name, e)
+                readiness.record(name, started, f"{type(e).__name__}: {e}")
+                continue
+            error = result.get("error") if isinstance(result, dict) and result.get("ok") is False else None
+            readiness.record(name, started, error.get("code") if isinstance(error, dict) else error)
+    finally:
+        loop.close()
+
+
+def run_warmup(
+    handlers: dict[str, Handler] | None = None,
+    queries: Iterable[dict[str, Any]] = (),
+    builders: dict[str, Callable[[], None]] | None = None,
+    readiness: Readiness | None = None,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """Build every index in parallel, then replay warm queries. Returns the status."""
+    readiness = readiness or _readiness
+    builders = INDEX_BUILDERS if builders is None else builders
+    readiness.start()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(
+            max_workers=max_workers or max(1, len(builders)), thread_name_prefix="mcp-warmup"
+        ) as pool:
+            for future in [pool.submit(_run_step, readiness, name, fn) for name, fn in builders.items()]:
+                future.result()
+        if handlers:
+            _run_warm_queries(readiness, handlers, queries)
+    finally:
+        readiness.finish()
+    status = readiness.status()
+    logger.info(
+        "Warmup finished in %.0f ms (%d steps, failed: %s)",
+        (time.perf_counter() - started) * 1000,
+        len(status["steps"]),
+        ", ".join(status["failed_steps"]) or "none",
+    )
+    return status
+
+
+def start_warmup(
+    handlers: dict[str, Handler],
+    queries: Iterable[dict[str, Any]] = (),
+    enabled: bool = True,
+) -> threading.Thread | None:
+    """Run ``run_warmup`` on a daemon thread so the transport can start listening."""
+    if not enabled:
+        _readiness.start()
+        _readiness.finish()
+        return None
+    thread = threading.Thread(
+        target=run_warmup,
+        kwargs={"handlers": handlers, "queries": tuple(queries)},
+        name="mcp-warmup",
+        daemon=True,
+    )
+    thread.start()
+    return thread
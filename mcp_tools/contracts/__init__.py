@@ -18,6 +18,8 @@ TOOL_CONTRACT_VERSIONS = {
     # File operation tools
     "write_file": CONTRACT_VERSION,
     "read_file": CONTRACT_VERSION,
+    # Meta tools
+    "multi_call": CONTRACT_VERSION,
 }
 
 # Error codes for price_check
@@ -133,3 +135,30 @@ READ_FILE_ERROR_CODES = {
     "FILE_NOT_FOUND": FILE_NOT_FOUND,
     "INTERNAL_ERROR": INTERNAL_ERROR,
 }
+
+# Error codes for the multi_call meta tool
+INVALID_STEPS = "INVALID_STEPS"
+UNKNOWN_TOOL = "UNKNOWN_TOOL"
+INVALID_REFERENCE = "INVALID_REFERENCE"
+DEPENDENCY_FAILED = "DEPENDENCY_FAILED"
+
+MULTI_CALL_ERROR_CODES = {
+    "INVALID_STEPS": INVALID_STEPS,
+    "UNKNOWN_TOOL": UNKNOWN_TOOL,
+    "INVALID_REFERENCE": INVALID_REFERENCE,
+    "DEPENDENCY_FAILED": DEPENDENCY_FAILED,
+    "INTERNAL_ERROR": INTERNAL_ERROR,
+}
+
+# Error codes returned by server admission control (any tool)
+RATE_LIMITED = "RATE_LIMITED"
+SESSION_BUSY = "SESSION_BUSY"
+QUEUE_FULL = "QUEUE_FULL"
+QUEUE_TIMEOUT = "QUEUE_TIMEOUT"
+
+ADMISSION_ERROR_CODES = {
+    "RATE_LIMITED": RATE_LIMITED,
+    "SESSION_BUSY": SESSION_BUSY,
+    "QUEUE_FULL": QUEUE_FULL,
+    "QUEUE_TIMEOUT": QUEUE_TIMEOUT,
+}
@@ -60,23 +60,37 @@ def _estimate_cost_usd(input_tokens: int, output_tokens: int) -> float:
     )
 
 
+def _log_files(log_path: Path, target_day: str) -> list[Path]:
+    """Active log plus the files the writer rotated out for ``target_day``.
+
+    Rotated files are named ``<stem>.<YYYY-MM-DD>.<n><suffix>``.
+    """
+    def rotation_index(path: Path) -> int:
+        index = path.name[: len(path.name) - len(log_path.suffix)].rsplit(".", 1)[-1]
+        return int(index) if index.isdigit() else 0
+
+    rotated = sorted(
+        log_path.parent.glob(f"{log_path.stem}.{target_day}.*{log_path.suffix}"),
+        key=rotation_index,
+    )
+    return [*rotated, log_path] if log_path.exists() else rotated
+
+
 def _read_events(log_path: Path, target_day: str) -> list[dict[str, Any]]:
     events: list[dict[str, Any]] = []
-    if not log_path.exists():
-        return events
-
-    with log_path.open(encoding="utf-8") as f:
-        for line in f:
-            raw = line.strip()
-            if not raw:
-                continue
-            payload = json.loads(raw)
-            ts = payload.get("ts")
-            if not ts:
-                continue
-            parsed_day = datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc).date().isoformat()
-            if parsed_day == target_day:
-                events.append(payload)
+    for path in _log_files(log_path, target_day):
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                raw = line.strip()
+                if not raw:
+                    continue
+                payload = json.loads(raw)
+                ts = payload.get("ts")
+                if not ts:
+                    continue
+                parsed_day = datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc).date().isoformat()
+                if parsed_day == target_day:
+                    events.append(payload)
     return events
 
 
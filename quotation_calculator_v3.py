@@ -29,9 +29,9 @@ This module implements all quotation calculations for BMC Uruguay panel products
 from decimal import Decimal, ROUND_HALF_UP, ROUND_CEILING
 from typing import TypedDict, Optional, List, Literal
 from pathlib import Path
-import json
 import math
-import threading
+
+from mcp.kb import registry as kb_registry
 
 # Optimization constants
 OPTIMIZATION_STEP_M = 0.05  # 5cm steps for length optimization
@@ -131,46 +131,27 @@ class QuotationResult(TypedDict):
     notes: List[str]  # Notes including cutting instructions
 
 
-def _load_knowledge_base() -> dict:
-    """Load the single source of truth knowledge base with caching.
+def _knowledge_base_path() -> Path:
+    """Locate the single source of truth knowledge base file."""
+    # Try config directory first
+    kb_path = Path(__file__).parent.parent / "config" / "panelin_truth_bmcuruguay.json"
     
-    Thread-safe using double-checked locking pattern.
-    """
-    global _KNOWLEDGE_BASE_CACHE
+    if not kb_path.exists():
+        # Try root directory with version suffix
+        kb_path = Path(__file__).parent / "panelin_truth_bmcuruguay_web_only_v2.json"
     
-    # Fast path: check if already initialized (no lock needed for read)
-    if _KNOWLEDGE_BASE_CACHE is not None:
-        return _KNOWLEDGE_BASE_CACHE
+    if not kb_path.exists():
+        raise FileNotFoundError(f"Knowledge base not found at {kb_path}")
     
-    # Slow path: need to load KB with lock
-    with _kb_cache_lock:
-        # Double-check inside lock (another thread may have loaded it)
-        if _KNOWLEDGE_BASE_CACHE is not None:
-            return _KNOWLEDGE_BASE_CACHE
-        
-        # Try config directory first
-        kb_path = Path(__file__).parent.parent / "config" / "panelin_truth_bmcuruguay.json"
-        
-        if not kb_path.exists():
-            # Try root directory with version suffix
-            kb_path = Path(__file__).parent / "panelin_truth_bmcuruguay_web_only_v2.json"
-        
-        if not kb_path.exists():
-            raise FileNotFoundError(f"Knowledge base not found at {kb_path}")
-        
-        with open(kb_path, 'r', encoding='utf-8') as f:
-            _KNOWLEDGE_BASE_CACHE = json.load(f)
-        
-        return _KNOWLEDGE_BASE_CACHE
+    return kb_path
 
 
-# V3 ENHANCEMENT: Catalog caching
-_ACCESSORIES_CATALOG_CACHE = None
-_BOM_RULES_CACHE = None
-_KNOWLEDGE_BASE_CACHE = None
-_PRODUCT_INDEX_CACHE = None  # Index for fast product lookups
-_kb_cache_lock = threading.Lock()
-_product_index_lock = threading.Lock()
+def _load_knowledge_base() -> dict:
+    """Load the single source of truth knowledge base.
+    
+    Parsed once per process by the shared KB registry (mcp.kb.registry).
+    """
+    return kb_registry.load(_knowledge_base_path())
 
 
 def _build_product_index(products: dict) -> dict:
@@ -204,19 +185,24 @@ def _build_product_index(products: dict) -> dict:
     }
 
 
+def _get_product_index() -> dict:
+    """Product index, built once per KB version (dropped by a registry reload)."""
+    return kb_registry.derived(
+        "calculator.product_index",
+        (_knowledge_base_path(),),
+        lambda: _build_product_index(_load_knowledge_base().get("products", {})),
+    )
+
+
 def _load_accessories_catalog() -> dict:
     """
     Load accessories catalog with 97 items and pricing.
     
-    V3 NEW: Loads from organized KB structure with caching.
+    V3 NEW: Loads from organized KB structure through the shared KB registry.
     
     Returns:
         dict: Catalog with 'accesorios' array and 'indices' for fast lookup
     """
-    global _ACCESSORIES_CATALOG_CACHE
-    if _ACCESSORIES_CATALOG_CACHE is not None:
-        return _ACCESSORIES_CATALOG_CACHE
-    
     # Try organized KB structure first, then fall back to root
     catalog_path = Path(__file__).parent.parent / "01_KNOWLEDGE_BASE" / "Level_1_2_Accessories" / "accessories_catalog.json"
     
@@ -227,10 +213,7 @@ def _load_accessories_catalog() -> dict:
     if not catalog_path.exists():
         raise FileNotFoundError(f"Accessories catalog not found at {catalog_path}")
     
-    with open(catalog_path, 'r', encoding='utf-8') as f:
-        _ACCESSORIES_CATALOG_CACHE = json.load(f)
-    
-    return _ACCESSORIES_CATALOG_CACHE
+    return kb_registry.load(catalog_path)
 
 
 def _load_bom_rules() -> dict:
@@ -242,10 +225,6 @@ def _load_bom_rules() -> dict:
     Returns:
         dict: Rules with 'sistemas', 'autoportancia', etc.
     """
-    global _BOM_RULES_CACHE
-    if _BOM_RULES_CACHE is not None:
-        return _BOM_RULES_CACHE
-    
     # Try organized KB structure first, then fall back to root
     rules_path = Path(__file__).parent.parent / "01_KNOWLEDGE_BASE" / "Level_1_3_BOM_Rules" / "bom_rules.json"
     
@@ -256,10 +235,7 @@ def _load_bom_rules() -> dict:
     if not rules_path.exists():
         raise FileNotFoundError(f"BOM rules not found at {rules_path}")
     
-    with open(rules_path, 'r', encoding='utf-8') as f:
-        _BOM_RULES_CACHE = json.load(f)
-    
-    return _BOM_RULES_CACHE
+    return kb_registry.load(rules_path)
 
 
 def _decimal_round(value: Decimal, places: int = 2) -> Decimal:
@@ -461,18 +437,10 @@ def lookup_product_specs(
     Returns:
         ProductSpecs dictionary or None if not found
     """
-    global _PRODUCT_INDEX_CACHE
     kb = _load_knowledge_base()
     products = kb.get("products", {})
     
-    # Build index on first call with thread safety
-    # Fast path: check if already initialized (no lock needed for read)
-    if _PRODUCT_INDEX_CACHE is None:
-        # Slow path: need to build index with lock
-        with _product_index_lock:
-            # Double-check inside lock (another thread may have built it)
-            if _PRODUCT_INDEX_CACHE is None:
-                _PRODUCT_INDEX_CACHE = _build_product_index(products)
+    product_index = _get_product_index()
     
     # Direct lookup by product_id - if specified, must match exactly
     if product_id:
@@ -486,13 +454,13 @@ def lookup_product_specs(
     # Use index if both family and thickness are specified
     if family and thickness_mm is not None:
         family_upper = family.upper()
-        candidate_ids = _PRODUCT_INDEX_CACHE["by_family_thickness"].get((family_upper, thickness_mm), [])
+        candidate_ids = product_index["by_family_thickness"].get((family_upper, thickness_mm), [])
         
         # Filter by application if specified
         if application:
             app_lower = application.lower()
             for pid in candidate_ids:
-                if app_lower in _PRODUCT_INDEX_CACHE["normalized_applications"].get(pid, []):
+                if app_lower in product_index["normalized_applications"].get(pid, []):
                     return _product_to_specs(pid, products[pid])
         elif candidate_ids:
             # No application filter, return first match
@@ -507,7 +475,7 @@ def lookup_product_specs(
         if thickness_mm and p.get("thickness_mm") != thickness_mm:
             match = False
         if normalized_app:
-            if normalized_app not in _PRODUCT_INDEX_CACHE["normalized_applications"].get(pid, []):
+            if normalized_app not in product_index["normalized_applications"].get(pid, []):
                 match = False
         
         if match: